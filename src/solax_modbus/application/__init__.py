@@ -0,0 +1,7 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Application domain package for Solax inverter monitoring.
+
+Contains the SnapshotBus that carries polled telemetry from the poll loop to
+its consumers (shared state, storage writer, sinks).
+"""
@@ -0,0 +1,311 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+In-process publish/subscribe bus for telemetry snapshots.
+
+The poll loop publishes each poll's telemetry once as an immutable
+BusMessage; every consumer (shared state for the server and display, the
+storage writer, exporters) subscribes with its own bounded queue, overflow
+policy and delivery thread. publish() only appends to those queues, so a
+slow or stalled consumer loses its own backlog according to its policy and
+never holds up the producer or the other consumers. Adding a sink is one
+subscribe() call.
+
+Design: design-bf6d4e5f-domain_application.md
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, List, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Subscriber queue overflow policies
+POLICY_DROP_OLDEST = "drop-oldest"  # Discard the oldest queued message
+POLICY_DROP_NEWEST = "drop-newest"  # Discard the message being published
+POLICY_LATEST = "latest"  # Keep only the newest message (queue of one)
+SUBSCRIBER_POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_LATEST)
+
+# Default subscriber queue capacity in messages
+DEFAULT_SUBSCRIBER_QUEUE = 64
+
+
+class BusMessage(NamedTuple):
+    """
+    One published telemetry snapshot.
+
+    Attributes:
+        seq: Publish sequence number, from 1.
+        ts: Poll time (epoch seconds), captured at publish so queue lag does
+            not skew consumers' timestamps.
+        data: Read-only view of the telemetry dictionary, shared by every
+            subscriber.
+    """
+
+    seq: int
+    ts: int
+    data: Mapping[str, Any]
+
+
+MessageHandler = Callable[[BusMessage], None]
+
+
+class Subscription:
+    """
+    One consumer's queue and delivery thread.
+
+    Created by SnapshotBus.subscribe(); the handler runs on the
+    subscription's own thread, one message at a time, in publish order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: MessageHandler,
+        max_queue: int = DEFAULT_SUBSCRIBER_QUEUE,
+        policy: str = POLICY_DROP_OLDEST,
+    ) -> None:
+        """
+        Initialize the subscription (not started).
+
+        Args:
+            name: Consumer name for logging and stats.
+            handler: Called with each delivered BusMessage; exceptions are
+                logged and counted.
+            max_queue: Maximum queued messages (1 under POLICY_LATEST).
+            policy: Overflow policy, one of SUBSCRIBER_POLICIES.
+
+        Raises:
+            ValueError: If policy is not a known subscriber policy.
+        """
+        if policy not in SUBSCRIBER_POLICIES:
+            raise ValueError(f"Unknown subscriber policy: {policy}")
+
+        self.name = name
+        self.handler = handler
+        self.policy = policy
+        self.max_queue = 1 if policy == POLICY_LATEST else max(int(max_queue), 1)
+
+        self._queue: Deque[BusMessage] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Counters (guarded by _cond)
+        self._delivered = 0
+        self._dropped = 0
+        self._failed = 0
+        self._last_seq = 0
+
+    def start(self) -> None:
+        """Start the delivery thread. Idempotent."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"Bus-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Deliver queued messages and stop the delivery thread.
+
+        Args:
+            timeout: Maximum seconds to wait for the queue to drain; messages
+                still queued afterwards are counted as dropped.
+
+        Notes:
+            Idempotent; safe if not started.
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning(
+                    "Bus subscriber %s did not drain within %.1fs", self.name, timeout
+                )
+
+        with self._cond:
+            self._dropped += len(self._queue)
+            self._queue.clear()
+
+    def offer(self, message: BusMessage) -> bool:
+        """
+        Queue a message without waiting, applying the overflow policy.
+
+        Args:
+            message: Published message.
+
+        Returns:
+            True if queued, False if dropped or the subscription is stopped.
+        """
+        with self._cond:
+            if not self._running:
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                self._dropped += 1
+                if self.policy == POLICY_DROP_NEWEST:
+                    return False
+                self._queue.popleft()
+
+            self._queue.append(message)
+            self._cond.notify()
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and delivery counters."""
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "queue_size": len(self._queue),
+                "queue_capacity": self.max_queue,
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "last_seq": self._last_seq,
+            }
+
+    def _run(self) -> None:
+        """Deliver messages until stopped and drained."""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                message = self._queue.popleft()
+
+            try:
+                self.handler(message)
+                failed = False
+            except Exception as e:
+                logger.error("Bus subscriber %s failed: %s", self.name, e, exc_info=True)
+                failed = True
+
+            with self._cond:
+                self._last_seq = message.seq
+                if failed:
+                    self._failed += 1
+                else:
+                    self._delivered += 1
+
+
+class SnapshotBus:
+    """
+    Fan-out of polled telemetry to independently queued subscribers.
+
+    Thread-safe: publish() may be called from the poll loop while
+    subscriptions are added or removed elsewhere.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no subscribers (not started)."""
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._running = False
+        self._seq = 0
+
+    def subscribe(
+        self,
+        name: str,
+        handler: MessageHandler,
+        max_queue: int = DEFAULT_SUBSCRIBER_QUEUE,
+        policy: str = POLICY_DROP_OLDEST,
+    ) -> Subscription:
+        """
+        Register a consumer; it receives messages published from now on.
+
+        Args:
+            name: Consumer name for logging and stats.
+            handler: Called on the subscription's thread with each message.
+            max_queue: Maximum queued messages for this consumer.
+            policy: Overflow policy, one of SUBSCRIBER_POLICIES.
+
+        Returns:
+            The Subscription (started if the bus is running).
+
+        Raises:
+            ValueError: If policy is not a known subscriber policy.
+        """
+        subscription = Subscription(name, handler, max_queue, policy)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            running = self._running
+        if running:
+            subscription.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription, delivering what it has queued."""
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+        subscription.stop()
+
+    def start(self) -> None:
+        """Start every subscription's delivery thread. Idempotent."""
+        with self._lock:
+            self._running = True
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.start()
+        logger.info(
+            "Snapshot bus started (%s)", ", ".join(s.name for s in subscriptions) or "no subscribers"
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Drain and stop every subscription, in subscription order.
+
+        Args:
+            timeout: Maximum seconds to wait for each subscription to drain.
+        """
+        with self._lock:
+            self._running = False
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.stop(timeout)
+
+    def publish(self, data: Dict[str, Any], ts: Optional[int] = None) -> BusMessage:
+        """
+        Publish one poll's telemetry to every subscriber without waiting.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter(); copied once.
+            ts: Poll time (None = now).
+
+        Returns:
+            The published message.
+        """
+        view = MappingProxyType(dict(data))
+        with self._lock:
+            self._seq += 1
+            message = BusMessage(self._seq, int(time.time()) if ts is None else ts, view)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.offer(message)
+        return message
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the publish count and per-subscriber queue statistics."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            published = self._seq
+        return {
+            "published": published,
+            "subscribers": {s.name: s.stats() for s in subscriptions},
+        }
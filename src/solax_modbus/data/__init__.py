@@ -2,5 +2,7 @@
 """
 Data domain package for Solax inverter monitoring.
 
-Contains the TimeSeriesStore for local SQLite time-series persistence.
+Contains the StoreBackend interface and its backends (TimeSeriesStore for SQLite,
+MemoryStore, SegmentLogStore), and the StorageWriter that moves store writes off
+the polling thread.
 """
@@ -0,0 +1,592 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Storage backend interface for Solax inverter telemetry history.
+
+Defines the StoreBackend contract shared by every history store (write, rollup,
+prune and query), the metric, retention and bucket constants they implement,
+sample validation, and the factory used to select a backend by name.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Valid metrics for storage and query
+STORED_METRICS = ("pv_power", "battery_power", "battery_soc", "grid_power_total")
+
+# Raw sample: (ts, pv_power, battery_power, battery_soc, grid_power_total)
+RawSample = Tuple[int, Optional[int], Optional[int], Optional[int], Optional[int]]
+
+# Retention windows in seconds
+RAW_RETENTION_SECONDS = 86400  # 24 hours
+ROLLUP_RETENTION_SECONDS = 2592000  # 30 days
+DAILY_ROLLUP_RETENTION_SECONDS = 31536000  # 365 days
+
+# Rollup bucket size in seconds (15 minutes)
+ROLLUP_BUCKET_SECONDS = 900
+
+# Daily rollup bucket size in seconds (1 day)
+DAILY_ROLLUP_BUCKET_SECONDS = 86400
+
+# Range validation bounds
+RANGE_BOUNDS: Dict[str, tuple] = {
+    "pv_power": (0, 15000),
+    "battery_power": (-15000, 15000),
+    "battery_soc": (0, 100),
+    "grid_power_total": (-15000, 15000),
+}
+
+# Selectable backend names (see create_store)
+BACKEND_SQLITE = "sqlite"
+BACKEND_MEMORY = "memory"
+BACKEND_SEGMENT = "segment"
+STORE_BACKENDS = (BACKEND_SQLITE, BACKEND_MEMORY, BACKEND_SEGMENT)
+
+# History tiers whose change generation is tracked (see history_generation)
+TIER_ROLLUP = "rollup"
+TIER_DAILY = "daily"
+
+# Exportable tables and their columns, in row order (see export_rows)
+EXPORT_TABLES: Dict[str, Tuple[str, ...]] = {
+    "raw": ("ts",) + STORED_METRICS,
+    "rollup": ("bucket_ts", "metric", "avg", "min", "max"),
+    "daily_rollup": ("bucket_ts", "metric", "avg", "min", "max"),
+}
+
+# Rows fetched per export batch
+EXPORT_BATCH_ROWS = 1000
+
+
+class TimedLock:
+    """
+    Mutex that accounts the time each thread spends waiting to acquire it.
+
+    Backends guard their storage with one, so callers can split lock
+    contention out of a query's latency (see StoreBackend.take_lock_wait).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an unlocked mutex with no recorded waits."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Acquire the lock, adding the wait to this thread's total."""
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self._local.wait = getattr(self._local, "wait", 0.0) + time.perf_counter() - started
+        return acquired
+
+    def release(self) -> None:
+        """Release the lock."""
+        self._lock.release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+    def take_wait(self) -> float:
+        """Return and reset the calling thread's accumulated wait (seconds)."""
+        wait = getattr(self._local, "wait", 0.0)
+        self._local.wait = 0.0
+        return wait
+
+
+class HistoryColumns(NamedTuple):
+    """
+    One metric's history series as parallel typed arrays.
+
+    Attributes:
+        bucket_ts: Bucket start times, ascending (array of int64).
+        avg: Bucket averages (array of double).
+        min: Bucket minima (array of double).
+        max: Bucket maxima (array of double).
+    """
+
+    bucket_ts: array
+    avg: array
+    min: array
+    max: array
+
+    @classmethod
+    def empty(cls) -> HistoryColumns:
+        """Return a new, empty set of columns."""
+        return cls(array("q"), array("d"), array("d"), array("d"))
+
+    def append(self, bucket_ts: int, avg: float, lo: float, hi: float) -> None:
+        """Append one bucket."""
+        self.bucket_ts.append(bucket_ts)
+        self.avg.append(avg)
+        self.min.append(lo)
+        self.max.append(hi)
+
+
+class StoreBackend(abc.ABC):
+    """
+    Abstract time-series store for telemetry history.
+
+    Implementations persist raw samples, aggregate them into 15-minute and
+    1-day rollup buckets, enforce the retention windows and serve history
+    series. All methods must be thread-safe: a writer thread mutates while
+    HTTP handlers query. Errors are logged and reported through return values
+    rather than raised, except ValueError for unknown metrics.
+
+    Backends that keep recent raw samples in a RawRingBuffer assign it to
+    _ring; query_recent() and query_live_bucket() are then served from memory.
+
+    Backends call _mark_changed() after each rollup or prune of a tier, so
+    callers can cache query results keyed on history_generation().
+    """
+
+    # Recent raw samples (RawRingBuffer), or None if the backend keeps none
+    _ring: Optional[Any] = None
+
+    # Change counters per history tier (instance attributes once bumped)
+    _rollup_generation = 0
+    _daily_generation = 0
+
+    @abc.abstractmethod
+    def write_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
+        """
+        Validate and record one telemetry sample.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter().
+            ts: Sample epoch timestamp (None = now).
+
+        Returns:
+            True if the sample was recorded, False on error.
+        """
+
+    @abc.abstractmethod
+    def rollup(self) -> int:
+        """
+        Aggregate retained raw samples into 15-minute rollup buckets.
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+
+    @abc.abstractmethod
+    def prune(self) -> int:
+        """
+        Drop raw samples older than 24 hours and rollup rows older than 30 days.
+
+        Returns:
+            Total number of rows deleted.
+        """
+
+    @abc.abstractmethod
+    def rollup_daily(self) -> int:
+        """
+        Aggregate rollup rows into 1-day buckets (avg of avg, min of min, max of max).
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+
+    @abc.abstractmethod
+    def prune_daily(self) -> int:
+        """
+        Drop daily rollup rows older than a rolling trailing 365 days.
+
+        Returns:
+            Number of rows deleted.
+        """
+
+    @abc.abstractmethod
+    def query_history(
+        self, metric: str, window_seconds: int, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return rollup series for one metric over a trailing window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            window_seconds: Trailing window in seconds.
+            since: If given, only buckets with bucket_ts >= since (delta query).
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+
+    @abc.abstractmethod
+    def query_history_12mo(
+        self, metric: str, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return daily rollup series for one metric over a trailing 365-day window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            since: If given, only buckets with bucket_ts >= since (delta query).
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Flush and release resources. Idempotent."""
+
+    def query_history_columns(
+        self, metric: str, window_seconds: int, since: Optional[int] = None
+    ) -> HistoryColumns:
+        """
+        Return the query_history() series as parallel arrays.
+
+        Backends that can fill the arrays straight from their storage should
+        override this; the default converts the row series.
+
+        Args:
+            metric: One of STORED_METRICS.
+            window_seconds: Trailing window in seconds.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            HistoryColumns in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        return columns_from_series(self.query_history(metric, window_seconds, since=since))
+
+    def query_history_12mo_columns(
+        self, metric: str, since: Optional[int] = None
+    ) -> HistoryColumns:
+        """
+        Return the query_history_12mo() series as parallel arrays.
+
+        Args:
+            metric: One of STORED_METRICS.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            HistoryColumns in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        return columns_from_series(self.query_history_12mo(metric, since=since))
+
+    def query_recent(self, metric: str, window_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Return raw points for one metric over a trailing window, from memory.
+
+        Args:
+            metric: One of STORED_METRICS.
+            window_seconds: Trailing window in seconds (at most 24 hours).
+
+        Returns:
+            List of {ts, value} dictionaries in chronological order; empty if
+            the backend keeps no in-memory window.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._ring is None:
+            return []
+
+        cutoff = int(time.time()) - window_seconds
+        return [{"ts": ts, "value": value} for ts, value in self._ring.points(metric, cutoff)]
+
+    def query_live_bucket(
+        self, metric: str, bucket_seconds: int = ROLLUP_BUCKET_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate the currently open bucket for one metric, from memory.
+
+        Args:
+            metric: One of STORED_METRICS.
+            bucket_seconds: Bucket width (15-minute rollup or 1-day daily).
+
+        Returns:
+            {bucket_ts, avg, min, max} for the bucket containing now, or None
+            if it has no samples or the backend keeps no in-memory window.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._ring is None:
+            return None
+
+        now = int(time.time())
+        bucket_ts = now - (now % bucket_seconds)
+        buckets = self._ring.aggregate(metric, bucket_ts, bucket_seconds)
+        if bucket_ts not in buckets:
+            return None
+        avg, lo, hi = buckets[bucket_ts]
+        return {"bucket_ts": bucket_ts, "avg": avg, "min": lo, "max": hi}
+
+    def export_rows(
+        self,
+        table: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        batch_rows: int = EXPORT_BATCH_ROWS,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Yield the rows of one table in chronological batches.
+
+        The default serves raw rows from the in-memory ring and rollup rows
+        from the query methods; backends with on-disk tables override it to
+        stream from storage. Closing the iterator early releases whatever
+        the export holds open.
+
+        Args:
+            table: One of EXPORT_TABLES.
+            start: Oldest timestamp to include (None = everything retained).
+            end: Timestamp to stop before (None = no upper bound).
+            batch_rows: Rows per yielded batch.
+
+        Yields:
+            Lists of at most batch_rows tuples in EXPORT_TABLES[table] order.
+
+        Raises:
+            ValueError: If table is not exportable.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+
+        if table == "raw":
+            samples = self._ring.samples(start or 0) if self._ring is not None else []
+            rows: List[Tuple[Any, ...]] = list(samples)
+        else:
+            rows = sorted(
+                (bucket["bucket_ts"], metric, bucket["avg"], bucket["min"], bucket["max"])
+                for metric in STORED_METRICS
+                for bucket in (
+                    self.query_history(metric, ROLLUP_RETENTION_SECONDS, since=start)
+                    if table == "rollup"
+                    else self.query_history_12mo(metric, since=start)
+                )
+            )
+        if end is not None:
+            rows = [row for row in rows if row[0] < end]
+
+        batch_rows = max(batch_rows, 1)
+        for offset in range(0, len(rows), batch_rows):
+            yield rows[offset:offset + batch_rows]
+
+    def take_lock_wait(self) -> float:
+        """
+        Return and reset the store-lock wait accumulated by the calling thread.
+
+        Returns:
+            Seconds spent waiting for the backend's lock since the last call
+            on this thread; 0.0 for backends without a TimedLock.
+        """
+        lock = getattr(self, "_lock", None)
+        return lock.take_wait() if isinstance(lock, TimedLock) else 0.0
+
+    def history_generation(self, tier: str) -> int:
+        """
+        Return the change generation of a history tier.
+
+        The value increases whenever rollup/prune (TIER_ROLLUP) or
+        rollup_daily/prune_daily (TIER_DAILY) may have changed the series the
+        query methods return; reading it touches no storage.
+
+        Args:
+            tier: TIER_ROLLUP or TIER_DAILY.
+
+        Returns:
+            Monotonic generation counter for the tier.
+        """
+        if tier == TIER_DAILY:
+            return self._daily_generation
+        return self._rollup_generation
+
+    def _mark_changed(self, tier: str) -> None:
+        """Advance the change generation of a history tier."""
+        if tier == TIER_DAILY:
+            self._daily_generation += 1
+        else:
+            self._rollup_generation += 1
+
+    def _validate(self, data: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        """
+        Derive and range-check the four stored metrics from telemetry.
+
+        Args:
+            data: Raw telemetry dictionary.
+
+        Returns:
+            Dictionary with pv_power, battery_power, battery_soc, grid_power_total.
+            Out-of-range values are set to None.
+        """
+        result: Dict[str, Optional[int]] = {}
+        for metric, value in derive_metrics(data).items():
+            if value is not None and not self._in_range(metric, value):
+                logger.warning("%s=%d out of range, storing NULL", metric, value)
+                value = None
+            result[metric] = value
+        return result
+
+    def _in_range(self, metric: str, value: int) -> bool:
+        """Check if value is within the defined bounds for the metric."""
+        bounds = RANGE_BOUNDS.get(metric)
+        if bounds is None:
+            return True
+        return bounds[0] <= value <= bounds[1]
+
+
+def derive_metrics(data: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """
+    Derive the stored metrics from telemetry, before range checks.
+
+    Shared by storage and live displays so a live value always matches the
+    history drawn beside it.
+
+    Args:
+        data: Telemetry dictionary from poll_inverter().
+
+    Returns:
+        Value per STORED_METRICS name; None where the inputs are missing.
+    """
+    # pv_power: pv1_power + pv2_power (both required)
+    pv1 = data.get("pv1_power")
+    pv2 = data.get("pv2_power")
+    pv_power = int(pv1) + int(pv2) if pv1 is not None and pv2 is not None else None
+
+    # battery_power and battery_soc: direct reads
+    bp = data.get("battery_power")
+    soc = data.get("battery_soc")
+
+    # grid_power_total: sum of grid_power_r + grid_power_s + grid_power_t
+    # Missing individual phases are treated as 0; if all three are absent,
+    # grid_power_total is NULL.
+    phases = [data.get(f"grid_power_{phase}") for phase in ("r", "s", "t")]
+    present = [int(p) for p in phases if p is not None]
+
+    return {
+        "pv_power": pv_power,
+        "battery_power": int(bp) if bp is not None else None,
+        "battery_soc": int(soc) if soc is not None else None,
+        "grid_power_total": sum(present) if present else None,
+    }
+
+
+def aggregate_buckets(
+    points: Iterable[Tuple[int, Optional[float], Optional[float], Optional[float]]],
+    bucket_seconds: int,
+) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Group (ts, avg, min, max) points into fixed-width buckets.
+
+    Used by in-process backends to mirror the SQL rollups: the bucket average
+    is the mean of point averages, min the least minimum, max the greatest
+    maximum. Points with a None average are skipped.
+
+    Args:
+        points: Iterable of (ts, avg, min, max); raw samples pass the value thrice.
+        bucket_seconds: Bucket width in seconds.
+
+    Returns:
+        Mapping of bucket_ts to (avg, min, max).
+    """
+    acc: Dict[int, List[float]] = {}
+    for ts, avg, lo, hi in points:
+        if avg is None:
+            continue
+        bucket_ts = ts - (ts % bucket_seconds)
+        entry = acc.get(bucket_ts)
+        if entry is None:
+            acc[bucket_ts] = [avg, 1, lo, hi]
+        else:
+            entry[0] += avg
+            entry[1] += 1
+            entry[2] = min(entry[2], lo)
+            entry[3] = max(entry[3], hi)
+    return {
+        bucket_ts: (total / count, float(lo), float(hi))
+        for bucket_ts, (total, count, lo, hi) in acc.items()
+    }
+
+
+def series_from_buckets(
+    buckets: Dict[int, Tuple[float, float, float]], cutoff: int
+) -> List[Dict[str, Any]]:
+    """
+    Render a bucket mapping as a chronological {bucket_ts, avg, min, max} list.
+
+    Args:
+        buckets: Mapping of bucket_ts to (avg, min, max).
+        cutoff: Oldest bucket_ts to include.
+
+    Returns:
+        Series in the query_history() shape.
+    """
+    return [
+        {"bucket_ts": bucket_ts, "avg": avg, "min": lo, "max": hi}
+        for bucket_ts, (avg, lo, hi) in sorted(buckets.items())
+        if bucket_ts >= cutoff
+    ]
+
+
+def columns_from_series(series: Iterable[Dict[str, Any]]) -> HistoryColumns:
+    """
+    Convert a {bucket_ts, avg, min, max} series to HistoryColumns.
+
+    Args:
+        series: Series in the query_history() shape.
+
+    Returns:
+        The same buckets as parallel arrays (buckets with no average skipped).
+    """
+    columns = HistoryColumns.empty()
+    for point in series:
+        if point["avg"] is not None:
+            columns.append(point["bucket_ts"], point["avg"], point["min"], point["max"])
+    return columns
+
+
+def create_store(backend: str, path: str, **kwargs: Any) -> StoreBackend:
+    """
+    Open a history store by backend name.
+
+    Args:
+        backend: One of STORE_BACKENDS.
+        path: SQLite database file (sqlite), segment directory (segment);
+            ignored by the memory backend.
+        **kwargs: Backend options: ring_capacity (all backends), profile and
+            journal_dir (sqlite).
+
+    Returns:
+        An open StoreBackend.
+
+    Raises:
+        ValueError: If backend is not a known backend name.
+    """
+    # Imported here: the concrete modules import this one
+    if backend == BACKEND_SQLITE:
+        from solax_modbus.data.storage import TimeSeriesStore
+        return TimeSeriesStore(path, **kwargs)
+    if backend == BACKEND_MEMORY:
+        from solax_modbus.data.memory import MemoryStore
+        return MemoryStore(**kwargs)
+    if backend == BACKEND_SEGMENT:
+        from solax_modbus.data.segment import SegmentLogStore
+        return SegmentLogStore(path, **kwargs)
+    raise ValueError(f"Unknown store backend: {backend}")
@@ -0,0 +1,289 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Crash-safe append-only sample journal for Solax inverter telemetry.
+
+Raw samples are appended as fixed-size CRC-protected records to preallocated
+segment files. Full segments are sealed (flushed to the device) and handed to
+a compactor that moves them into SQLite in one transaction, after which the
+file is recycled for a later segment instead of being deleted and recreated.
+The active segment's records can also be read back for compaction while it
+keeps filling.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from solax_modbus.data.base import RawSample
+from solax_modbus.data.segment import (
+    SAMPLE_RECORD_SIZE,
+    decode_samples,
+    encode_sample,
+)
+
+logger = logging.getLogger(__name__)
+
+# Default records per segment (~85 minutes at a 5-second poll interval, 30 KB)
+DEFAULT_SEGMENT_RECORDS = 1024
+
+# Segment header: magic, sequence number (0 = free slot)
+_HEADER = struct.Struct("<4sQ")
+_HEADER_MAGIC = b"SXJ1"
+HEADER_SIZE = _HEADER.size
+
+_SLOT_PREFIX = "journal-"
+_SLOT_SUFFIX = ".seg"
+
+
+def _salt(seq: int) -> int:
+    """Return the record CRC salt for a segment sequence number."""
+    return seq & 0xFFFFFFFF
+
+
+def _sync(fd: int) -> None:
+    """Flush file data to the device (fdatasync where available)."""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+class SampleJournal:
+    """
+    Append-only journal of raw samples in recyclable, preallocated segments.
+
+    Each segment file (slot) carries a header with a monotonically increasing
+    sequence number; records are CRC-salted with it, so records left over from
+    a slot's previous use never replay. On open, every slot holding a sequence
+    number is treated as sealed and returned by sealed() for compaction.
+    Thread-safe; uses its own lock.
+
+    Notes:
+        Segments are written with positional writes rather than O_APPEND: on
+        a preallocated file O_APPEND would write past the preallocated blocks.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_records: int = DEFAULT_SEGMENT_RECORDS,
+        first_seq: int = 1,
+    ) -> None:
+        """
+        Open (or create) the journal directory and index its slots.
+
+        Args:
+            directory: Directory holding journal segment files.
+            segment_records: Records per segment before it is sealed.
+            first_seq: Lowest sequence number for new segments; callers pass
+                one past the last compacted sequence.
+
+        Raises:
+            OSError: If the directory cannot be created or read.
+        """
+        self.directory = directory
+        self.segment_records = max(int(segment_records), 1)
+        self._segment_bytes = HEADER_SIZE + self.segment_records * SAMPLE_RECORD_SIZE
+        self._lock = threading.Lock()
+
+        self._free: List[int] = []
+        self._sealed: Dict[int, int] = {}  # seq -> slot
+        self._next_slot = 0
+
+        # Active segment
+        self._fd: Optional[int] = None
+        self._slot: Optional[int] = None
+        self._seq = 0
+        self._count = 0
+
+        os.makedirs(directory, exist_ok=True)
+        max_seq = 0
+        for slot in self._existing_slots():
+            seq = self._read_seq(slot)
+            self._next_slot = max(self._next_slot, slot + 1)
+            if seq:
+                self._sealed[seq] = slot
+                max_seq = max(max_seq, seq)
+            else:
+                self._free.append(slot)
+        self._next_seq = max(max_seq + 1, int(first_seq))
+
+        logger.info(
+            "SampleJournal opened: %s (%d unflushed segments, %d free)",
+            directory,
+            len(self._sealed),
+            len(self._free),
+        )
+
+    def append(self, ts: int, values: Sequence[Optional[int]]) -> bool:
+        """
+        Append one sample record to the active segment.
+
+        Args:
+            ts: Sample epoch timestamp.
+            values: Metric values in STORED_METRICS order (None = NULL).
+
+        Returns:
+            True if the append sealed a full segment (compaction is due).
+
+        Raises:
+            OSError: On write failure.
+        """
+        with self._lock:
+            if self._fd is None:
+                self._open_segment()
+            record = encode_sample(ts, values, _salt(self._seq))
+            os.pwrite(self._fd, record, HEADER_SIZE + self._count * SAMPLE_RECORD_SIZE)
+            self._count += 1
+            if self._count >= self.segment_records:
+                self._seal_active()
+                return True
+            return False
+
+    def seal(self) -> None:
+        """Seal the active segment if it holds any records."""
+        with self._lock:
+            if self._fd is not None and self._count > 0:
+                self._seal_active()
+
+    def sealed(self) -> List[Tuple[int, List[RawSample]]]:
+        """
+        Return the records of every sealed segment, oldest sequence first.
+
+        Returns:
+            List of (seq, samples) pairs.
+        """
+        with self._lock:
+            pending = sorted(self._sealed.items())
+
+        result = []
+        for seq, slot in pending:
+            with open(self._slot_path(slot), "rb") as f:
+                buf = f.read()
+            samples, _ = decode_samples(buf[HEADER_SIZE:], _salt(seq))
+            result.append((seq, samples))
+        return result
+
+    def active(self) -> Optional[Tuple[int, List[RawSample]]]:
+        """
+        Return the records appended to the active segment so far.
+
+        The segment is not sealed or flushed; callers compacting from it
+        track how many of its records they have already taken.
+
+        Returns:
+            (seq, samples), or None if no segment is active.
+        """
+        with self._lock:
+            if self._fd is None:
+                return None
+            seq = self._seq
+            buf = os.pread(self._fd, self._count * SAMPLE_RECORD_SIZE, HEADER_SIZE)
+        samples, _ = decode_samples(buf, _salt(seq))
+        return seq, samples
+
+    def recycle(self, seq: int) -> None:
+        """
+        Return a compacted segment's slot to the free pool.
+
+        Args:
+            seq: Sequence number of a sealed segment.
+        """
+        with self._lock:
+            slot = self._sealed.pop(seq, None)
+            if slot is None:
+                return
+            self._write_header(slot, 0)
+            self._free.append(slot)
+
+    @property
+    def pending(self) -> int:
+        """Return the number of sealed segments awaiting compaction."""
+        with self._lock:
+            return len(self._sealed)
+
+    def close(self) -> None:
+        """Seal the active segment and release its descriptor. Idempotent."""
+        self.seal()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                if self._slot is not None:
+                    self._write_header(self._slot, 0)
+                    self._free.append(self._slot)
+            self._slot = None
+
+    def _existing_slots(self) -> List[int]:
+        """Return slot numbers of existing segment files."""
+        slots = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SLOT_PREFIX) and name.endswith(_SLOT_SUFFIX):
+                try:
+                    slots.append(int(name[len(_SLOT_PREFIX):-len(_SLOT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(slots)
+
+    def _slot_path(self, slot: int) -> str:
+        """Return the file path of a slot."""
+        return os.path.join(self.directory, f"{_SLOT_PREFIX}{slot}{_SLOT_SUFFIX}")
+
+    def _read_seq(self, slot: int) -> int:
+        """Read a slot's header sequence number (0 if free or unreadable)."""
+        try:
+            with open(self._slot_path(slot), "rb") as f:
+                magic, seq = _HEADER.unpack(f.read(HEADER_SIZE))
+            return seq if magic == _HEADER_MAGIC else 0
+        except (OSError, struct.error):
+            return 0
+
+    def _write_header(self, slot: int, seq: int) -> None:
+        """Write and flush a slot header."""
+        fd = os.open(self._slot_path(slot), os.O_WRONLY)
+        try:
+            os.pwrite(fd, _HEADER.pack(_HEADER_MAGIC, seq), 0)
+            _sync(fd)
+        finally:
+            os.close(fd)
+
+    def _open_segment(self) -> None:
+        """Start a new active segment in a free or newly preallocated slot."""
+        if self._free:
+            slot = self._free.pop(0)
+            fd = os.open(self._slot_path(slot), os.O_RDWR)
+        else:
+            slot = self._next_slot
+            self._next_slot += 1
+            fd = os.open(self._slot_path(slot), os.O_RDWR | os.O_CREAT, 0o644)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, self._segment_bytes)
+            else:
+                os.ftruncate(fd, self._segment_bytes)
+
+        seq = self._next_seq
+        self._next_seq += 1
+        os.pwrite(fd, _HEADER.pack(_HEADER_MAGIC, seq), 0)
+        _sync(fd)
+
+        self._fd = fd
+        self._slot = slot
+        self._seq = seq
+        self._count = 0
+        logger.debug("Journal segment %d opened in slot %d", seq, slot)
+
+    def _seal_active(self) -> None:
+        """Flush the active segment to the device and mark it sealed."""
+        _sync(self._fd)
+        os.close(self._fd)
+        self._sealed[self._seq] = self._slot
+        logger.debug("Journal segment %d sealed (%d records)", self._seq, self._count)
+        self._fd = None
+        self._slot = None
+        self._count = 0
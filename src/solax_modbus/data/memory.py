@@ -0,0 +1,261 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+In-memory time-series store for Solax inverter telemetry history.
+
+Keeps raw samples in a fixed-capacity RawRingBuffer and rollup aggregates in
+dictionaries. Nothing touches the filesystem, so it suits tmpfs and read-only
+root deployments; history is lost on restart.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from solax_modbus.data.base import (
+    DAILY_ROLLUP_BUCKET_SECONDS,
+    DAILY_ROLLUP_RETENTION_SECONDS,
+    RAW_RETENTION_SECONDS,
+    ROLLUP_BUCKET_SECONDS,
+    ROLLUP_RETENTION_SECONDS,
+    STORED_METRICS,
+    TIER_DAILY,
+    TIER_ROLLUP,
+    StoreBackend,
+    TimedLock,
+    aggregate_buckets,
+    series_from_buckets,
+)
+from solax_modbus.data.ringbuffer import DEFAULT_RING_CAPACITY, RawRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStore(StoreBackend):
+    """
+    Volatile in-memory store implementing the StoreBackend contract.
+
+    Raw samples live in a RawRingBuffer (oldest evicted first once capacity is
+    reached); rollup and daily rollup buckets live in per-metric dictionaries.
+    Thread-safe; uses a single lock to guard rollup state.
+    """
+
+    def __init__(self, ring_capacity: int = DEFAULT_RING_CAPACITY) -> None:
+        """
+        Initialize an empty store.
+
+        Args:
+            ring_capacity: Maximum number of raw samples retained.
+        """
+        self._lock = TimedLock()
+        self._ring = RawRingBuffer(ring_capacity)
+        self._rollup: Dict[str, Dict[int, Tuple[float, float, float]]] = {
+            metric: {} for metric in STORED_METRICS
+        }
+        self._daily: Dict[str, Dict[int, Tuple[float, float, float]]] = {
+            metric: {} for metric in STORED_METRICS
+        }
+        self._closed = False
+        logger.info("MemoryStore opened (raw capacity %d)", self._ring.capacity)
+
+    def write_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
+        """
+        Validate and append one telemetry sample to the raw ring buffer.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter().
+            ts: Sample epoch timestamp (None = now).
+
+        Returns:
+            True if the sample was recorded, False on error.
+        """
+        if self._closed:
+            return False
+
+        try:
+            validated = self._validate(data)
+            if ts is None:
+                ts = int(time.time())
+            self._ring.append(ts, [validated.get(m) for m in STORED_METRICS])
+            return True
+        except Exception as e:
+            logger.error("Unexpected error in write_sample: %s", e, exc_info=True)
+            return False
+
+    def rollup(self) -> int:
+        """
+        Aggregate retained raw samples into 15-minute rollup buckets.
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+        if self._closed:
+            return 0
+
+        rows_affected = 0
+        with self._lock:
+            for metric in STORED_METRICS:
+                buckets = self._ring.aggregate(metric, 0, ROLLUP_BUCKET_SECONDS)
+                self._rollup[metric].update(buckets)
+                rows_affected += len(buckets)
+
+        logger.info("Rollup completed: %d bucket-metric rows affected", rows_affected)
+        self._mark_changed(TIER_ROLLUP)
+        return rows_affected
+
+    def prune(self) -> int:
+        """
+        Drop raw samples older than 24 hours and rollup rows older than 30 days.
+
+        Returns:
+            Total number of rows deleted.
+        """
+        if self._closed:
+            return 0
+
+        now = int(time.time())
+        raw_cutoff = now - RAW_RETENTION_SECONDS
+        rollup_cutoff = now - ROLLUP_RETENTION_SECONDS
+
+        raw_deleted = self._ring.evict_before(raw_cutoff)
+        with self._lock:
+            rollup_deleted = self._prune_buckets(self._rollup, rollup_cutoff)
+
+        logger.info(
+            "Prune completed: %d raw rows, %d rollup rows deleted",
+            raw_deleted,
+            rollup_deleted,
+        )
+        if rollup_deleted:
+            self._mark_changed(TIER_ROLLUP)
+        return raw_deleted + rollup_deleted
+
+    def rollup_daily(self) -> int:
+        """
+        Aggregate rollup buckets into 1-day daily rollup buckets.
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+        if self._closed:
+            return 0
+
+        rows_affected = 0
+        with self._lock:
+            for metric in STORED_METRICS:
+                buckets = aggregate_buckets(
+                    (
+                        (bucket_ts, avg, lo, hi)
+                        for bucket_ts, (avg, lo, hi) in self._rollup[metric].items()
+                    ),
+                    DAILY_ROLLUP_BUCKET_SECONDS,
+                )
+                self._daily[metric].update(buckets)
+                rows_affected += len(buckets)
+
+        logger.info(
+            "Daily rollup completed: %d bucket-metric rows affected", rows_affected
+        )
+        self._mark_changed(TIER_DAILY)
+        return rows_affected
+
+    def prune_daily(self) -> int:
+        """
+        Drop daily rollup rows older than a rolling trailing 365 days.
+
+        Returns:
+            Number of rows deleted.
+        """
+        if self._closed:
+            return 0
+
+        cutoff = int(time.time()) - DAILY_ROLLUP_RETENTION_SECONDS
+        with self._lock:
+            deleted = self._prune_buckets(self._daily, cutoff)
+        logger.info("Daily prune completed: %d rows deleted", deleted)
+        if deleted:
+            self._mark_changed(TIER_DAILY)
+        return deleted
+
+    def query_history(
+        self, metric: str, window_seconds: int, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return rollup series for one metric over a trailing window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            window_seconds: Trailing window in seconds.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._closed:
+            return []
+
+        cutoff = int(time.time()) - window_seconds
+        if since is not None:
+            cutoff = max(cutoff, since)
+        with self._lock:
+            return series_from_buckets(self._rollup[metric], cutoff)
+
+    def query_history_12mo(
+        self, metric: str, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return daily rollup series for one metric over a trailing 365-day window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._closed:
+            return []
+
+        cutoff = int(time.time()) - DAILY_ROLLUP_RETENTION_SECONDS
+        if since is not None:
+            cutoff = max(cutoff, since)
+        with self._lock:
+            return series_from_buckets(self._daily[metric], cutoff)
+
+    def close(self) -> None:
+        """Release all retained history. Idempotent."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ring.clear()
+        with self._lock:
+            for table in (self._rollup, self._daily):
+                for buckets in table.values():
+                    buckets.clear()
+        logger.info("MemoryStore closed")
+
+    @staticmethod
+    def _prune_buckets(
+        table: Dict[str, Dict[int, Tuple[float, float, float]]], cutoff: int
+    ) -> int:
+        """Delete buckets older than cutoff from every metric; return the count."""
+        deleted = 0
+        for buckets in table.values():
+            stale = [bucket_ts for bucket_ts in buckets if bucket_ts < cutoff]
+            for bucket_ts in stale:
+                del buckets[bucket_ts]
+            deleted += len(stale)
+        return deleted
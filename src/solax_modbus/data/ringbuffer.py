@@ -0,0 +1,201 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Fixed-capacity in-memory ring buffer of recent raw telemetry samples.
+
+Stores the last N raw samples column-wise in preallocated typed arrays (one
+int64 timestamp column plus one int32 column per stored metric), so memory is
+fixed at construction and recent-window queries run without touching storage.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from solax_modbus.data.base import RAW_RETENTION_SECONDS, STORED_METRICS, RawSample
+
+logger = logging.getLogger(__name__)
+
+# Default capacity: 24 hours of samples at the default 5-second poll interval
+DEFAULT_RING_CAPACITY = RAW_RETENTION_SECONDS // 5
+
+# Sentinel for NULL metric values (outside every RANGE_BOUNDS window)
+NULL_VALUE = -(2 ** 31)
+
+
+class RawRingBuffer:
+    """
+    Array-backed ring of (ts, metric...) samples in STORED_METRICS order.
+
+    Appending beyond capacity overwrites the oldest sample. Samples are assumed
+    to arrive in non-decreasing timestamp order, which lets window lookups use
+    binary search. Thread-safe; uses its own lock so hot reads never wait on
+    the database lock.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY) -> None:
+        """
+        Preallocate the timestamp and metric columns.
+
+        Args:
+            capacity: Maximum number of samples retained (minimum 1).
+        """
+        self.capacity = max(int(capacity), 1)
+        self._ts = array("q", [0]) * self.capacity
+        self._columns = [array("i", [NULL_VALUE]) * self.capacity for _ in STORED_METRICS]
+        self._head = 0  # Physical index of the oldest sample
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of samples currently held."""
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Return the fixed memory footprint of the column arrays in bytes."""
+        return sum(col.itemsize * len(col) for col in [self._ts] + self._columns)
+
+    def append(self, ts: int, values: Sequence[Optional[int]]) -> None:
+        """
+        Append one sample, evicting the oldest when full.
+
+        Args:
+            ts: Sample epoch timestamp.
+            values: Metric values in STORED_METRICS order (None = NULL).
+        """
+        with self._lock:
+            if self._size == self.capacity:
+                index = self._head
+                self._head = (self._head + 1) % self.capacity
+            else:
+                index = (self._head + self._size) % self.capacity
+                self._size += 1
+            self._ts[index] = ts
+            for column, value in zip(self._columns, values):
+                column[index] = NULL_VALUE if value is None else int(value)
+
+    def evict_before(self, cutoff: int) -> int:
+        """
+        Drop samples older than cutoff.
+
+        Returns:
+            Number of samples evicted.
+        """
+        with self._lock:
+            start = self._first_at_or_after(cutoff)
+            self._head = (self._head + start) % self.capacity
+            self._size -= start
+            return start
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        with self._lock:
+            self._head = 0
+            self._size = 0
+
+    def latest_ts(self) -> Optional[int]:
+        """Return the newest sample timestamp, or None when empty."""
+        with self._lock:
+            if self._size == 0:
+                return None
+            return self._ts[(self._head + self._size - 1) % self.capacity]
+
+    def samples(self, since: int = 0) -> List[RawSample]:
+        """
+        Return samples at or after since, oldest first.
+
+        Args:
+            since: Oldest timestamp to include.
+
+        Returns:
+            List of (ts, metric...) tuples with None for NULL values.
+        """
+        with self._lock:
+            result: List[RawSample] = []
+            for index in self._indexes(since):
+                result.append(
+                    (self._ts[index],) + tuple(
+                        None if column[index] == NULL_VALUE else column[index]
+                        for column in self._columns
+                    )
+                )
+            return result
+
+    def points(self, metric: str, since: int = 0) -> List[Tuple[int, int]]:
+        """
+        Return the non-NULL (ts, value) points of one metric at or after since.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        column = self._columns[STORED_METRICS.index(metric)]
+        with self._lock:
+            return [
+                (self._ts[index], column[index])
+                for index in self._indexes(since)
+                if column[index] != NULL_VALUE
+            ]
+
+    def aggregate(
+        self, metric: str, since: int, bucket_seconds: int
+    ) -> Dict[int, Tuple[float, float, float]]:
+        """
+        Aggregate one metric into fixed-width buckets over samples at or after since.
+
+        Args:
+            metric: One of STORED_METRICS.
+            since: Oldest timestamp to include.
+            bucket_seconds: Bucket width in seconds.
+
+        Returns:
+            Mapping of bucket_ts to (avg, min, max), matching the SQL rollup.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        column = self._columns[STORED_METRICS.index(metric)]
+        acc: Dict[int, List[int]] = {}
+        with self._lock:
+            for index in self._indexes(since):
+                value = column[index]
+                if value == NULL_VALUE:
+                    continue
+                ts = self._ts[index]
+                bucket_ts = ts - (ts % bucket_seconds)
+                entry = acc.get(bucket_ts)
+                if entry is None:
+                    acc[bucket_ts] = [value, 1, value, value]
+                else:
+                    entry[0] += value
+                    entry[1] += 1
+                    if value < entry[2]:
+                        entry[2] = value
+                    if value > entry[3]:
+                        entry[3] = value
+        return {
+            bucket_ts: (total / count, float(lo), float(hi))
+            for bucket_ts, (total, count, lo, hi) in acc.items()
+        }
+
+    def _first_at_or_after(self, since: int) -> int:
+        """Return the logical offset of the first sample with ts >= since."""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[(self._head + mid) % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _indexes(self, since: int) -> Iterator[int]:
+        """Yield physical indexes of samples at or after since, oldest first."""
+        start = self._first_at_or_after(since)
+        return (
+            (self._head + offset) % self.capacity for offset in range(start, self._size)
+        )
@@ -0,0 +1,583 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Append-only segment-log store for Solax inverter telemetry history.
+
+Raw samples are appended as fixed-size CRC-protected binary records to hourly
+segment files; rollup and daily rollup buckets are appended to per-tier logs
+(last record wins) and indexed in memory. Files are only ever appended to,
+deleted whole, or rewritten atomically, so flash sees sequential writes and a
+torn tail after power loss is detected and truncated on open.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from solax_modbus.data.base import (
+    DAILY_ROLLUP_BUCKET_SECONDS,
+    DAILY_ROLLUP_RETENTION_SECONDS,
+    RAW_RETENTION_SECONDS,
+    ROLLUP_BUCKET_SECONDS,
+    ROLLUP_RETENTION_SECONDS,
+    STORED_METRICS,
+    TIER_DAILY,
+    TIER_ROLLUP,
+    RawSample,
+    StoreBackend,
+    TimedLock,
+    aggregate_buckets,
+    series_from_buckets,
+)
+from solax_modbus.data.ringbuffer import DEFAULT_RING_CAPACITY, RawRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Raw segment span in seconds; one file per hour of samples
+SEGMENT_SECONDS = 3600
+
+# Record framing: a magic byte leads each record and a CRC32 of the preceding
+# bytes trails it, so zero-filled or torn regions never decode as data.
+SAMPLE_MAGIC = 0xA5
+BUCKET_MAGIC = 0x5A
+_CRC = struct.Struct("<I")
+
+# Sample record: magic, ts, pv_power, battery_power, battery_soc,
+# grid_power_total, null mask (bit n set = metric n is NULL)
+_SAMPLE_BODY = struct.Struct("<BqiiiiB")
+SAMPLE_RECORD_SIZE = _SAMPLE_BODY.size + _CRC.size
+
+# Bucket record: magic, bucket_ts, metric index, avg, min, max
+_BUCKET_BODY = struct.Struct("<BqBddd")
+BUCKET_RECORD_SIZE = _BUCKET_BODY.size + _CRC.size
+
+_RAW_PREFIX = "raw-"
+_RAW_SUFFIX = ".seg"
+_ROLLUP_LOG = "rollup.log"
+_DAILY_LOG = "daily.log"
+
+
+def encode_sample(ts: int, values: Sequence[Optional[int]], salt: int = 0) -> bytes:
+    """
+    Encode one raw sample as a fixed-size CRC-protected record.
+
+    Args:
+        ts: Sample epoch timestamp.
+        values: Metric values in STORED_METRICS order (None = NULL).
+        salt: CRC seed; a file-generation salt makes stale records from a
+            previous use of a recycled file fail validation.
+
+    Returns:
+        SAMPLE_RECORD_SIZE bytes.
+    """
+    mask = 0
+    fields = []
+    for index, value in enumerate(values):
+        if value is None:
+            mask |= 1 << index
+            fields.append(0)
+        else:
+            fields.append(int(value))
+    body = _SAMPLE_BODY.pack(SAMPLE_MAGIC, ts, *fields, mask)
+    return body + _CRC.pack(zlib.crc32(body, salt))
+
+
+def decode_samples(buf: bytes, salt: int = 0) -> Tuple[List[RawSample], int]:
+    """
+    Decode consecutive sample records, stopping at the first invalid one.
+
+    Args:
+        buf: Buffer of concatenated records.
+        salt: CRC seed the records were encoded with.
+
+    Returns:
+        (samples, valid_bytes) where valid_bytes is the length of the intact
+        record prefix; anything beyond it is a torn or unwritten tail.
+    """
+    samples: List[RawSample] = []
+    offset = 0
+    body_size = _SAMPLE_BODY.size
+    while offset + SAMPLE_RECORD_SIZE <= len(buf):
+        body = buf[offset:offset + body_size]
+        (crc,) = _CRC.unpack_from(buf, offset + body_size)
+        if body[0] != SAMPLE_MAGIC or zlib.crc32(body, salt) != crc:
+            break
+        _, ts, *fields, mask = _SAMPLE_BODY.unpack(body)
+        samples.append(
+            (ts,) + tuple(
+                None if mask & (1 << index) else value
+                for index, value in enumerate(fields)
+            )
+        )
+        offset += SAMPLE_RECORD_SIZE
+    return samples, offset
+
+
+def _encode_bucket(bucket_ts: int, metric_index: int, avg: float, lo: float, hi: float) -> bytes:
+    """Encode one rollup bucket as a CRC-protected record."""
+    body = _BUCKET_BODY.pack(BUCKET_MAGIC, bucket_ts, metric_index, avg, lo, hi)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _decode_buckets(buf: bytes) -> Tuple[List[Tuple[int, int, float, float, float]], int]:
+    """Decode bucket records up to the first invalid one; see decode_samples."""
+    records = []
+    offset = 0
+    body_size = _BUCKET_BODY.size
+    while offset + BUCKET_RECORD_SIZE <= len(buf):
+        body = buf[offset:offset + body_size]
+        (crc,) = _CRC.unpack_from(buf, offset + body_size)
+        if body[0] != BUCKET_MAGIC or zlib.crc32(body) != crc:
+            break
+        records.append(_BUCKET_BODY.unpack(body)[1:])
+        offset += BUCKET_RECORD_SIZE
+    return records, offset
+
+
+class SegmentLogStore(StoreBackend):
+    """
+    Append-only binary segment-log store implementing the StoreBackend contract.
+
+    Raw samples go to hourly segment files that are deleted whole once past
+    retention. Rollup tiers are append-only logs replayed into in-memory
+    indexes at open and compacted (atomic rewrite) when pruning leaves more
+    dead records than live ones. Recent raw samples are mirrored in a
+    RawRingBuffer for in-memory recent queries. Thread-safe; uses a single lock.
+    """
+
+    def __init__(
+        self, path: str = "solax_history", ring_capacity: int = DEFAULT_RING_CAPACITY
+    ) -> None:
+        """
+        Open (or create) the segment directory at path and replay its logs.
+
+        Args:
+            path: Directory holding segment and rollup log files.
+            ring_capacity: Raw samples held in memory (24 h at the poll interval).
+
+        Raises:
+            OSError: If the directory cannot be created or read.
+        """
+        self.path = path
+        self._lock = TimedLock()
+        self._closed = False
+        self._ring = RawRingBuffer(ring_capacity)
+
+        self._segment: Optional[BinaryIO] = None
+        self._segment_start: Optional[int] = None
+
+        # Per tier: {metric: {bucket_ts: (avg, min, max)}}, log file, record count
+        self._tiers: Dict[str, Dict[str, Dict[int, Tuple[float, float, float]]]] = {}
+        self._logs: Dict[str, BinaryIO] = {}
+        self._log_records: Dict[str, int] = {}
+
+        # Start of the oldest rollup bucket that may still gain samples; rollup
+        # re-reads only segments reaching it (None = from the first segment)
+        self._rollup_from: Optional[int] = None
+
+        try:
+            os.makedirs(path, exist_ok=True)
+            ring_cutoff = int(time.time()) - RAW_RETENTION_SECONDS
+            for segment_path in self._segment_paths():
+                intact = self._recover_file(segment_path, decode_samples)
+                for sample in decode_samples(intact)[0]:
+                    if sample[0] >= ring_cutoff:
+                        self._ring.append(sample[0], sample[1:])
+            for log_name in (_ROLLUP_LOG, _DAILY_LOG):
+                self._open_tier(log_name)
+            rolled = [max(b) for b in self._tiers[_ROLLUP_LOG].values() if b]
+            if rolled:
+                self._rollup_from = max(rolled)
+            logger.info("SegmentLogStore opened: %s", path)
+        except OSError as e:
+            logger.error(
+                "Failed to open segment store %s: %s (operator intervention required)",
+                path,
+                e,
+                exc_info=True,
+            )
+            raise
+
+    def write_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
+        """
+        Validate and append one telemetry sample to its hourly segment.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter().
+            ts: Sample epoch timestamp (None = now).
+
+        Returns:
+            True if the record was appended, False on error.
+        """
+        if self._closed:
+            return False
+
+        try:
+            validated = self._validate(data)
+            if ts is None:
+                ts = int(time.time())
+            record = encode_sample(ts, [validated.get(m) for m in STORED_METRICS])
+
+            with self._lock:
+                segment_start = ts - (ts % SEGMENT_SECONDS)
+                if self._segment is None or segment_start != self._segment_start:
+                    self._rotate(segment_start)
+                self._segment.write(record)
+                self._segment.flush()
+            self._ring.append(ts, [validated.get(m) for m in STORED_METRICS])
+            return True
+
+        except OSError as e:
+            logger.error("write_sample failed: %s", e, exc_info=True)
+            return False
+        except Exception as e:
+            logger.error("Unexpected error in write_sample: %s", e, exc_info=True)
+            return False
+
+    def rollup(self) -> int:
+        """
+        Aggregate raw segment records into 15-minute rollup buckets.
+
+        Only buckets from the last one rolled up onwards are recomputed, so
+        each cycle reads the newest segment or two rather than every segment
+        in retention.
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+        if self._closed:
+            return 0
+
+        try:
+            with self._lock:
+                if self._segment is not None:
+                    self._segment.flush()
+                start = self._rollup_from or 0
+                samples: List[RawSample] = []
+                for segment_path in self._segment_paths():
+                    if self._segment_start_of(segment_path) + SEGMENT_SECONDS <= start:
+                        continue
+                    with open(segment_path, "rb") as f:
+                        samples.extend(
+                            s for s in decode_samples(f.read())[0] if s[0] >= start
+                        )
+
+                rows_affected = 0
+                for index, metric in enumerate(STORED_METRICS, start=1):
+                    buckets = aggregate_buckets(
+                        ((s[0], s[index], s[index], s[index]) for s in samples),
+                        ROLLUP_BUCKET_SECONDS,
+                    )
+                    rows_affected += self._upsert(_ROLLUP_LOG, metric, buckets)
+                if samples:
+                    latest = max(s[0] for s in samples)
+                    # The latest bucket may still be filling; recompute it next time
+                    self._rollup_from = latest - latest % ROLLUP_BUCKET_SECONDS
+
+            logger.info("Rollup completed: %d bucket-metric rows affected", rows_affected)
+            self._mark_changed(TIER_ROLLUP)
+            return rows_affected
+
+        except OSError as e:
+            logger.error("rollup failed: %s", e, exc_info=True)
+            return 0
+
+    def prune(self) -> int:
+        """
+        Delete raw segments wholly older than 24 hours and rollup rows older than 30 days.
+
+        Returns:
+            Total number of rows deleted.
+        """
+        if self._closed:
+            return 0
+
+        now = int(time.time())
+        raw_cutoff = now - RAW_RETENTION_SECONDS
+        rollup_cutoff = now - ROLLUP_RETENTION_SECONDS
+
+        try:
+            with self._lock:
+                raw_deleted = 0
+                for segment_path in self._segment_paths():
+                    start = self._segment_start_of(segment_path)
+                    if start + SEGMENT_SECONDS > raw_cutoff:
+                        continue
+                    if start == self._segment_start:
+                        self._close_segment()
+                    raw_deleted += os.path.getsize(segment_path) // SAMPLE_RECORD_SIZE
+                    os.remove(segment_path)
+                rollup_deleted = self._prune_tier(_ROLLUP_LOG, rollup_cutoff)
+            self._ring.evict_before(raw_cutoff)
+
+            logger.info(
+                "Prune completed: %d raw rows, %d rollup rows deleted",
+                raw_deleted,
+                rollup_deleted,
+            )
+            if rollup_deleted:
+                self._mark_changed(TIER_ROLLUP)
+            return raw_deleted + rollup_deleted
+
+        except OSError as e:
+            logger.error("prune failed: %s", e, exc_info=True)
+            return 0
+
+    def rollup_daily(self) -> int:
+        """
+        Aggregate rollup buckets into 1-day daily rollup buckets.
+
+        Returns:
+            Number of bucket-metric rows written or updated.
+        """
+        if self._closed:
+            return 0
+
+        try:
+            rows_affected = 0
+            with self._lock:
+                for metric in STORED_METRICS:
+                    buckets = aggregate_buckets(
+                        (
+                            (bucket_ts, avg, lo, hi)
+                            for bucket_ts, (avg, lo, hi)
+                            in self._tiers[_ROLLUP_LOG][metric].items()
+                        ),
+                        DAILY_ROLLUP_BUCKET_SECONDS,
+                    )
+                    rows_affected += self._upsert(_DAILY_LOG, metric, buckets)
+
+            logger.info(
+                "Daily rollup completed: %d bucket-metric rows affected", rows_affected
+            )
+            self._mark_changed(TIER_DAILY)
+            return rows_affected
+
+        except OSError as e:
+            logger.error("rollup_daily failed: %s", e, exc_info=True)
+            return 0
+
+    def prune_daily(self) -> int:
+        """
+        Delete daily rollup rows older than a rolling trailing 365 days.
+
+        Returns:
+            Number of rows deleted.
+        """
+        if self._closed:
+            return 0
+
+        cutoff = int(time.time()) - DAILY_ROLLUP_RETENTION_SECONDS
+        try:
+            with self._lock:
+                deleted = self._prune_tier(_DAILY_LOG, cutoff)
+            logger.info("Daily prune completed: %d rows deleted", deleted)
+            if deleted:
+                self._mark_changed(TIER_DAILY)
+            return deleted
+        except OSError as e:
+            logger.error("prune_daily failed: %s", e, exc_info=True)
+            return 0
+
+    def query_history(
+        self, metric: str, window_seconds: int, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return rollup series for one metric over a trailing window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            window_seconds: Trailing window in seconds.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._closed:
+            return []
+
+        cutoff = int(time.time()) - window_seconds
+        if since is not None:
+            cutoff = max(cutoff, since)
+        with self._lock:
+            return series_from_buckets(self._tiers[_ROLLUP_LOG][metric], cutoff)
+
+    def query_history_12mo(
+        self, metric: str, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return daily rollup series for one metric over a trailing 365-day window.
+
+        Args:
+            metric: One of STORED_METRICS.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            List of {bucket_ts, avg, min, max} dictionaries in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if self._closed:
+            return []
+
+        cutoff = int(time.time()) - DAILY_ROLLUP_RETENTION_SECONDS
+        if since is not None:
+            cutoff = max(cutoff, since)
+        with self._lock:
+            return series_from_buckets(self._tiers[_DAILY_LOG][metric], cutoff)
+
+    def close(self) -> None:
+        """
+        Flush and close all open segment and log files.
+
+        Idempotent; safe to call multiple times.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        self._ring.clear()
+        with self._lock:
+            try:
+                self._close_segment()
+                for log in self._logs.values():
+                    log.close()
+                self._logs.clear()
+                logger.info("SegmentLogStore closed: %s", self.path)
+            except OSError as e:
+                logger.error("Error closing store: %s", e, exc_info=True)
+
+    def _segment_paths(self) -> List[str]:
+        """Return raw segment paths in chronological order."""
+        names = sorted(
+            (n for n in os.listdir(self.path)
+             if n.startswith(_RAW_PREFIX) and n.endswith(_RAW_SUFFIX)),
+            key=lambda n: int(n[len(_RAW_PREFIX):-len(_RAW_SUFFIX)]),
+        )
+        return [os.path.join(self.path, n) for n in names]
+
+    @staticmethod
+    def _segment_start_of(segment_path: str) -> int:
+        """Parse the segment start timestamp from its file name."""
+        name = os.path.basename(segment_path)
+        return int(name[len(_RAW_PREFIX):-len(_RAW_SUFFIX)])
+
+    def _rotate(self, segment_start: int) -> None:
+        """Switch the active segment to the one starting at segment_start."""
+        self._close_segment()
+        segment_path = os.path.join(
+            self.path, f"{_RAW_PREFIX}{segment_start}{_RAW_SUFFIX}"
+        )
+        self._segment = open(segment_path, "ab")
+        self._segment_start = segment_start
+        logger.debug("Opened raw segment %s", segment_path)
+
+    def _close_segment(self) -> None:
+        """Close the active segment, if any."""
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = None
+        self._segment_start = None
+
+    @staticmethod
+    def _recover_file(file_path: str, decode: Any) -> bytes:
+        """
+        Truncate a torn tail from a log file.
+
+        Returns:
+            The intact record bytes.
+        """
+        with open(file_path, "rb") as f:
+            buf = f.read()
+        _, valid = decode(buf)
+        if valid < len(buf):
+            logger.warning(
+                "Truncating %d torn bytes from %s", len(buf) - valid, file_path
+            )
+            os.truncate(file_path, valid)
+        return buf[:valid]
+
+    def _open_tier(self, log_name: str) -> None:
+        """Replay a rollup log into its in-memory index and open it for append."""
+        log_path = os.path.join(self.path, log_name)
+        index: Dict[str, Dict[int, Tuple[float, float, float]]] = {
+            metric: {} for metric in STORED_METRICS
+        }
+        count = 0
+        if os.path.exists(log_path):
+            records, _ = _decode_buckets(self._recover_file(log_path, _decode_buckets))
+            for bucket_ts, metric_index, avg, lo, hi in records:
+                if metric_index < len(STORED_METRICS):
+                    index[STORED_METRICS[metric_index]][bucket_ts] = (avg, lo, hi)
+            count = len(records)
+        self._tiers[log_name] = index
+        self._log_records[log_name] = count
+        self._logs[log_name] = open(log_path, "ab")
+
+    def _upsert(
+        self, log_name: str, metric: str, buckets: Dict[int, Tuple[float, float, float]]
+    ) -> int:
+        """Append changed buckets to a tier log and index; return buckets processed."""
+        index = self._tiers[log_name][metric]
+        metric_index = STORED_METRICS.index(metric)
+        records = [
+            _encode_bucket(bucket_ts, metric_index, *values)
+            for bucket_ts, values in buckets.items()
+            if index.get(bucket_ts) != values
+        ]
+        if records:
+            log = self._logs[log_name]
+            log.write(b"".join(records))
+            log.flush()
+            self._log_records[log_name] += len(records)
+        index.update(buckets)
+        return len(buckets)
+
+    def _prune_tier(self, log_name: str, cutoff: int) -> int:
+        """Drop buckets older than cutoff; compact the log when mostly dead."""
+        deleted = 0
+        tier = self._tiers[log_name]
+        for buckets in tier.values():
+            stale = [bucket_ts for bucket_ts in buckets if bucket_ts < cutoff]
+            for bucket_ts in stale:
+                del buckets[bucket_ts]
+            deleted += len(stale)
+
+        live = sum(len(buckets) for buckets in tier.values())
+        if self._log_records[log_name] > 2 * live:
+            self._compact_tier(log_name)
+        return deleted
+
+    def _compact_tier(self, log_name: str) -> None:
+        """Atomically rewrite a tier log with only its live buckets."""
+        log_path = os.path.join(self.path, log_name)
+        tmp_path = log_path + ".tmp"
+        records = [
+            _encode_bucket(bucket_ts, STORED_METRICS.index(metric), *values)
+            for metric, buckets in self._tiers[log_name].items()
+            for bucket_ts, values in sorted(buckets.items())
+        ]
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._logs[log_name].close()
+        os.replace(tmp_path, log_path)
+        self._logs[log_name] = open(log_path, "ab")
+        self._log_records[log_name] = len(records)
+        logger.info("Compacted %s to %d records", log_name, len(records))
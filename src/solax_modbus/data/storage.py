@@ -3,7 +3,9 @@
 SQLite time-series store for Solax inverter telemetry history.
 
 Records raw samples, aggregates into downsampled rollup buckets, enforces
-retention windows, and serves history queries for trend visualisation.
+retention windows, and serves history queries for trend visualisation. Raw
+samples can optionally be staged in an append-only SampleJournal and compacted
+into the raw table in large transactions.
 
 Design: design-b7c8d9e0-component_data_storage.md
 """
@@ -14,64 +16,136 @@ import logging
 import sqlite3
 import threading
 import time
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Shared constants live in base; re-exported here for existing importers
+from solax_modbus.data.base import (
+    DAILY_ROLLUP_BUCKET_SECONDS,
+    DAILY_ROLLUP_RETENTION_SECONDS,
+    EXPORT_BATCH_ROWS,
+    EXPORT_TABLES,
+    RANGE_BOUNDS,
+    RAW_RETENTION_SECONDS,
+    ROLLUP_BUCKET_SECONDS,
+    ROLLUP_RETENTION_SECONDS,
+    STORED_METRICS,
+    TIER_DAILY,
+    TIER_ROLLUP,
+    HistoryColumns,
+    RawSample,
+    StoreBackend,
+    TimedLock,
+)
+from solax_modbus.data.journal import DEFAULT_SEGMENT_RECORDS, SampleJournal
+from solax_modbus.data.ringbuffer import DEFAULT_RING_CAPACITY, RawRingBuffer
 
 logger = logging.getLogger(__name__)
 
-# Valid metrics for storage and query
-STORED_METRICS = ("pv_power", "battery_power", "battery_soc", "grid_power_total")
-
-# Retention windows in seconds
-RAW_RETENTION_SECONDS = 86400  # 24 hours
-ROLLUP_RETENTION_SECONDS = 2592000  # 30 days
-DAILY_ROLLUP_RETENTION_SECONDS = 31536000  # 365 days
-
-# Rollup bucket size in seconds (15 minutes)
-ROLLUP_BUCKET_SECONDS = 900
-
-# Daily rollup bucket size in seconds (1 day)
-DAILY_ROLLUP_BUCKET_SECONDS = 86400
-
-# Range validation bounds
-RANGE_BOUNDS: Dict[str, tuple] = {
-    "pv_power": (0, 15000),
-    "battery_power": (-15000, 15000),
-    "battery_soc": (0, 100),
-    "grid_power_total": (-15000, 15000),
+# SQLite durability profiles: PRAGMA settings applied when the store opens.
+#   safe      - fsync every commit (SQLite default); survives power loss with
+#               no lost samples at the cost of one device flush per write.
+#   balanced  - fsync only at WAL checkpoints; a power cut may lose the last
+#               few samples but never corrupts the database.
+#   low-wear  - as balanced, with a 10x larger checkpoint interval and bigger
+#               caches, so flash sees fewer, larger writes.
+DURABILITY_PROFILES: Dict[str, Dict[str, Any]] = {
+    "safe": {
+        "synchronous": "FULL",
+        "wal_autocheckpoint": 1000,
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+    },
+    "balanced": {
+        "synchronous": "NORMAL",
+        "wal_autocheckpoint": 1000,
+        "mmap_size": 16 * 1024 * 1024,
+        "cache_size": -4000,
+        "temp_store": "MEMORY",
+    },
+    "low-wear": {
+        "synchronous": "NORMAL",
+        "wal_autocheckpoint": 10000,
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+    },
 }
 
+DEFAULT_DURABILITY_PROFILE = "balanced"
 
-class TimeSeriesStore:
+# Journal compactor wake-up interval when no segment has been sealed
+JOURNAL_COMPACT_INTERVAL = 60.0
+
+class TimeSeriesStore(StoreBackend):
     """
     Local SQLite store for telemetry time-series data.
 
     Persists raw samples and downsampled rollup aggregates, prunes both by age,
-    and serves history for trend visualisation. Thread-safe; uses a single lock
-    to guard all database access.
+    and serves history for trend visualisation. The last 24 hours of raw samples
+    are mirrored in a RawRingBuffer so recent-window and live-bucket queries
+    run without SQL. Thread-safe; uses a single lock to guard all database
+    access.
+
+    With a journal directory, write_sample appends to a SampleJournal instead
+    of inserting; a background compactor moves sealed journal segments into
+    the raw table, one transaction per segment, and rollup() also compacts
+    the records added to the active segment since the last rollup (without
+    sealing it) so aggregates see every sample.
     """
 
-    def __init__(self, db_path: str = "solax_history.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "solax_history.db",
+        profile: str = DEFAULT_DURABILITY_PROFILE,
+        ring_capacity: int = DEFAULT_RING_CAPACITY,
+        journal_dir: Optional[str] = None,
+        journal_segment_records: int = DEFAULT_SEGMENT_RECORDS,
+    ) -> None:
         """
         Open (or create) the SQLite store at db_path.
 
         Args:
             db_path: Path to the SQLite database file.
+            profile: Durability profile name, one of DURABILITY_PROFILES.
+            ring_capacity: Raw samples held in memory (24 h at the poll interval).
+            journal_dir: Directory for the sample journal (None = insert each
+                sample directly). Unflushed segments found there are replayed
+                into the raw table on open.
+            journal_segment_records: Records per journal segment.
+
+        Raises:
+            ValueError: If profile is not a known durability profile.
 
         Notes:
             Opens with check_same_thread=False and guards access with a lock,
             since the poll loop writes and HTTP handlers read. WAL journal mode
             is enabled for concurrent read during write.
         """
+        if profile not in DURABILITY_PROFILES:
+            raise ValueError(f"Unknown durability profile: {profile}")
+
         self.db_path = db_path
-        self._lock = threading.Lock()
+        self.profile = profile
+        self._lock = TimedLock()
         self._conn: Optional[sqlite3.Connection] = None
         self._closed = False
+        self._ring = RawRingBuffer(ring_capacity)
+        self._journal: Optional[SampleJournal] = None
+        self._compact_lock = threading.Lock()
+        self._compact_wake = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
 
         try:
             self._conn = sqlite3.connect(db_path, check_same_thread=False)
             self._conn.execute("PRAGMA journal_mode=WAL")
+            self._apply_profile(profile)
             self.init_schema()
-            logger.info("TimeSeriesStore opened: %s", db_path)
+            if journal_dir is not None:
+                self._open_journal(journal_dir, journal_segment_records)
+            self._load_ring()
+            logger.info("TimeSeriesStore opened: %s (profile=%s)", db_path, profile)
         except sqlite3.DatabaseError as e:
             logger.error(
                 "Failed to open SQLite database %s: %s (operator intervention required)",
@@ -81,6 +155,163 @@ class TimeSeriesStore:
             )
             raise
 
+    def _apply_profile(self, profile: str) -> None:
+        """
+        Apply the PRAGMA settings of a durability profile to the connection.
+
+        Args:
+            profile: Durability profile name, one of DURABILITY_PROFILES.
+        """
+        for pragma, value in DURABILITY_PROFILES[profile].items():
+            self._conn.execute(f"PRAGMA {pragma}={value}")
+        logger.debug("Applied durability profile %s", profile)
+
+    def _open_journal(self, journal_dir: str, segment_records: int) -> None:
+        """
+        Open the sample journal, replay unflushed segments and start the compactor.
+
+        Args:
+            journal_dir: Directory for journal segment files.
+            segment_records: Records per journal segment.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_seq FROM journal_state WHERE id = 1"
+            ).fetchone()
+        last_seq = row[0] if row else 0
+
+        self._journal = SampleJournal(journal_dir, segment_records, first_seq=last_seq + 1)
+        replayed = self.compact_journal()
+        if replayed:
+            logger.info("Journal replay: %d samples recovered", replayed)
+
+        self._compactor = threading.Thread(
+            target=self._compact_loop, name="journal-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def _compact_loop(self) -> None:
+        """Compactor thread body: compact on each sealed segment or interval."""
+        while not self._closed:
+            self._compact_wake.wait(JOURNAL_COMPACT_INTERVAL)
+            self._compact_wake.clear()
+            if self._closed:
+                break
+            self.compact_journal()
+
+    def compact_journal(self, rotate: bool = False, active: bool = False) -> int:
+        """
+        Move journaled samples into the raw table and recycle sealed segments.
+
+        Each batch is inserted and recorded in journal_state (segment sequence
+        and records taken from it) in a single transaction, so a crash between
+        commit and recycle never replays a sample twice.
+
+        Args:
+            rotate: Seal the active segment first so every sample is compacted.
+            active: Also insert the active segment's records added since the
+                last compaction, leaving the segment open to keep filling.
+
+        Returns:
+            Number of samples inserted.
+        """
+        journal = self._journal
+        if journal is None or self._conn is None:
+            return 0
+
+        inserted = 0
+        with self._compact_lock:
+            try:
+                if rotate:
+                    journal.seal()
+                for seq, samples in journal.sealed():
+                    count = self._insert_journaled(seq, samples)
+                    if count is None:
+                        break
+                    inserted += count
+                    journal.recycle(seq)
+                else:
+                    current = journal.active() if active else None
+                    if current is not None:
+                        inserted += self._insert_journaled(*current) or 0
+            except (sqlite3.Error, OSError) as e:
+                logger.error("compact_journal failed: %s", e, exc_info=True)
+
+        if inserted:
+            logger.debug("Journal compacted: %d samples", inserted)
+        return inserted
+
+    def _insert_journaled(self, seq: int, samples: List[RawSample]) -> Optional[int]:
+        """
+        Insert the records of journal segment seq not yet compacted.
+
+        Args:
+            seq: Segment sequence number.
+            samples: Every record of the segment, in append order.
+
+        Returns:
+            Number of samples inserted, or None if the store is closed.
+        """
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT last_seq, last_count FROM journal_state WHERE id = 1"
+            ).fetchone()
+            if row is None or seq > row[0]:
+                done = 0
+            elif seq == row[0] and row[1] is not None:
+                done = row[1]
+            else:
+                return 0
+
+            new = samples[done:]
+            if not new:
+                return 0
+            self._conn.executemany(
+                """
+                INSERT INTO raw (ts, pv_power, battery_power, battery_soc, grid_power_total)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                new,
+            )
+            self._conn.execute(
+                """
+                INSERT INTO journal_state (id, last_seq, last_count) VALUES (1, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    last_seq = excluded.last_seq, last_count = excluded.last_count
+                """,
+                (seq, len(samples)),
+            )
+            self._conn.commit()
+            return len(new)
+
+    def _load_ring(self) -> None:
+        """Rebuild the in-memory ring buffer from the retained raw rows."""
+        cutoff = int(time.time()) - RAW_RETENTION_SECONDS
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                cursor = self._conn.execute(
+                    """
+                    SELECT ts, pv_power, battery_power, battery_soc, grid_power_total
+                    FROM raw
+                    WHERE ts >= ?
+                    ORDER BY ts ASC
+                    """,
+                    (cutoff,),
+                )
+                for row in cursor:
+                    self._ring.append(row[0], row[1:])
+                logger.info(
+                    "Ring buffer loaded: %d samples (%d KB)",
+                    len(self._ring),
+                    self._ring.nbytes // 1024,
+                )
+            except sqlite3.Error as e:
+                logger.error("Ring buffer load failed: %s", e, exc_info=True)
+
     def init_schema(self) -> None:
         """
         Create tables and indexes if absent.
@@ -136,21 +367,40 @@ class TimeSeriesStore:
                     "CREATE INDEX IF NOT EXISTS idx_daily_rollup_ts ON daily_rollup(bucket_ts)"
                 )
 
+                # Last journal segment compacted into raw and how many of its
+                # records (NULL = all), for exactly-once replay
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS journal_state (
+                        id         INTEGER PRIMARY KEY CHECK (id = 1),
+                        last_seq   INTEGER NOT NULL,
+                        last_count INTEGER
+                    )
+                """)
+                columns = {
+                    row[1] for row in cursor.execute("PRAGMA table_info(journal_state)")
+                }
+                if "last_count" not in columns:
+                    cursor.execute("ALTER TABLE journal_state ADD COLUMN last_count INTEGER")
+
                 self._conn.commit()
                 logger.info("TimeSeriesStore schema initialized")
             except sqlite3.Error as e:
                 logger.error("Schema init failed: %s", e, exc_info=True)
 
-    def write_sample(self, data: Dict[str, Any]) -> bool:
+    def write_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
         """
         Validate and insert one telemetry sample into the raw table.
 
         Derives pv_power as pv1_power + pv2_power; battery_power and battery_soc
         are read directly; grid_power_total is the sum of grid_power_r/s/t.
         Out-of-range fields are stored as NULL; the row is always inserted.
+        With a journal, the sample is appended to it instead and reaches the
+        raw table at the next compaction.
 
         Args:
             data: Telemetry dictionary from poll_inverter().
+            ts: Sample epoch timestamp (None = now). Callers that queue samples
+                pass the poll time so queue lag does not skew history.
 
         Returns:
             True if a row was inserted, False on error.
@@ -160,7 +410,16 @@ class TimeSeriesStore:
 
         try:
             validated = self._validate(data)
-            ts = int(time.time())
+            if ts is None:
+                ts = int(time.time())
+            values = [validated.get(m) for m in STORED_METRICS]
+
+            if self._journal is not None:
+                if self._journal.append(ts, values):
+                    self._compact_wake.set()
+                self._ring.append(ts, values)
+                logger.debug("Journaled sample at ts=%d", ts)
+                return True
 
             with self._lock:
                 cursor = self._conn.cursor()
@@ -178,101 +437,26 @@ class TimeSeriesStore:
                     ),
                 )
                 self._conn.commit()
+                self._ring.append(ts, values)
                 logger.debug("Wrote sample at ts=%d", ts)
                 return True
 
-        except sqlite3.Error as e:
+        except (sqlite3.Error, OSError) as e:
             logger.error("write_sample failed: %s", e, exc_info=True)
             return False
         except Exception as e:
             logger.error("Unexpected error in write_sample: %s", e, exc_info=True)
             return False
 
-    def _validate(self, data: Dict[str, Any]) -> Dict[str, Optional[int]]:
-        """
-        Derive and range-check the four stored metrics from telemetry.
-
-        Args:
-            data: Raw telemetry dictionary.
-
-        Returns:
-            Dictionary with pv_power, battery_power, battery_soc, grid_power_total.
-            Out-of-range values are set to None.
-        """
-        result: Dict[str, Optional[int]] = {}
-
-        # pv_power: pv1_power + pv2_power
-        pv1 = data.get("pv1_power")
-        pv2 = data.get("pv2_power")
-        if pv1 is not None and pv2 is not None:
-            pv_power = int(pv1) + int(pv2)
-            if self._in_range("pv_power", pv_power):
-                result["pv_power"] = pv_power
-            else:
-                logger.warning("pv_power=%d out of range, storing NULL", pv_power)
-                result["pv_power"] = None
-        else:
-            result["pv_power"] = None
-
-        # battery_power: direct read
-        bp = data.get("battery_power")
-        if bp is not None:
-            bp_int = int(bp)
-            if self._in_range("battery_power", bp_int):
-                result["battery_power"] = bp_int
-            else:
-                logger.warning("battery_power=%d out of range, storing NULL", bp_int)
-                result["battery_power"] = None
-        else:
-            result["battery_power"] = None
-
-        # battery_soc: direct read
-        soc = data.get("battery_soc")
-        if soc is not None:
-            soc_int = int(soc)
-            if self._in_range("battery_soc", soc_int):
-                result["battery_soc"] = soc_int
-            else:
-                logger.warning("battery_soc=%d out of range, storing NULL", soc_int)
-                result["battery_soc"] = None
-        else:
-            result["battery_soc"] = None
-
-        # grid_power_total: sum of grid_power_r + grid_power_s + grid_power_t
-        # Missing individual phases are treated as 0; if all three are absent,
-        # grid_power_total is NULL.
-        gpr = data.get("grid_power_r")
-        gps = data.get("grid_power_s")
-        gpt = data.get("grid_power_t")
-
-        if gpr is None and gps is None and gpt is None:
-            result["grid_power_total"] = None
-        else:
-            total = (int(gpr) if gpr is not None else 0) + \
-                    (int(gps) if gps is not None else 0) + \
-                    (int(gpt) if gpt is not None else 0)
-            if self._in_range("grid_power_total", total):
-                result["grid_power_total"] = total
-            else:
-                logger.warning(
-                    "grid_power_total=%d out of range, storing NULL", total
-                )
-                result["grid_power_total"] = None
-
-        return result
-
-    def _in_range(self, metric: str, value: int) -> bool:
-        """Check if value is within the defined bounds for the metric."""
-        bounds = RANGE_BOUNDS.get(metric)
-        if bounds is None:
-            return True
-        return bounds[0] <= value <= bounds[1]
-
     def rollup(self) -> int:
         """
         Aggregate recent raw samples into 15-minute rollup buckets.
 
         Computes avg, min, max per metric per bucket and upserts into rollup.
+        With a journal, sealed segments and the active segment's new records
+        are compacted first, so aggregates see every sample; the active
+        segment is not sealed and keeps filling (rotating only when full, as
+        its preallocation intends).
 
         Returns:
             Number of bucket-metric rows written or updated.
@@ -280,6 +464,7 @@ class TimeSeriesStore:
         if self._conn is None or self._closed:
             return 0
 
+        self.compact_journal(active=True)
         rows_affected = 0
 
         try:
@@ -309,6 +494,7 @@ class TimeSeriesStore:
 
                 self._conn.commit()
                 logger.info("Rollup completed: %d bucket-metric rows affected", rows_affected)
+                self._mark_changed(TIER_ROLLUP)
 
         except sqlite3.Error as e:
             logger.error("rollup failed: %s", e, exc_info=True)
@@ -336,6 +522,7 @@ class TimeSeriesStore:
 
                 cursor.execute("DELETE FROM raw WHERE ts < ?", (raw_cutoff,))
                 raw_deleted = cursor.rowcount
+                self._ring.evict_before(raw_cutoff)
                 total_deleted += raw_deleted
 
                 cursor.execute("DELETE FROM rollup WHERE bucket_ts < ?", (rollup_cutoff,))
@@ -348,6 +535,8 @@ class TimeSeriesStore:
                     raw_deleted,
                     rollup_deleted,
                 )
+                if rollup_deleted:
+                    self._mark_changed(TIER_ROLLUP)
 
         except sqlite3.Error as e:
             logger.error("prune failed: %s", e, exc_info=True)
@@ -355,7 +544,7 @@ class TimeSeriesStore:
         return total_deleted
 
     def query_history(
-        self, metric: str, window_seconds: int
+        self, metric: str, window_seconds: int, since: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Return rollup series for one metric over a trailing window.
@@ -363,6 +552,8 @@ class TimeSeriesStore:
         Args:
             metric: One of pv_power, battery_power, battery_soc, grid_power_total.
             window_seconds: Trailing window in seconds (e.g. 30 days = 2592000).
+            since: If given, only buckets with bucket_ts >= since (delta query;
+                a range scan of the bucket_ts index).
 
         Returns:
             List of {bucket_ts, avg, min, max} dictionaries in chronological order.
@@ -378,6 +569,8 @@ class TimeSeriesStore:
 
         now = int(time.time())
         cutoff = now - window_seconds
+        if since is not None:
+            cutoff = max(cutoff, since)
         results: List[Dict[str, Any]] = []
 
         try:
@@ -405,6 +598,154 @@ class TimeSeriesStore:
 
         return results
 
+    def query_history_columns(
+        self, metric: str, window_seconds: int, since: Optional[int] = None
+    ) -> HistoryColumns:
+        """
+        Return the query_history() series as parallel arrays, filled from the cursor.
+
+        Args:
+            metric: One of pv_power, battery_power, battery_soc, grid_power_total.
+            window_seconds: Trailing window in seconds.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            HistoryColumns in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        cutoff = int(time.time()) - window_seconds
+        if since is not None:
+            cutoff = max(cutoff, since)
+        return self._query_columns("rollup", metric, cutoff)
+
+    def query_history_12mo_columns(
+        self, metric: str, since: Optional[int] = None
+    ) -> HistoryColumns:
+        """
+        Return the query_history_12mo() series as parallel arrays.
+
+        Args:
+            metric: One of pv_power, battery_power, battery_soc, grid_power_total.
+            since: If given, only buckets with bucket_ts >= since.
+
+        Returns:
+            HistoryColumns in chronological order.
+
+        Raises:
+            ValueError: If metric is not one of the stored metrics.
+        """
+        cutoff = int(time.time()) - DAILY_ROLLUP_RETENTION_SECONDS
+        if since is not None:
+            cutoff = max(cutoff, since)
+        return self._query_columns("daily_rollup", metric, cutoff)
+
+    def _query_columns(self, table: str, metric: str, cutoff: int) -> HistoryColumns:
+        """
+        Stream one metric's buckets from table into typed arrays.
+
+        Rows are appended as the cursor yields them; no per-row dictionaries
+        or intermediate result list are built.
+        """
+        if metric not in STORED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        columns = HistoryColumns.empty()
+        if self._conn is None or self._closed:
+            return columns
+
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"""
+                    SELECT bucket_ts, avg, min, max
+                    FROM {table}
+                    WHERE metric = ? AND bucket_ts >= ? AND avg IS NOT NULL
+                    ORDER BY bucket_ts ASC
+                    """,
+                    (metric, cutoff),
+                )
+                append_ts = columns.bucket_ts.append
+                append_avg = columns.avg.append
+                append_min = columns.min.append
+                append_max = columns.max.append
+                for bucket_ts, avg, lo, hi in cursor:
+                    append_ts(bucket_ts)
+                    append_avg(avg)
+                    append_min(lo)
+                    append_max(hi)
+
+        except sqlite3.Error as e:
+            logger.error("query of %s columns failed: %s", table, e, exc_info=True)
+            return HistoryColumns.empty()
+
+        return columns
+
+    def export_rows(
+        self,
+        table: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        batch_rows: int = EXPORT_BATCH_ROWS,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Stream the rows of one table in batches over a read-only connection.
+
+        The export opens its own connection, so it neither takes the store
+        lock nor waits on the writer: under WAL it reads a consistent
+        snapshot while samples keep being inserted. Batches are fetched from
+        one cursor as the caller asks for them, so memory stays at one batch
+        whatever the range. Closing the iterator closes the connection.
+        Samples still in the journal appear once compacted.
+
+        Args:
+            table: One of EXPORT_TABLES.
+            start: Oldest timestamp to include (None = everything retained).
+            end: Timestamp to stop before (None = no upper bound).
+            batch_rows: Rows per yielded batch.
+
+        Yields:
+            Lists of at most batch_rows tuples in EXPORT_TABLES[table] order.
+
+        Raises:
+            ValueError: If table is not exportable.
+            sqlite3.Error: If the read fails part-way; the caller must not
+                present the rows already yielded as a complete export.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if self._closed or self.db_path == ":memory:":
+            yield from super().export_rows(table, start, end, batch_rows)
+            return
+
+        ts_column = EXPORT_TABLES[table][0]
+        order = ts_column if table == "raw" else f"{ts_column}, metric"
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            conn = sqlite3.connect(
+                Path(self.db_path).resolve().as_uri() + "?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            cursor = conn.execute(
+                f"""
+                SELECT {", ".join(EXPORT_TABLES[table])}
+                FROM {table}
+                WHERE {ts_column} >= ? AND {ts_column} < ?
+                ORDER BY {order}
+                """,
+                (start if start is not None else 0, end if end is not None else 2 ** 63 - 1),
+            )
+            while True:
+                batch = cursor.fetchmany(max(batch_rows, 1))
+                if not batch:
+                    break
+                yield batch
+        finally:
+            if conn is not None:
+                conn.close()
+
     def rollup_daily(self) -> int:
         """
         Aggregate rollup rows into 1-day daily_rollup buckets.
@@ -451,6 +792,7 @@ class TimeSeriesStore:
                     "Daily rollup completed: %d bucket-metric rows affected",
                     rows_affected,
                 )
+                self._mark_changed(TIER_DAILY)
 
         except sqlite3.Error as e:
             logger.error("rollup_daily failed: %s", e, exc_info=True)
@@ -480,18 +822,23 @@ class TimeSeriesStore:
                 deleted = cursor.rowcount
                 self._conn.commit()
                 logger.info("Daily prune completed: %d rows deleted", deleted)
+                if deleted:
+                    self._mark_changed(TIER_DAILY)
 
         except sqlite3.Error as e:
             logger.error("prune_daily failed: %s", e, exc_info=True)
 
         return deleted
 
-    def query_history_12mo(self, metric: str) -> List[Dict[str, Any]]:
+    def query_history_12mo(
+        self, metric: str, since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Return daily_rollup series for one metric over a trailing 365-day window.
 
         Args:
             metric: One of pv_power, battery_power, battery_soc, grid_power_total.
+            since: If given, only buckets with bucket_ts >= since.
 
         Returns:
             List of {bucket_ts, avg, min, max} dictionaries in chronological order.
@@ -507,6 +854,8 @@ class TimeSeriesStore:
 
         now = int(time.time())
         cutoff = now - DAILY_ROLLUP_RETENTION_SECONDS
+        if since is not None:
+            cutoff = max(cutoff, since)
         results: List[Dict[str, Any]] = []
 
         try:
@@ -538,12 +887,20 @@ class TimeSeriesStore:
         """
         Flush and close the SQLite connection.
 
-        Idempotent; safe to call multiple times.
+        With a journal, stops the compactor and compacts every pending sample
+        before closing. Idempotent; safe to call multiple times.
         """
         if self._closed:
             return
 
         self._closed = True
+        if self._journal is not None:
+            self._compact_wake.set()
+            if self._compactor is not None:
+                self._compactor.join(timeout=10)
+            self.compact_journal(rotate=True)
+            self._journal.close()
+        self._ring.clear()
         with self._lock:
             if self._conn is not None:
                 try:
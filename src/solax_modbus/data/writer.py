@@ -0,0 +1,318 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Background storage writer for Solax inverter telemetry history.
+
+Moves all mutating TimeSeriesStore calls (sample inserts, rollup and prune
+maintenance) off the polling thread. The poll loop enqueues work onto a bounded
+queue; a dedicated worker thread drains it and is the only thread that writes
+to the store.
+
+Design: design-b7c8d9e0-component_data_storage.md
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Queue overflow policies
+POLICY_DROP_OLDEST = "drop-oldest"
+POLICY_BLOCK = "block"
+QUEUE_POLICIES = (POLICY_DROP_OLDEST, POLICY_BLOCK)
+
+# Default queue capacity (~80 minutes of samples at a 5-second poll interval)
+DEFAULT_QUEUE_SIZE = 1000
+
+# Queue item kinds
+_KIND_SAMPLE = "sample"
+_KIND_JOB = "job"
+
+
+class StorageWriter:
+    """
+    Dedicated worker thread owning all writes to a TimeSeriesStore.
+
+    Samples and maintenance jobs are queued in submission order on a bounded
+    queue. When the queue is full, the drop-oldest policy discards the oldest
+    queued sample so the caller never waits (jobs are never discarded; a job
+    arriving at a queue holding only jobs is queued past capacity); the block
+    policy makes the caller wait for space. Queue depth, lag and drop
+    counters are exposed via stats().
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        policy: str = POLICY_DROP_OLDEST,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            store: TimeSeriesStore receiving samples and maintenance calls.
+            max_queue: Maximum number of queued items (minimum 1).
+            policy: Overflow policy, one of QUEUE_POLICIES.
+
+        Raises:
+            ValueError: If policy is not a known queue policy.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+
+        self.store = store
+        self.max_queue = max(int(max_queue), 1)
+        self.policy = policy
+
+        # Items are (kind, enqueued_at, payload)
+        self._queue: Deque[Tuple[str, float, Any]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Counters (guarded by _cond)
+        self._submitted = 0
+        self._written = 0
+        self._failed = 0
+        self._dropped = 0
+        self._jobs_run = 0
+        self._last_latency = 0.0
+        self._max_latency = 0.0
+
+    def start(self) -> None:
+        """Start the worker thread. Idempotent."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(
+            target=self._run, name="StorageWriter", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Storage writer started (queue=%d, policy=%s)", self.max_queue, self.policy
+        )
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Drain queued work and stop the worker thread.
+
+        Args:
+            timeout: Maximum seconds to wait for the queue to drain.
+
+        Notes:
+            Idempotent; safe if not started. Items still queued after the
+            timeout are discarded and counted as dropped.
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("Storage writer did not drain within %.1fs", timeout)
+
+        with self._cond:
+            if self._queue:
+                self._dropped += len(self._queue)
+                self._queue.clear()
+        self._thread = None
+        logger.info("Storage writer stopped")
+
+    def submit_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
+        """
+        Queue one telemetry sample for insertion.
+
+        The sample timestamp is captured here (or by the caller, e.g. the
+        snapshot bus at publish) so that queue lag does not skew stored times.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter().
+            ts: Sample time (None = now).
+
+        Returns:
+            True if queued, False if the writer is stopped (or, under
+            drop-oldest, the queue holds only maintenance jobs).
+        """
+        return self._put(_KIND_SAMPLE, (int(time.time()) if ts is None else ts, data))
+
+    def submit_job(self, name: str, func: Callable[[], Any]) -> bool:
+        """
+        Queue a maintenance job (e.g. store.rollup) to run on the worker thread.
+
+        Args:
+            name: Job name for logging.
+            func: Zero-argument callable.
+
+        Returns:
+            True if queued, False if the writer is stopped.
+        """
+        return self._put(_KIND_JOB, (name, func))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of queue and throughput metrics.
+
+        Returns:
+            Dictionary with queue depth, capacity, policy, counters, lag_seconds
+            (age of the oldest queued item) and last/max queue latency.
+        """
+        with self._cond:
+            now = time.monotonic()
+            lag = now - self._queue[0][1] if self._queue else 0.0
+            return {
+                "running": self._running,
+                "policy": self.policy,
+                "queue_size": len(self._queue),
+                "queue_capacity": self.max_queue,
+                "submitted": self._submitted,
+                "written": self._written,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "jobs_run": self._jobs_run,
+                "lag_seconds": round(lag, 3),
+                "last_latency_seconds": round(self._last_latency, 3),
+                "max_latency_seconds": round(self._max_latency, 3),
+            }
+
+    def _put(self, kind: str, payload: Any) -> bool:
+        """Enqueue an item, applying the overflow policy."""
+        with self._cond:
+            if not self._running:
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                if self.policy == POLICY_DROP_OLDEST:
+                    # Shed samples only; a lost rollup/prune would leave
+                    # history unrolled until the next cycle
+                    index = next(
+                        (i for i, item in enumerate(self._queue) if item[0] == _KIND_SAMPLE),
+                        None,
+                    )
+                    if index is None and kind == _KIND_SAMPLE:
+                        self._dropped += 1
+                        logger.warning(
+                            "Storage queue full of jobs (%d); dropped new sample",
+                            self.max_queue,
+                        )
+                        return False
+                    if index is not None:
+                        del self._queue[index]
+                        self._dropped += 1
+                        logger.warning(
+                            "Storage queue full (%d); dropped oldest sample", self.max_queue
+                        )
+                else:
+                    while self._running and len(self._queue) >= self.max_queue:
+                        self._cond.wait()
+                    if not self._running:
+                        return False
+
+            self._queue.append((kind, time.monotonic(), payload))
+            self._submitted += 1
+            self._cond.notify_all()
+            return True
+
+    def _run(self) -> None:
+        """Worker loop: drain the queue until stopped and empty."""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                kind, enqueued_at, payload = self._queue.popleft()
+                # Wake a producer blocked on a full queue
+                self._cond.notify_all()
+
+            latency = time.monotonic() - enqueued_at
+            ok = self._execute(kind, payload)
+
+            with self._cond:
+                self._last_latency = latency
+                self._max_latency = max(self._max_latency, latency)
+                if kind == _KIND_JOB:
+                    self._jobs_run += 1
+                elif ok:
+                    self._written += 1
+                if not ok:
+                    self._failed += 1
+
+    def _execute(self, kind: str, payload: Any) -> bool:
+        """Run one queued item against the store. Never raises."""
+        try:
+            if kind == _KIND_SAMPLE:
+                ts, data = payload
+                return bool(self.store.write_sample(data, ts=ts))
+
+            name, func = payload
+            started = time.monotonic()
+            func()
+            logger.debug(
+                "Storage job %s completed in %.3fs", name, time.monotonic() - started
+            )
+            return True
+        except Exception as e:
+            logger.error("Storage writer %s failed: %s", kind, e, exc_info=True)
+            return False
+
+
+class MaintenanceSchedule:
+    """
+    Periodic maintenance jobs queued in line with the samples they follow.
+
+    Sits in front of a StorageWriter on the sample path (the storage bus
+    subscriber): each sample is submitted, then any job whose interval has
+    elapsed by that sample's time. A rollup therefore always runs after every
+    sample polled before it fell due, however far the sample path lags.
+    """
+
+    def __init__(self, writer: StorageWriter, start: Optional[int] = None) -> None:
+        """
+        Initialize with no jobs.
+
+        Args:
+            writer: Writer receiving samples and jobs.
+            start: Time (epoch seconds) intervals are counted from (None = now).
+        """
+        self.writer = writer
+        self._start = int(time.time()) if start is None else start
+        # [interval, name, func, last run] per job, in submission order
+        self._jobs: List[List[Any]] = []
+
+    def every(self, interval: int, name: str, func: Callable[[], Any]) -> None:
+        """
+        Add a job run every interval seconds of sample time.
+
+        Jobs falling due on the same sample are queued in the order added.
+        """
+        self._jobs.append([interval, name, func, self._start])
+
+    def submit_sample(self, data: Dict[str, Any], ts: Optional[int] = None) -> bool:
+        """
+        Queue one sample, then any maintenance jobs now due.
+
+        Args:
+            data: Telemetry dictionary from poll_inverter().
+            ts: Sample time (None = now).
+
+        Returns:
+            The writer's submit_sample() result.
+        """
+        ts = int(time.time()) if ts is None else ts
+        queued = self.writer.submit_sample(data, ts=ts)
+        for job in self._jobs:
+            interval, name, func, last = job
+            if ts - last >= interval:
+                self.writer.submit_job(name, func)
+                job[3] = ts
+        return queued
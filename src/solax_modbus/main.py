@@ -7,20 +7,59 @@ Generated by Codestral for Cycle: solax-modbus-001
 import argparse
 import ipaddress
 import logging
+import os
 import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
 
 from pymodbus.client import ModbusTcpClient
 from pymodbus.exceptions import ModbusException
 
-from solax_modbus.data.storage import TimeSeriesStore
+from solax_modbus.application.bus import POLICY_LATEST, SnapshotBus
+from solax_modbus.data.base import (
+    BACKEND_SQLITE,
+    RAW_RETENTION_SECONDS,
+    STORE_BACKENDS,
+    StoreBackend,
+    create_store,
+)
+from solax_modbus.data.storage import (
+    DEFAULT_DURABILITY_PROFILE,
+    DURABILITY_PROFILES,
+)
+from solax_modbus.data.writer import (
+    DEFAULT_QUEUE_SIZE,
+    POLICY_DROP_OLDEST,
+    QUEUE_POLICIES,
+    MaintenanceSchedule,
+    StorageWriter,
+)
+from solax_modbus.presentation.allowlist import IPNetwork
+from solax_modbus.presentation.console import (
+    DISPLAY_INTERVAL_SECONDS,
+    SUMMARY_INTERVAL_SECONDS,
+    DisplayWorker,
+    create_renderer,
+    format_statistics,
+)
+from solax_modbus.presentation.gateway import (
+    DEFAULT_GATEWAY_PORT,
+    GATEWAY_MAX_AGE_POLLS,
+    ModbusGateway,
+    RegisterImage,
+)
+from solax_modbus.presentation.mqtt import (
+    DEFAULT_MQTT_PORT,
+    DEFAULT_TOPIC_PREFIX,
+    MqttSink,
+)
 from solax_modbus.presentation.server import (
     DEFAULT_ALLOWED_NETWORKS,
     DEFAULT_HTTP_PORT,
     StateHolder,
     TelemetryServer,
 )
+from solax_modbus.presentation.tui import TuiDisplay
 
 # Rollup and prune interval in seconds (15 minutes)
 ROLLUP_INTERVAL_SECONDS = 900
@@ -28,6 +67,9 @@ ROLLUP_INTERVAL_SECONDS = 900
 # Daily rollup and prune interval in seconds (1 day)
 DAILY_ROLLUP_INTERVAL_SECONDS = 86400
 
+# Environment variable holding the MQTT broker password (kept off the command line)
+MQTT_PASSWORD_ENV = 'SOLAX_MQTT_PASSWORD'
+
 # Configure logging to stdout/stderr for journald capture
 logging.basicConfig(
     level=logging.INFO,
@@ -104,7 +146,8 @@ class SolaxInverterClient:
         10: 'Standby'
     }
     
-    def __init__(self, ip: str, port: int = 502, unit_id: int = 1):
+    def __init__(self, ip: str, port: int = 502, unit_id: int = 1,
+                 register_image: Optional[RegisterImage] = None):
         """
         Initialize Modbus TCP client.
         
@@ -112,10 +155,13 @@ class SolaxInverterClient:
             ip: IP address of inverter
             port: Modbus TCP port (default 502)
             unit_id: Modbus unit identifier (default 1)
+            register_image: Optional cache recording every successful read,
+                re-served by the Modbus gateway
         """
         self.ip = ip
         self.port = port
         self.unit_id = unit_id
+        self.register_image = register_image
         self.client = None
         self.connection_attempts = 0
         self.max_retries = 3
@@ -182,6 +228,8 @@ class SolaxInverterClient:
             
             if not result.isError():
                 logger.debug(f"Successfully read {description} from address 0x{address:04X}")
+                if self.register_image is not None:
+                    self.register_image.update(address, result.registers)
                 return result.registers
             else:
                 logger.error(f"Modbus error reading {description}: {result}")
@@ -320,109 +368,39 @@ class SolaxInverterClient:
 
 class InverterDisplay:
     """Handles formatted display of inverter statistics."""
-    
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        summary_interval: float = SUMMARY_INTERVAL_SECONDS,
+    ):
+        """
+        Select in-place rendering for a terminal, summary lines otherwise.
+
+        Args:
+            stream: Output stream (None = sys.stdout)
+            summary_interval: Seconds between summary lines when not a terminal
+        """
+        self.renderer = create_renderer(stream, summary_interval)
+
+    def update(self, data: Dict[str, Any]):
+        """
+        Render one poll's statistics with the selected renderer.
+
+        Args:
+            data: Dictionary of inverter metrics
+        """
+        self.renderer.update(data)
+
     @staticmethod
     def display_statistics(data: Dict[str, Any]):
         """
-        Format and display statistics to console.
+        Format and display statistics to console as one full block.
         
         Args:
             data: Dictionary of inverter metrics
         """
-        if not data:
-            print("No data available")
-            return
-        
-        print("\n" + "=" * 70)
-        print("Solax X3 Hybrid 6.0-D Inverter Statistics")
-        print(f"Timestamp: {data.get('timestamp', 'N/A')}")
-        print("=" * 70)
-        
-        # System status
-        if 'run_mode' in data:
-            print(f"\n⚡ System Status: {data['run_mode']}")
-        
-        # Grid information
-        print("\n📊 Grid (Three-Phase AC)")
-        print("-" * 70)
-        if 'grid_voltage_r' in data:
-            print(f"  R Phase: {data['grid_voltage_r']:6.1f}V  "
-                  f"{data.get('grid_current_r', 0):6.1f}A  "
-                  f"{data.get('grid_power_r', 0):7.0f}W")
-            print(f"  S Phase: {data['grid_voltage_s']:6.1f}V  "
-                  f"{data.get('grid_current_s', 0):6.1f}A  "
-                  f"{data.get('grid_power_s', 0):7.0f}W")
-            print(f"  T Phase: {data['grid_voltage_t']:6.1f}V  "
-                  f"{data.get('grid_current_t', 0):6.1f}A  "
-                  f"{data.get('grid_power_t', 0):7.0f}W")
-            
-            total_power = (
-                data.get('grid_power_r', 0) + 
-                data.get('grid_power_s', 0) + 
-                data.get('grid_power_t', 0)
-            )
-            print(f"  Total:   {total_power:7.0f}W")
-            print(f"  Frequency: {data.get('grid_frequency_r', 0):.2f}Hz")
-        
-        # Solar PV information
-        print("\n☀️  Solar PV Generation")
-        print("-" * 70)
-        if 'pv1_voltage' in data:
-            print(f"  PV1: {data['pv1_voltage']:6.1f}V  "
-                  f"{data.get('pv1_current', 0):5.1f}A  "
-                  f"{data.get('pv1_power', 0):6.0f}W")
-            print(f"  PV2: {data['pv2_voltage']:6.1f}V  "
-                  f"{data.get('pv2_current', 0):5.1f}A  "
-                  f"{data.get('pv2_power', 0):6.0f}W")
-            
-            total_pv = data.get('pv1_power', 0) + data.get('pv2_power', 0)
-            print(f"  Total: {total_pv:6.0f}W")
-        
-        # Battery information
-        print("\n🔋 Battery System")
-        print("-" * 70)
-        if 'battery_voltage' in data:
-            print(f"  Voltage: {data['battery_voltage']:.1f}V")
-            
-            current = data.get('battery_current', 0)
-            if current > 0:
-                direction = "Charging"
-            elif current < 0:
-                direction = "Discharging"
-            else:
-                direction = "Idle"
-            print(f"  Current: {abs(current):.1f}A ({direction})")
-            print(f"  Power: {data.get('battery_power', 0):.0f}W")
-            print(f"  State of Charge: {data.get('battery_soc', 0)}%")
-            print(f"  Temperature: {data.get('battery_temperature', 0)}°C")
-        
-        # Power flow
-        print("\n⚡ Power Flow")
-        print("-" * 70)
-        if 'feed_in_power' in data:
-            feedin = data['feed_in_power']
-            if feedin > 0:
-                print(f"  Grid Status: EXPORTING {feedin}W")
-            elif feedin < 0:
-                print(f"  Grid Status: IMPORTING {abs(feedin)}W")
-            else:
-                print(f"  Grid Status: BALANCED (0W)")
-        
-        # Energy accounting
-        print("\n📈 Energy Totals")
-        print("-" * 70)
-        if 'energy_today' in data:
-            print(f"  Solar Generation Today: {data['energy_today']:.1f}kWh")
-        if 'energy_total' in data:
-            print(f"  Total Generation: {data['energy_total']:.1f}kWh")
-        
-        # Inverter status
-        print("\n🔧 Inverter")
-        print("-" * 70)
-        if 'inverter_temperature' in data:
-            print(f"  Temperature: {data['inverter_temperature']}°C")
-        
-        print("=" * 70 + "\n")
+        print("\n".join(format_statistics(data)))
 
 
 def main():
@@ -439,6 +417,8 @@ Examples:
   %(prog)s 192.168.1.100 --port 1502        # Use non-standard Modbus port
   %(prog)s 192.168.1.100 --debug            # Enable debug logging
   %(prog)s 192.168.1.100 --no-serve         # Disable HTTP telemetry server
+  %(prog)s 192.168.1.100 --headless         # No console display
+  %(prog)s 192.168.1.100 --tui              # Full-screen dashboard with sparklines
   %(prog)s 192.168.1.100 --http-port 9000   # Use custom HTTP port
   %(prog)s 192.168.1.100 --allow 192.168.1.0/24  # Restrict to subnet
         """
@@ -488,13 +468,122 @@ Examples:
         '--allow',
         action='append',
         metavar='CIDR',
-        help='Allowed source network in CIDR notation (repeatable; default: RFC 1918 + link-local)'
+        help='Allowed source network in CIDR notation, IPv4 or IPv6 (repeatable; '
+             'default: RFC 1918 + link-local, IPv6 ULA + link-local)'
+    )
+    parser.add_argument(
+        '--store',
+        choices=STORE_BACKENDS,
+        default=BACKEND_SQLITE,
+        help=f'History store backend (default: {BACKEND_SQLITE}; '
+             'memory keeps history in RAM only; segment uses append-only log files)'
     )
     parser.add_argument(
         '--db-path',
         type=str,
         default='solax_history.db',
-        help='SQLite database path for history storage (default: solax_history.db)'
+        help='History store path: SQLite file, or directory for --store segment '
+             '(default: solax_history.db)'
+    )
+    parser.add_argument(
+        '--db-profile',
+        choices=tuple(DURABILITY_PROFILES),
+        default=DEFAULT_DURABILITY_PROFILE,
+        help=f'SQLite durability profile (default: {DEFAULT_DURABILITY_PROFILE})'
+    )
+    parser.add_argument(
+        '--journal-dir',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Stage samples in an append-only journal in DIR and compact them into '
+             'SQLite in batches (sqlite store only; default: insert each sample)'
+    )
+    parser.add_argument(
+        '--store-queue',
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        metavar='N',
+        help=f'Storage writer queue capacity in items (default: {DEFAULT_QUEUE_SIZE})'
+    )
+    parser.add_argument(
+        '--store-queue-policy',
+        choices=QUEUE_POLICIES,
+        default=POLICY_DROP_OLDEST,
+        help=f'Storage queue overflow policy (default: {POLICY_DROP_OLDEST})'
+    )
+
+    parser.add_argument(
+        '--gateway-port',
+        type=int,
+        nargs='?',
+        const=DEFAULT_GATEWAY_PORT,
+        default=None,
+        metavar='PORT',
+        help='Serve the last polled input registers to other Modbus TCP clients '
+             f'on PORT (default when given without PORT: {DEFAULT_GATEWAY_PORT}; '
+             'default: disabled)'
+    )
+    parser.add_argument(
+        '--gateway-max-age',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='Refuse gateway reads of registers older than this '
+             f'(default: {GATEWAY_MAX_AGE_POLLS} polling intervals)'
+    )
+    parser.add_argument(
+        '--mqtt-host',
+        type=str,
+        default=None,
+        metavar='HOST',
+        help='Publish changed telemetry fields to this MQTT broker (default: disabled)'
+    )
+    parser.add_argument(
+        '--mqtt-port',
+        type=int,
+        default=DEFAULT_MQTT_PORT,
+        help=f'MQTT broker port (default: {DEFAULT_MQTT_PORT})'
+    )
+    parser.add_argument(
+        '--mqtt-prefix',
+        type=str,
+        default=DEFAULT_TOPIC_PREFIX,
+        help=f'MQTT topic prefix; fields go to PREFIX/<field> (default: {DEFAULT_TOPIC_PREFIX})'
+    )
+    parser.add_argument(
+        '--mqtt-username',
+        type=str,
+        default=None,
+        help=f'MQTT user name (password from ${MQTT_PASSWORD_ENV})'
+    )
+
+    parser.add_argument(
+        '--headless',
+        action='store_true',
+        help='Disable the console display (HTTP server and history keep running)'
+    )
+    parser.add_argument(
+        '--tui',
+        action='store_true',
+        help='Full-screen terminal dashboard with last-hour sparklines '
+             '(falls back to the console display without a terminal)'
+    )
+    parser.add_argument(
+        '--display-interval',
+        type=float,
+        default=DISPLAY_INTERVAL_SECONDS,
+        metavar='SECONDS',
+        help='Minimum seconds between console refreshes, independent of --interval '
+             f'(default: {DISPLAY_INTERVAL_SECONDS:g})'
+    )
+    parser.add_argument(
+        '--summary-interval',
+        type=float,
+        default=SUMMARY_INTERVAL_SECONDS,
+        metavar='SECONDS',
+        help='Seconds between one-line summaries when stdout is not a terminal '
+             f'(default: {SUMMARY_INTERVAL_SECONDS:g}; 0 = every poll)'
     )
 
     args = parser.parse_args()
@@ -508,13 +597,13 @@ Examples:
     if args.interval < 1:
         logger.warning(f"Interval {args.interval}s below minimum, using 1s")
 
-    # Parse allowed networks for HTTP server
-    allowed_networks: Optional[List[ipaddress.IPv4Network]] = None
+    # Parse allowed networks for the HTTP server and Modbus gateway
+    allowed_networks: Optional[List[IPNetwork]] = None
     if args.allow:
         allowed_networks = []
         for cidr in args.allow:
             try:
-                allowed_networks.append(ipaddress.IPv4Network(cidr, strict=False))
+                allowed_networks.append(ipaddress.ip_network(cidr, strict=False))
             except ValueError as e:
                 logger.error(f"Invalid CIDR in --allow: {cidr} ({e})")
                 sys.exit(1)
@@ -523,27 +612,102 @@ Examples:
     print(f"\nSolax X3 Hybrid Inverter - Modbus TCP Monitor")
     print(f"Connecting to {args.ip}:{args.port}")
     print(f"Polling interval: {poll_interval} seconds")
-    print(f"History database: {args.db_path}")
+    if args.store == BACKEND_SQLITE:
+        print(f"History database: {args.db_path} ({args.db_profile})")
+    else:
+        print(f"History store: {args.store} ({args.db_path})")
     if args.serve:
         print(f"HTTP server: http://0.0.0.0:{args.http_port}/")
     else:
         print("HTTP server: disabled (--no-serve)")
+    if args.gateway_port is not None:
+        print(f"Modbus gateway: 0.0.0.0:{args.gateway_port}")
+    if args.mqtt_host:
+        print(f"MQTT broker: {args.mqtt_host}:{args.mqtt_port} (topics {args.mqtt_prefix}/#)")
     print(f"Press Ctrl+C to stop\n")
     print("-" * 70)
 
-    # Initialize client, display, and shared state
+    # Initialize client, shared state and the snapshot bus; the poll loop only
+    # publishes, and each consumer drains its own bus queue
     client = SolaxInverterClient(args.ip, args.port, args.unit_id)
-    display = InverterDisplay()
     state = StateHolder()
+    bus = SnapshotBus()
+    # The display worker and HTTP server follow the latest state
+    bus.subscribe("state", lambda message: state.set(message.data), policy=POLICY_LATEST)
+
+    # Record polled registers for the Modbus gateway if enabled
+    register_image: Optional[RegisterImage] = None
+    if args.gateway_port is not None:
+        register_image = RegisterImage(
+            args.gateway_max_age or GATEWAY_MAX_AGE_POLLS * poll_interval
+        )
+        client.register_image = register_image
 
-    # Initialize TimeSeriesStore for history persistence
-    store: Optional[TimeSeriesStore] = None
+    # Initialize the history store backend
+    store: Optional[StoreBackend] = None
+    # Size the in-memory raw window to 24 hours at the polling interval
+    store_options: Dict[str, Any] = {
+        'ring_capacity': RAW_RETENTION_SECONDS // poll_interval,
+    }
+    if args.store == BACKEND_SQLITE:
+        store_options['profile'] = args.db_profile
+        if args.journal_dir:
+            store_options['journal_dir'] = args.journal_dir
     try:
-        store = TimeSeriesStore(args.db_path)
+        store = create_store(args.store, args.db_path, **store_options)
     except Exception as e:
         logger.error(f"Failed to initialize history store: {e}")
         # Continue without store; history will be unavailable
 
+    # Start storage writer thread; the poll loop only enqueues
+    writer: Optional[StorageWriter] = None
+    if store is not None:
+        writer = StorageWriter(
+            store,
+            max_queue=args.store_queue,
+            policy=args.store_queue_policy,
+        )
+        writer.start()
+        # Rollup and prune are queued behind the samples they follow
+        maintenance = MaintenanceSchedule(writer)
+        maintenance.every(ROLLUP_INTERVAL_SECONDS, "rollup", store.rollup)
+        maintenance.every(ROLLUP_INTERVAL_SECONDS, "prune", store.prune)
+        maintenance.every(DAILY_ROLLUP_INTERVAL_SECONDS, "rollup_daily", store.rollup_daily)
+        maintenance.every(DAILY_ROLLUP_INTERVAL_SECONDS, "prune_daily", store.prune_daily)
+        bus.subscribe(
+            "storage",
+            lambda message: maintenance.submit_sample(message.data, ts=message.ts),
+        )
+
+    # Publish changed fields to MQTT if a broker is configured
+    mqtt_sink: Optional[MqttSink] = None
+    if args.mqtt_host:
+        mqtt_sink = MqttSink(
+            args.mqtt_host,
+            port=args.mqtt_port,
+            prefix=args.mqtt_prefix,
+            username=args.mqtt_username,
+            password=os.environ.get(MQTT_PASSWORD_ENV),
+        )
+        mqtt_sink.start()
+        bus.subscribe("mqtt", mqtt_sink.handle)
+    bus.start()
+
+    # Render snapshots on a display thread so console I/O never delays polling
+    display_worker: Optional[DisplayWorker] = None
+    tui: Optional[TuiDisplay] = None
+    if not args.headless:
+        render: Callable[[Dict[str, Any]], None]
+        if args.tui:
+            # Sparklines come from the store's in-memory recent window
+            tui = TuiDisplay.open(recent=store.query_recent if store is not None else None)
+        if tui is not None:
+            render = tui.update
+        else:
+            render = InverterDisplay(summary_interval=args.summary_interval).update
+        display_worker = DisplayWorker(state, render, args.display_interval)
+        display_worker.start()
+
     # Initialize HTTP server if enabled
     server: Optional[TelemetryServer] = None
     if args.serve:
@@ -552,6 +716,7 @@ Examples:
             port=args.http_port,
             allowed_networks=allowed_networks,
             store=store,
+            writer=writer,
         )
         try:
             server.start()
@@ -559,9 +724,23 @@ Examples:
             # Logged in server.start(); continue without server
             server = None
 
-    # Track time since last rollup/prune for periodic maintenance
-    last_rollup_time = time.time()
-    last_daily_rollup_time = time.time()
+    # Re-serve polled registers to other Modbus clients (never forwarded)
+    gateway: Optional[ModbusGateway] = None
+    if register_image is not None:
+        gateway = ModbusGateway(
+            register_image,
+            port=args.gateway_port,
+            unit_id=args.unit_id,
+            allowed_networks=allowed_networks,
+        )
+        try:
+            gateway.start()
+        except OSError:
+            # Logged in gateway.start(); continue without gateway
+            gateway = None
+
+    # Track time since queue statistics were last logged
+    last_stats_time = time.time()
 
     # Main monitoring loop
     try:
@@ -574,33 +753,17 @@ Examples:
                         time.sleep(poll_interval)
                         continue
 
-                # Poll and display data
+                # Poll and publish data to the state and storage subscribers
                 data = client.poll_inverter()
-                state.set(data)
-
-                # Write sample to history store
-                if store is not None:
-                    store.write_sample(data)
-
-                display.display_statistics(data)
+                bus.publish(data)
 
-                # Periodic rollup and prune (roughly every 15 minutes)
+                # Log queue statistics as often as rollup runs
                 now = time.time()
-                if now - last_rollup_time >= ROLLUP_INTERVAL_SECONDS:
-                    if store is not None:
-                        store.rollup()
-                        store.prune()
-                    last_rollup_time = now
-
-                # Daily rollup and prune (roughly once per day)
-                if now - last_daily_rollup_time >= DAILY_ROLLUP_INTERVAL_SECONDS:
-                    if store is not None:
-                        try:
-                            store.rollup_daily()
-                            store.prune_daily()
-                        except Exception as e:
-                            logger.error("Daily rollup/prune failed: %s", e, exc_info=True)
-                    last_daily_rollup_time = now
+                if now - last_stats_time >= ROLLUP_INTERVAL_SECONDS:
+                    if writer is not None:
+                        logger.info("Storage writer stats: %s", writer.stats())
+                    logger.info("Snapshot bus stats: %s", bus.stats())
+                    last_stats_time = now
 
                 # Wait for next poll
                 time.sleep(poll_interval)
@@ -614,9 +777,21 @@ Examples:
     except KeyboardInterrupt:
         print("\n\n   Shutdown signal received...")
     finally:
-        # Ordered shutdown: stop server, close store, disconnect client
+        # Ordered shutdown: drain the bus, stop display and server, drain
+        # writer, close store, disconnect client
+        bus.stop()
+        if mqtt_sink is not None:
+            mqtt_sink.stop()
+        if display_worker is not None:
+            display_worker.stop()
+        if tui is not None:
+            tui.close()
         if server is not None:
             server.stop()
+        if gateway is not None:
+            gateway.stop()
+        if writer is not None:
+            writer.stop()
         if store is not None:
             store.close()
         client.disconnect()
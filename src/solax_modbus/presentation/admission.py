@@ -0,0 +1,252 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Admission control for the Solax telemetry server.
+
+Bounds the work a request burst can put on the store: expensive routes run
+under per-route-group concurrency limits with a short wait queue (overflow is
+answered 503 immediately rather than queued behind the store lock), and each
+client IP draws from a token bucket so one client cannot monopolise the
+server. Live telemetry routes are not in any group and are only subject to
+the per-client rate.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Routes sharing a concurrency limit, by group name
+ROUTE_GROUPS: Dict[str, str] = {
+    "/api/history": "history",
+    "/api/history/12mo": "history",
+    "/api/export": "export",
+}
+
+# Per group: (concurrent requests, queued requests beyond those)
+GROUP_LIMITS: Dict[str, Tuple[int, int]] = {
+    "history": (2, 8),
+    "export": (1, 2),
+}
+
+QUEUE_TIMEOUT_SECONDS: float = 5.0  # Longest wait for a slot before 503
+ROUTE_RETRY_AFTER_SECONDS: int = 2  # Retry-After sent with a route overflow 503
+
+# Per-client token bucket: sustained requests per second and burst size
+CLIENT_RATE: float = 10.0
+CLIENT_BURST: int = 30
+MAX_TRACKED_CLIENTS: int = 1024  # Least recently seen clients are forgotten
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second."""
+
+    __slots__ = ("rate", "burst", "_tokens", "_stamp")
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Bucket capacity.
+            now: Current monotonic time.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = now
+
+    def take(self, now: float) -> float:
+        """
+        Take one token if available.
+
+        Args:
+            now: Current monotonic time.
+
+        Returns:
+            0.0 if a token was taken, else seconds until one is available.
+        """
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """Per-client-IP token buckets, bounded to the most recently seen clients."""
+
+    def __init__(
+        self,
+        rate: float = CLIENT_RATE,
+        burst: int = CLIENT_BURST,
+        max_clients: int = MAX_TRACKED_CLIENTS,
+    ) -> None:
+        """
+        Initialize with no tracked clients.
+
+        Args:
+            rate: Sustained requests per second per client.
+            burst: Requests a client may make at once after being idle.
+            max_clients: Buckets kept; the least recently used is dropped.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max(max_clients, 1)
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.limited = 0
+
+    def check(self, client: str, now: Optional[float] = None) -> float:
+        """
+        Charge one request to a client.
+
+        Args:
+            client: Client IP address.
+            now: Current monotonic time (default time.monotonic()).
+
+        Returns:
+            0.0 if admitted, else seconds the client should wait.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+
+        wait = bucket.take(now)
+        if wait:
+            self.limited += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Return tracked client and rate-limited request counts."""
+        return {"clients": len(self._buckets), "limited": self.limited}
+
+
+class RouteLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    Loop-owned: acquire() and release() must run on the server's event loop.
+    A released slot is handed directly to the oldest waiter.
+    """
+
+    def __init__(
+        self, limit: int, queue: int, queue_timeout: float = QUEUE_TIMEOUT_SECONDS
+    ) -> None:
+        """
+        Initialize with all slots free.
+
+        Args:
+            limit: Requests allowed to run at once.
+            queue: Requests allowed to wait for a slot; more are rejected.
+            queue_timeout: Seconds a queued request waits before rejection.
+        """
+        self.limit = max(limit, 1)
+        self.queue = max(queue, 0)
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if necessary.
+
+        Returns:
+            True if admitted (call release() when done), False if the queue
+            is full or the wait timed out.
+        """
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # A slot handed over as the timeout fired must not leak either
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            # A slot handed over just before cancellation must not leak
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest live waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return active, queued, limit and rejected counts."""
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "limit": self.limit,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControl:
+    """Route-group limiters and per-client rate limiting for one server."""
+
+    def __init__(
+        self,
+        route_groups: Optional[Mapping[str, str]] = None,
+        group_limits: Optional[Mapping[str, Tuple[int, int]]] = None,
+        clients: Optional[ClientRateLimiter] = None,
+    ) -> None:
+        """
+        Build the limiters (on the server's event loop).
+
+        Args:
+            route_groups: Route to group name (None = ROUTE_GROUPS).
+            group_limits: Group to (limit, queue) (None = GROUP_LIMITS).
+            clients: Per-client limiter (None = defaults).
+        """
+        self.route_groups = dict(ROUTE_GROUPS if route_groups is None else route_groups)
+        limits = GROUP_LIMITS if group_limits is None else group_limits
+        self.groups: Dict[str, RouteLimiter] = {
+            name: RouteLimiter(limit, queue) for name, (limit, queue) in limits.items()
+        }
+        self.clients = clients if clients is not None else ClientRateLimiter()
+
+    def limiter(self, route: str) -> Optional[RouteLimiter]:
+        """Return the limiter governing a route, or None if unlimited."""
+        group = self.route_groups.get(route)
+        return self.groups.get(group) if group is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-group and per-client admission counters."""
+        return {
+            "groups": {name: limiter.stats() for name, limiter in self.groups.items()},
+            "clients": self.clients.stats(),
+        }
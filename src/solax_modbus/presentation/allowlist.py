@@ -0,0 +1,128 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Source-address allowlist for the Solax telemetry server.
+
+Compiles a list of IPv4 and IPv6 networks once into sorted, merged integer
+ranges per address family, so a check is a binary search regardless of how
+many networks are listed, and remembers recent per-address decisions in a
+bounded LRU. IPv4-mapped IPv6 addresses (::ffff:a.b.c.d, as seen on
+dual-stack sockets) are matched against the IPv4 ranges.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Recent per-address decisions kept
+DECISION_CACHE_SIZE: int = 256
+
+
+def compile_ranges(networks: Iterable[IPNetwork]) -> Tuple[List[int], List[int]]:
+    """
+    Merge networks into sorted, non-overlapping inclusive integer ranges.
+
+    Args:
+        networks: Networks of a single address family.
+
+    Returns:
+        (starts, ends) lists of equal length, ascending, with ends[i] <
+        starts[i + 1] - 1 (adjacent ranges are merged).
+    """
+    starts: List[int] = []
+    ends: List[int] = []
+    for first, last in sorted(
+        (int(net.network_address), int(net.broadcast_address)) for net in networks
+    ):
+        if ends and first <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], last)
+        else:
+            starts.append(first)
+            ends.append(last)
+    return starts, ends
+
+
+class Allowlist:
+    """
+    Compiled network allowlist with a per-address decision cache.
+
+    Used from the server's event loop thread only (the cache is not locked).
+    """
+
+    def __init__(
+        self, networks: Iterable[IPNetwork], cache_size: int = DECISION_CACHE_SIZE
+    ) -> None:
+        """
+        Compile networks into per-family ranges.
+
+        Args:
+            networks: Permitted IPv4 and IPv6 source networks.
+            cache_size: Per-address decisions remembered (least recent evicted).
+        """
+        self.networks = list(networks)
+        self._ranges: Dict[int, Tuple[List[int], List[int]]] = {
+            version: compile_ranges(n for n in self.networks if n.version == version)
+            for version in (4, 6)
+        }
+        self.cache_size = max(cache_size, 1)
+        self._cache: OrderedDict[str, bool] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def allows(self, address: str) -> bool:
+        """
+        Check a client address against the allowlist.
+
+        Args:
+            address: Textual client address (IPv4, IPv6, optionally with a
+                %scope suffix).
+
+        Returns:
+            True if the address lies in an allowed network; False otherwise,
+            including for unparseable addresses.
+        """
+        decision = self._cache.get(address)
+        if decision is not None:
+            self.hits += 1
+            self._cache.move_to_end(address)
+            return decision
+
+        self.misses += 1
+        decision = self._decide(address)
+        self._cache[address] = decision
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return decision
+
+    def _decide(self, address: str) -> bool:
+        """Binary-search the address in its family's ranges."""
+        try:
+            ip = ipaddress.ip_address(address.split("%", 1)[0])
+        except ValueError as e:
+            logger.debug("Could not parse client address: %s", e)
+            return False
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+
+        starts, ends = self._ranges[ip.version]
+        value = int(ip)
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return range counts per family and decision cache hits/misses."""
+        return {
+            "ipv4_ranges": len(self._ranges[4][0]),
+            "ipv6_ranges": len(self._ranges[6][0]),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+        }
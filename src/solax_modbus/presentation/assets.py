@@ -0,0 +1,133 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Static dashboard assets for the Solax telemetry server.
+
+The dashboard is an HTML shell plus separate stylesheet and script files.
+At server start each asset is read once, pre-compressed, and given a URL
+containing a hash of its content, so it can be cached by browsers forever
+(Cache-Control: immutable): a changed file gets a new URL. The shell names
+its assets with {{ <file name> }} placeholders, which are replaced by the
+hashed URLs; the shell itself is revalidated through its ETag, so a repeat
+visit costs one 304 and no asset requests.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from solax_modbus.presentation.compression import CompressedVariants
+
+logger = logging.getLogger(__name__)
+
+# URL prefix of hashed assets
+STATIC_PREFIX = "/static/"
+
+# Cache-Control for hashed assets (their URL changes when the content does)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Content types of servable asset files, by suffix
+ASSET_CONTENT_TYPES: Dict[str, str] = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+
+# Hex digits of the content hash kept in asset URLs
+HASH_LENGTH = 12
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+
+
+class StaticAsset(NamedTuple):
+    """One loaded asset, ready to serve."""
+
+    content_type: str
+    variants: CompressedVariants
+    etag: str
+
+
+def _etag(content: bytes) -> str:
+    """Return a strong ETag for content."""
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def hashed_name(path: Path, content: bytes) -> str:
+    """Return the file name with a content hash before the suffix."""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def _load(content: bytes, content_type: str) -> StaticAsset:
+    """Wrap and pre-compress one asset body."""
+    variants = CompressedVariants(content, static=True)
+    variants.precompress()
+    return StaticAsset(content_type, variants, _etag(content))
+
+
+class DashboardAssets:
+    """The dashboard shell and its hashed assets, loaded once at start."""
+
+    def __init__(self, shell: StaticAsset, assets: Dict[str, StaticAsset]) -> None:
+        """
+        Initialize from loaded assets.
+
+        Args:
+            shell: The rendered HTML shell.
+            assets: Assets keyed by their hashed URL.
+        """
+        self.shell = shell
+        self.assets = assets
+
+    @classmethod
+    def load(cls, template_path: Path, static_dir: Path) -> Optional[DashboardAssets]:
+        """
+        Read, hash and pre-compress the shell and every asset it references.
+
+        Args:
+            template_path: HTML shell with {{ <file name> }} placeholders.
+            static_dir: Directory holding the referenced assets.
+
+        Returns:
+            Loaded assets, or None if the shell or a referenced asset cannot
+            be read or has no known content type.
+        """
+        try:
+            template = template_path.read_text(encoding="utf-8")
+        except OSError as e:
+            logger.error("Dashboard template unavailable: %s", e)
+            return None
+
+        urls: Dict[str, str] = {}
+        assets: Dict[str, StaticAsset] = {}
+        for name in dict.fromkeys(_PLACEHOLDER.findall(template)):
+            path = static_dir / name
+            content_type = ASSET_CONTENT_TYPES.get(path.suffix)
+            if content_type is None:
+                logger.error("Dashboard asset has no known content type: %s", name)
+                return None
+            try:
+                content = path.read_bytes()
+            except OSError as e:
+                logger.error("Dashboard asset unavailable: %s", e)
+                return None
+            url = STATIC_PREFIX + hashed_name(path, content)
+            urls[name] = url
+            assets[url] = _load(content, content_type)
+
+        html = _PLACEHOLDER.sub(lambda m: urls[m.group(1)], template).encode("utf-8")
+        shell = _load(html, "text/html")
+        logger.info(
+            "Dashboard loaded: shell %d bytes, %s",
+            len(html),
+            ", ".join(f"{url} {len(a.variants.body)}" for url, a in assets.items()),
+        )
+        return cls(shell, assets)
+
+    def lookup(self, url: str) -> Optional[StaticAsset]:
+        """Return the asset served at url, or None."""
+        return self.assets.get(url)
@@ -0,0 +1,163 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+HTTP response compression for the Solax telemetry server.
+
+Negotiates a content coding from Accept-Encoding (gzip always; brotli when the
+optional brotli package is installed), compresses dynamic bodies above a size
+threshold, and holds pre-compressed variants of static content so it is
+compressed once rather than per request.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # Optional dependency: pip install solax-modbus[brotli]
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+
+# Codings this server can produce, in preference order for equal q-values
+SUPPORTED_ENCODINGS: Tuple[str, ...] = (
+    (ENCODING_BROTLI, ENCODING_GZIP) if brotli is not None else (ENCODING_GZIP,)
+)
+
+# Dynamic bodies smaller than this are sent uncompressed (not worth the CPU)
+COMPRESSION_MIN_BYTES = 1024
+
+# Compression levels: dynamic bodies favour speed, static content is done once
+_GZIP_LEVEL_DYNAMIC = 6
+_GZIP_LEVEL_STATIC = 9
+_BROTLI_QUALITY_DYNAMIC = 5
+_BROTLI_QUALITY_STATIC = 11
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value (None if absent).
+
+    Returns:
+        One of SUPPORTED_ENCODINGS, or None for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best: Optional[str] = None
+    best_q = 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Compress a body with the given content coding.
+
+    Args:
+        body: Uncompressed bytes.
+        encoding: One of SUPPORTED_ENCODINGS.
+        static: Use maximum compression (content compressed once and reused).
+
+    Returns:
+        Compressed bytes.
+
+    Raises:
+        ValueError: If encoding is not supported.
+    """
+    if encoding == ENCODING_GZIP:
+        level = _GZIP_LEVEL_STATIC if static else _GZIP_LEVEL_DYNAMIC
+        # mtime=0 keeps output deterministic for identical input
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == ENCODING_BROTLI and brotli is not None:
+        quality = _BROTLI_QUALITY_STATIC if static else _BROTLI_QUALITY_DYNAMIC
+        return brotli.compress(body, quality=quality)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+class CompressedVariants:
+    """
+    One response body with its compressed variants, built on demand.
+
+    Variants are memoized, so each coding is produced at most once for the
+    lifetime of the object. Bodies below COMPRESSION_MIN_BYTES (dynamic only)
+    are always served as identity.
+    """
+
+    def __init__(self, body: bytes, static: bool = False) -> None:
+        """
+        Wrap an uncompressed body.
+
+        Args:
+            body: Uncompressed bytes.
+            static: Compress at maximum level and regardless of size.
+        """
+        self.body = body
+        self.static = static
+        self._variants: Dict[str, bytes] = {}
+
+    def precompress(self) -> None:
+        """Build every supported variant now (e.g. at server start)."""
+        for encoding in SUPPORTED_ENCODINGS:
+            self.select(encoding)
+
+    def variants(self) -> Dict[str, bytes]:
+        """Return the compressed variants built so far, keyed by coding."""
+        return dict(self._variants)
+
+    def ready(self, encoding: Optional[str]) -> bool:
+        """Return True if select(encoding) would not need to compress."""
+        if encoding is None:
+            return True
+        if not self.static and len(self.body) < COMPRESSION_MIN_BYTES:
+            return True
+        return encoding in self._variants
+
+    def select(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Return the body for a negotiated coding.
+
+        Args:
+            encoding: Negotiated coding, or None for identity.
+
+        Returns:
+            (body, applied_encoding); applied_encoding is None when the
+            identity body is returned.
+        """
+        if encoding is None:
+            return self.body, None
+        if not self.static and len(self.body) < COMPRESSION_MIN_BYTES:
+            return self.body, None
+
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding, static=self.static)
+            # Plain assignment: a racing duplicate compression is harmless
+            self._variants[encoding] = variant
+        return variant, encoding
@@ -0,0 +1,416 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Console rendering of inverter statistics.
+
+On a terminal the statistics block is drawn once and then updated in place:
+each poll's block is compared with the previous one and only the changed
+cells are rewritten, using ANSI cursor addressing, in a single buffered
+write. When stdout is not a terminal (systemd, pipes) a compact one-line
+summary is written instead, at most once per summary interval, so the
+journal grows by a line a minute rather than a screenful per poll.
+
+Rendering runs on a DisplayWorker thread that follows the shared telemetry
+snapshots at its own refresh rate, so formatting and terminal I/O never
+delay polling or storage; snapshots published between refreshes are
+coalesced into the latest.
+
+Design: design-af5c3d4e-domain_presentation.md
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Default seconds between summary lines when stdout is not a terminal
+SUMMARY_INTERVAL_SECONDS: float = 60.0
+
+# Default seconds between display refreshes (independent of the poll interval)
+DISPLAY_INTERVAL_SECONDS: float = 1.0
+
+# Longest a display worker waits for a snapshot before checking for stop
+_STOP_CHECK_SECONDS = 0.5
+
+# In-place updates between full redraws (repairs a screen scrolled by logging)
+FULL_REDRAW_UPDATES: int = 120
+
+_CSI = "\x1b["
+_EMOJI_PRESENTATION = "\ufe0f"  # Variation selector 16
+_RULE = "=" * 70
+_SECTION_RULE = "-" * 70
+
+
+def format_statistics(data: Dict[str, Any]) -> List[str]:
+    """
+    Lay out inverter statistics as console lines.
+
+    Args:
+        data: Dictionary of inverter metrics.
+
+    Returns:
+        Lines of the statistics block, including its leading and trailing
+        blank lines.
+    """
+    if not data:
+        return ["No data available"]
+
+    lines = [
+        "",
+        _RULE,
+        "Solax X3 Hybrid 6.0-D Inverter Statistics",
+        f"Timestamp: {data.get('timestamp', 'N/A')}",
+        _RULE,
+    ]
+
+    # System status
+    if 'run_mode' in data:
+        lines += ["", f"⚡ System Status: {data['run_mode']}"]
+
+    # Grid information
+    lines += ["", "📊 Grid (Three-Phase AC)", _SECTION_RULE]
+    if 'grid_voltage_r' in data:
+        for phase in ("r", "s", "t"):
+            lines.append(
+                f"  {phase.upper()} Phase: {data[f'grid_voltage_{phase}']:6.1f}V  "
+                f"{data.get(f'grid_current_{phase}', 0):6.1f}A  "
+                f"{data.get(f'grid_power_{phase}', 0):7.0f}W"
+            )
+        total_power = (
+            data.get('grid_power_r', 0) +
+            data.get('grid_power_s', 0) +
+            data.get('grid_power_t', 0)
+        )
+        lines.append(f"  Total:   {total_power:7.0f}W")
+        lines.append(f"  Frequency: {data.get('grid_frequency_r', 0):.2f}Hz")
+
+    # Solar PV information
+    lines += ["", "☀️  Solar PV Generation", _SECTION_RULE]
+    if 'pv1_voltage' in data:
+        for pv in ("pv1", "pv2"):
+            lines.append(
+                f"  {pv.upper()}: {data[f'{pv}_voltage']:6.1f}V  "
+                f"{data.get(f'{pv}_current', 0):5.1f}A  "
+                f"{data.get(f'{pv}_power', 0):6.0f}W"
+            )
+        total_pv = data.get('pv1_power', 0) + data.get('pv2_power', 0)
+        lines.append(f"  Total: {total_pv:6.0f}W")
+
+    # Battery information
+    lines += ["", "🔋 Battery System", _SECTION_RULE]
+    if 'battery_voltage' in data:
+        lines.append(f"  Voltage: {data['battery_voltage']:.1f}V")
+        current = data.get('battery_current', 0)
+        if current > 0:
+            direction = "Charging"
+        elif current < 0:
+            direction = "Discharging"
+        else:
+            direction = "Idle"
+        lines.append(f"  Current: {abs(current):.1f}A ({direction})")
+        lines.append(f"  Power: {data.get('battery_power', 0):.0f}W")
+        lines.append(f"  State of Charge: {data.get('battery_soc', 0)}%")
+        lines.append(f"  Temperature: {data.get('battery_temperature', 0)}°C")
+
+    # Power flow
+    lines += ["", "⚡ Power Flow", _SECTION_RULE]
+    if 'feed_in_power' in data:
+        feedin = data['feed_in_power']
+        if feedin > 0:
+            lines.append(f"  Grid Status: EXPORTING {feedin}W")
+        elif feedin < 0:
+            lines.append(f"  Grid Status: IMPORTING {abs(feedin)}W")
+        else:
+            lines.append("  Grid Status: BALANCED (0W)")
+
+    # Energy accounting
+    lines += ["", "📈 Energy Totals", _SECTION_RULE]
+    if 'energy_today' in data:
+        lines.append(f"  Solar Generation Today: {data['energy_today']:.1f}kWh")
+    if 'energy_total' in data:
+        lines.append(f"  Total Generation: {data['energy_total']:.1f}kWh")
+
+    # Inverter status
+    lines += ["", "🔧 Inverter", _SECTION_RULE]
+    if 'inverter_temperature' in data:
+        lines.append(f"  Temperature: {data['inverter_temperature']}°C")
+
+    lines += [_RULE, ""]
+    return lines
+
+
+def summary_line(data: Dict[str, Any]) -> str:
+    """
+    Summarize inverter statistics on one line.
+
+    Args:
+        data: Dictionary of inverter metrics.
+
+    Returns:
+        e.g. "2025-10-22 14:32:15 Normal | PV 6140W | Battery 78% +3354W |
+        Grid +2879W | Feed-in 0W | Inverter 42°C" (absent values omitted).
+    """
+    if not data:
+        return "No data available"
+
+    parts = [
+        " ".join(str(data[key]) for key in ("timestamp", "run_mode") if key in data)
+    ]
+    if 'pv1_power' in data or 'pv2_power' in data:
+        parts.append(f"PV {data.get('pv1_power', 0) + data.get('pv2_power', 0):.0f}W")
+    if 'battery_soc' in data:
+        parts.append(
+            f"Battery {data['battery_soc']}% {data.get('battery_power', 0):+.0f}W"
+        )
+    if 'grid_power_r' in data:
+        grid = sum(data.get(f'grid_power_{phase}', 0) for phase in ("r", "s", "t"))
+        parts.append(f"Grid {grid:+.0f}W")
+    if 'feed_in_power' in data:
+        parts.append(f"Feed-in {data['feed_in_power']}W")
+    if 'inverter_temperature' in data:
+        parts.append(f"Inverter {data['inverter_temperature']}°C")
+    return " | ".join(part for part in parts if part)
+
+
+def display_width(text: str) -> int:
+    """Return the terminal columns text occupies (wide glyphs count as two)."""
+    width = 0
+    last = 0
+    for char in text:
+        if char == _EMOJI_PRESENTATION:
+            # Turns the preceding narrow symbol (e.g. the sun) into a wide emoji
+            width += 2 - last if last else 0
+            last = 2 if last else 0
+        elif unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Cf"):
+            continue
+        else:
+            last = 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+            width += last
+    return width
+
+
+class AnsiRenderer:
+    """
+    In-place terminal renderer that rewrites only changed cells.
+
+    The first frame (and any frame whose line count differs from the last)
+    is drawn in full from the top of the screen; later frames move the
+    cursor to each changed run of characters and overwrite just that run.
+    Every frame is a single write and flush.
+    """
+
+    def __init__(
+        self, stream: TextIO, full_redraw_updates: int = FULL_REDRAW_UPDATES
+    ) -> None:
+        """
+        Initialize with nothing drawn.
+
+        Args:
+            stream: Terminal output stream.
+            full_redraw_updates: In-place updates before the next full redraw.
+        """
+        self.stream = stream
+        self.full_redraw_updates = max(full_redraw_updates, 1)
+        self._frame: List[str] = []
+        self._updates = 0
+        self.bytes_written = 0
+
+    def update(self, data: Dict[str, Any]) -> None:
+        """Render one poll's statistics."""
+        lines = format_statistics(data)
+        while lines and not lines[0]:
+            lines.pop(0)
+        while lines and not lines[-1]:
+            lines.pop()
+        self.render(lines)
+
+    def render(self, lines: List[str]) -> None:
+        """
+        Bring the screen from the previous frame to lines.
+
+        Args:
+            lines: Lines of the new frame (no newlines).
+        """
+        if len(lines) != len(self._frame) or self._updates >= self.full_redraw_updates:
+            out = [f"{_CSI}H{_CSI}2J", "\n".join(lines), "\n"]
+            self._updates = 0
+        else:
+            out = []
+            for row, (old, new) in enumerate(zip(self._frame, lines), start=1):
+                if old != new:
+                    out.append(self._patch(row, old, new))
+            if out:
+                out.append(f"{_CSI}{len(lines) + 1};1H")
+            self._updates += 1
+
+        self._frame = list(lines)
+        if out:
+            text = "".join(out)
+            self.stream.write(text)
+            self.stream.flush()
+            self.bytes_written += len(text.encode("utf-8"))
+
+    @staticmethod
+    def _patch(row: int, old: str, new: str) -> str:
+        """Return the escape sequence rewriting old into new on one row."""
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        end = len(new)
+        if len(old) == len(new):
+            while end > start and old[end - 1] == new[end - 1]:
+                end -= 1
+        column = display_width(new[:start]) + 1
+        clear = f"{_CSI}K" if display_width(new) < display_width(old) else ""
+        return f"{_CSI}{row};{column}H{new[start:end]}{clear}"
+
+
+class SummaryRenderer:
+    """Rate-limited one-line summaries for non-terminal output."""
+
+    def __init__(
+        self, stream: TextIO, interval: float = SUMMARY_INTERVAL_SECONDS
+    ) -> None:
+        """
+        Initialize with no summary written yet.
+
+        Args:
+            stream: Output stream (e.g. stdout captured by journald).
+            interval: Minimum seconds between summary lines (0 = every poll).
+        """
+        self.stream = stream
+        self.interval = max(float(interval), 0.0)
+        self._last: Optional[float] = None
+
+    def update(self, data: Dict[str, Any], now: Optional[float] = None) -> None:
+        """
+        Write a summary line if the interval has elapsed since the last one.
+
+        Args:
+            data: Dictionary of inverter metrics.
+            now: Current monotonic time (default time.monotonic()).
+        """
+        now = time.monotonic() if now is None else now
+        if self._last is not None and now - self._last < self.interval:
+            return
+        self._last = now
+        self.stream.write(summary_line(data) + "\n")
+        self.stream.flush()
+
+
+def create_renderer(
+    stream: Optional[TextIO] = None, summary_interval: float = SUMMARY_INTERVAL_SECONDS
+) -> Any:
+    """
+    Pick the renderer for an output stream.
+
+    Args:
+        stream: Output stream (None = sys.stdout).
+        summary_interval: Seconds between summary lines for non-terminals.
+
+    Returns:
+        AnsiRenderer for a terminal, else SummaryRenderer.
+    """
+    stream = sys.stdout if stream is None else stream
+    try:
+        tty = stream.isatty()
+    except (AttributeError, ValueError):
+        tty = False
+    if tty:
+        return AnsiRenderer(stream)
+    return SummaryRenderer(stream, summary_interval)
+
+
+class DisplayWorker:
+    """
+    Background thread rendering telemetry snapshots at its own rate.
+
+    Follows a StateHolder with wait(), so the poll loop only publishes the
+    snapshot; the worker renders the latest one at most once per interval
+    and skips versions published in between.
+    """
+
+    def __init__(
+        self,
+        state: Any,
+        render: Callable[[Dict[str, Any]], None],
+        interval: float = DISPLAY_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        Initialize the worker (not started).
+
+        Args:
+            state: StateHolder publishing telemetry snapshots.
+            render: Called on the worker thread with each rendered snapshot's
+                data (e.g. InverterDisplay.update).
+            interval: Minimum seconds between renders.
+        """
+        self.state = state
+        self.render = render
+        self.interval = max(float(interval), 0.0)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.frames = 0
+        self.skipped = 0
+
+    def start(self) -> None:
+        """Start the worker thread. Idempotent."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="DisplayWorker", daemon=True
+        )
+        self._thread.start()
+        logger.info("Display worker started (refresh every %.1fs)", self.interval)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Stop the worker thread.
+
+        Args:
+            timeout: Maximum seconds to wait for an in-progress render.
+
+        Notes:
+            Idempotent; safe if not started.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("Display worker did not stop within %.1fs", timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Render new snapshots until stopped, no faster than the interval."""
+        version = self.state.version
+        due = 0.0
+        while not self._stop.is_set():
+            snapshot = self.state.wait(version, _STOP_CHECK_SECONDS)
+            if snapshot.version == version:
+                continue
+
+            delay = due - time.monotonic()
+            if delay > 0:
+                if self._stop.wait(delay):
+                    break
+                snapshot = self.state.snapshot()
+
+            self.skipped += max(snapshot.version - version - 1, 0)
+            version = snapshot.version
+            due = time.monotonic() + self.interval
+            try:
+                self.render(dict(snapshot.data))
+                self.frames += 1
+            except Exception as e:
+                logger.error("Display render failed: %s", e, exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rendered frame and skipped snapshot counts."""
+        return {"frames": self.frames, "skipped": self.skipped}
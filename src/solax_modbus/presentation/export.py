@@ -0,0 +1,67 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Row encodings for the /api/export stream.
+
+An export is sent as HTTP/1.1 chunked transfer encoding, one chunk per batch
+of rows read from the store, so neither side needs the full result in
+memory. CSV output starts with a header line; NDJSON output is one JSON
+object per line. Missing values are empty CSV fields or JSON null.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Values of the ?format= query parameter, with their content types
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+EXPORT_CONTENT_TYPES: Dict[str, str] = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_NDJSON: "application/x-ndjson",
+}
+
+# Final chunk of a chunked body (no trailers)
+LAST_CHUNK = b"0\r\n\r\n"
+
+
+def encode_header(columns: Sequence[str], fmt: str) -> bytes:
+    """Return the bytes that open an export (the CSV header line, if any)."""
+    if fmt != FORMAT_CSV:
+        return b""
+    return encode_batch(columns, [tuple(columns)], fmt)
+
+
+def encode_batch(
+    columns: Sequence[str], rows: Sequence[Tuple[Any, ...]], fmt: str
+) -> bytes:
+    """
+    Encode one batch of rows.
+
+    Args:
+        columns: Column names, in row order.
+        rows: Row tuples.
+        fmt: FORMAT_CSV or FORMAT_NDJSON.
+
+    Returns:
+        UTF-8 lines, one per row, each ending in a newline.
+    """
+    if fmt == FORMAT_CSV:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerows(rows)
+        return out.getvalue().encode("utf-8")
+    return "".join(
+        json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def chunk(data: bytes) -> bytes:
+    """Frame data as one HTTP/1.1 chunk."""
+    return b"%x\r\n%s\r\n" % (len(data), data)
@@ -0,0 +1,362 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Modbus TCP gateway re-serving the most recently polled inverter registers.
+
+The Solax WiFi dongle copes badly with more than one Modbus client. With the
+gateway enabled, other clients (e.g. Home Assistant) read input registers
+from solax-monitor instead: every successful poll read is recorded in a
+RegisterImage, and read_input_registers (function 0x04) requests are
+answered from it. Requests are never forwarded, so the inverter sees exactly
+one poller however many downstream clients connect.
+
+Freshness is tracked per register group (one poll read); where groups
+overlap, each register is taken from its most recent read. A request is
+answered only if every register it covers was read within max_age seconds;
+otherwise it gets exception 0x0B (gateway target device failed to respond),
+so clients see a failed read rather than silently stale data. Registers the
+monitor never polls get 0x02 (illegal data address); other functions,
+including all writes, get 0x01 (illegal function). The gateway answers only
+for the polled inverter's unit id; requests addressed to any other unit get
+0x0A (gateway path unavailable).
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from solax_modbus.presentation.allowlist import Allowlist, IPNetwork
+from solax_modbus.presentation.server import DEFAULT_ALLOWED_NETWORKS
+
+logger = logging.getLogger(__name__)
+
+# Non-privileged default port (502 needs root)
+DEFAULT_GATEWAY_PORT = 5020
+
+# Default register freshness, in poll intervals
+GATEWAY_MAX_AGE_POLLS = 3
+
+# Connection limits and idle timeout in seconds
+DEFAULT_MAX_CONNECTIONS = 16
+IDLE_TIMEOUT_SECONDS = 300.0
+
+# Supported function and the Modbus limit on registers per read
+READ_INPUT_REGISTERS = 0x04
+MAX_READ_REGISTERS = 125
+
+# Exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+# MBAP header: transaction id, protocol id, length, unit id
+_MBAP = struct.Struct(">HHHB")
+_MAX_PDU_BYTES = 253
+
+
+class ModbusReplyError(Exception):
+    """Request answered with a Modbus exception code."""
+
+    def __init__(self, code: int, message: str = "") -> None:
+        super().__init__(message or f"Modbus exception 0x{code:02X}")
+        self.code = code
+
+
+class RegisterImage:
+    """
+    Thread-safe cache of the input registers read by the poll loop.
+
+    Each poll read is kept as a group (start address, registers, read time)
+    replacing the previous read at that address. Groups may overlap; reads
+    use the most recent group covering each register.
+    """
+
+    def __init__(self, max_age: float) -> None:
+        """
+        Initialize an empty image.
+
+        Args:
+            max_age: Seconds after which a group's registers are stale.
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._groups: Dict[int, Tuple[Tuple[int, ...], float]] = {}
+
+    def update(self, address: int, registers: Sequence[int], now: Optional[float] = None) -> None:
+        """
+        Record one successful poll read.
+
+        Args:
+            address: Starting register address.
+            registers: Register values read.
+            now: Read time (time.monotonic(); None = now).
+        """
+        entry = (tuple(registers), time.monotonic() if now is None else now)
+        with self._lock:
+            self._groups[address] = entry
+
+    def read(self, address: int, count: int, now: Optional[float] = None) -> List[int]:
+        """
+        Return registers [address, address + count) from fresh groups.
+
+        Args:
+            address: Starting register address.
+            count: Number of registers.
+            now: Current time (time.monotonic(); None = now).
+
+        Returns:
+            Register values.
+
+        Raises:
+            ModbusReplyError: ILLEGAL_DATA_ADDRESS if a register is not
+                polled, GATEWAY_TARGET_FAILED if its latest read is stale.
+        """
+        now = time.monotonic() if now is None else now
+        end = address + count
+        with self._lock:
+            groups = [
+                (start, registers, read_at)
+                for start, (registers, read_at) in self._groups.items()
+                if start < end and start + len(registers) > address
+            ]
+
+        values: List[int] = []
+        for position in range(address, end):
+            # Most recent read covering this register
+            latest: Optional[Tuple[int, float]] = None
+            for start, registers, read_at in groups:
+                if start <= position < start + len(registers):
+                    if latest is None or read_at > latest[1]:
+                        latest = (registers[position - start], read_at)
+            if latest is None:
+                raise ModbusReplyError(
+                    ILLEGAL_DATA_ADDRESS, f"register 0x{position:04X} not polled"
+                )
+            value, read_at = latest
+            if now - read_at > self.max_age:
+                raise ModbusReplyError(
+                    GATEWAY_TARGET_FAILED,
+                    f"register 0x{position:04X} last read {now - read_at:.0f}s ago",
+                )
+            values.append(value)
+        return values
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return the cached groups and their ages in seconds."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            groups = sorted(self._groups.items())
+        return {
+            "max_age": self.max_age,
+            "groups": {
+                f"0x{start:04X}": {"count": len(registers), "age": round(now - read_at, 1)}
+                for start, (registers, read_at) in groups
+            },
+        }
+
+
+def respond(image: RegisterImage, pdu: bytes) -> bytes:
+    """
+    Answer one request PDU from the image.
+
+    Args:
+        image: Register cache.
+        pdu: Request PDU (function code and data).
+
+    Returns:
+        Response PDU (normal or exception).
+    """
+    function = pdu[0]
+    try:
+        if function != READ_INPUT_REGISTERS:
+            raise ModbusReplyError(ILLEGAL_FUNCTION)
+        if len(pdu) != 5:
+            raise ModbusReplyError(ILLEGAL_DATA_VALUE)
+        address, count = struct.unpack(">HH", pdu[1:])
+        if not 1 <= count <= MAX_READ_REGISTERS:
+            raise ModbusReplyError(ILLEGAL_DATA_VALUE)
+        registers = image.read(address, count)
+    except ModbusReplyError as e:
+        logger.debug("Gateway request 0x%02X refused: %s", function, e)
+        return bytes((function | 0x80, e.code))
+    return bytes((function, 2 * count)) + struct.pack(f">{count}H", *registers)
+
+
+class ModbusGateway:
+    """
+    Background asyncio Modbus TCP server answering from a RegisterImage.
+
+    Runs an event loop on a dedicated thread, like the telemetry server;
+    each connection is a coroutine. Source addresses are filtered with the
+    same allowlist as the HTTP server, and only requests for unit_id are
+    answered from the image.
+    """
+
+    def __init__(
+        self,
+        image: RegisterImage,
+        bind_host: Optional[str] = None,
+        port: int = DEFAULT_GATEWAY_PORT,
+        allowed_networks: Optional[List[IPNetwork]] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        unit_id: int = 1,
+    ) -> None:
+        """
+        Initialize the gateway (not started).
+
+        Args:
+            image: Register cache filled by the poll loop.
+            bind_host: Interface to bind (None = all IPv4 interfaces).
+            port: TCP port (0 = ephemeral).
+            allowed_networks: Permitted IPv4/IPv6 source ranges (None =
+                DEFAULT_ALLOWED_NETWORKS, as for the HTTP server).
+            max_connections: Connections beyond this are closed at once.
+            unit_id: Modbus unit id of the polled inverter; requests for
+                other units are refused with GATEWAY_PATH_UNAVAILABLE.
+        """
+        self.image = image
+        self.bind_host = bind_host
+        self.port = port
+        self.allowlist = Allowlist(
+            allowed_networks if allowed_networks is not None else DEFAULT_ALLOWED_NETWORKS
+        )
+        self.max_connections = max(int(max_connections), 1)
+        self.unit_id = unit_id
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Set[asyncio.Task] = set()
+
+        # Counters (loop thread only)
+        self._requests = 0
+        self._refused = 0
+        self._rejected = 0
+
+    @property
+    def server_address(self) -> Optional[Tuple[str, int]]:
+        """Return the bound (host, port), or None if not started."""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters and the register image state."""
+        return {
+            "connections": len(self._connections),
+            "requests": self._requests,
+            "refused": self._refused,
+            "rejected": self._rejected,
+            "image": self.image.stats(),
+        }
+
+    def start(self) -> None:
+        """
+        Bind and begin serving on a background event loop thread.
+
+        Raises:
+            OSError: Port unavailable. Logged; the polling loop should continue.
+        """
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(asyncio.start_server(
+                self._accept, self.bind_host or "0.0.0.0", self.port
+            ))
+        except OSError as e:
+            logger.error("Failed to bind Modbus gateway on port %d: %s", self.port, e)
+            self._loop.close()
+            self._loop = None
+            raise
+
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="ModbusGateway", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Modbus gateway started on %s:%d (max age %.0fs)",
+            self.bind_host or "*",
+            self.server_address[1],
+            self.image.max_age,
+        )
+
+    def stop(self) -> None:
+        """Stop serving and release the socket. Idempotent; safe if not started."""
+        if self._loop is not None and self._thread is not None:
+            try:
+                future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+                future.result(timeout=5.0)
+            except Exception as e:
+                logger.error("Error during gateway shutdown: %s", e, exc_info=True)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5.0)
+            if self._thread.is_alive():
+                logger.warning("Modbus gateway thread did not stop within timeout")
+            else:
+                self._loop.close()
+            logger.info("Modbus gateway stopped: %s", self.stats())
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _shutdown(self) -> None:
+        """Stop accepting and cancel open connections."""
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=2.0)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _accept(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Connection callback: filter, limit, then answer requests until closed."""
+        peer = writer.get_extra_info("peername") or ("", 0)
+        if not self.allowlist.allows(peer[0]) or len(self._connections) >= self.max_connections:
+            self._rejected += 1
+            writer.close()
+            return
+
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await self._serve(reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer framed requests in order on one connection."""
+        while True:
+            header = await asyncio.wait_for(reader.readexactly(_MBAP.size), IDLE_TIMEOUT_SECONDS)
+            transaction, protocol, length, unit = _MBAP.unpack(header)
+            if protocol != 0 or not 2 <= length <= _MAX_PDU_BYTES + 1:
+                logger.debug("Gateway closing connection after malformed frame")
+                return
+            pdu = await reader.readexactly(length - 1)
+
+            if unit == self.unit_id:
+                response = respond(self.image, pdu)
+            else:
+                logger.debug("Gateway request for unit %d refused", unit)
+                response = bytes((pdu[0] | 0x80, GATEWAY_PATH_UNAVAILABLE))
+            self._requests += 1
+            if response[0] & 0x80:
+                self._refused += 1
+            writer.write(_MBAP.pack(transaction, 0, len(response) + 1, unit) + response)
+            await writer.drain()
@@ -0,0 +1,247 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Compact wire formats for /api/history responses.
+
+The default response is a list of {bucket_ts, avg, min, max} rows per metric.
+The formats here encode the same buckets on a shared fixed-step timeline
+instead: a columnar JSON object of parallel arrays (optionally quantized to
+integers), and a little-endian binary body whose float32 arrays a browser can
+view directly as Float32Array. Gaps in a series are null (JSON) or NaN
+(binary).
+
+Binary layout (little-endian):
+    header   magic b"SXH1", uint32 metric count, int64 start, uint32 step,
+             uint32 count (24 bytes, so every array is 4-byte aligned)
+    arrays   per metric, in request order: float32 avg[count],
+             float32 min[count], float32 max[count]
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from solax_modbus.data.base import HistoryColumns
+
+logger = logging.getLogger(__name__)
+
+# Values of the ?format= query parameter
+FORMAT_ROWS = "rows"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_BINARY = "binary"
+HISTORY_FORMATS = (FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_BINARY)
+
+BINARY_CONTENT_TYPE = "application/octet-stream"
+BINARY_MAGIC = b"SXH1"
+BINARY_HEADER = struct.Struct("<4sIqII")
+
+# Upper bound on ?points= (a wide desktop chart at 2x pixel density)
+MAX_POINTS = 4096
+
+_NAN = float("nan")
+
+
+def group_width(span: int, points: int, step: int) -> int:
+    """
+    Return the smallest multiple of step that fits span into points groups.
+
+    Args:
+        span: Time range in seconds.
+        points: Point budget (e.g. chart width in pixels).
+        step: Bucket width of the stored series.
+
+    Returns:
+        Group width in seconds (at least step).
+    """
+    per_point = -(-max(span, 1) // max(points, 1))  # ceiling division
+    return max(-(-per_point // step), 1) * step
+
+
+def clip(columns: HistoryColumns, end: int) -> HistoryColumns:
+    """Return columns without the buckets at or after end."""
+    index = bisect_left(columns.bucket_ts, end)
+    if index == len(columns.bucket_ts):
+        return columns
+    return HistoryColumns(*(column[:index] for column in columns))
+
+
+def downsample(columns: HistoryColumns, width: int) -> HistoryColumns:
+    """
+    Merge buckets into groups of width seconds, preserving the extremes.
+
+    Groups are aligned to multiples of width, so a delta re-downsampled
+    from a group boundary reproduces the same groups. Each group keeps the
+    mean of its averages, the least minimum and the greatest maximum, so
+    peaks survive however far the series is reduced.
+
+    Args:
+        columns: Chronological series.
+        width: Group width in seconds (a multiple of the bucket width).
+
+    Returns:
+        One bucket per non-empty group, stamped with the group start.
+    """
+    out = HistoryColumns.empty()
+    group = None
+    total = lo = hi = 0.0
+    count = 0
+    for bucket_ts, avg, bucket_lo, bucket_hi in zip(*columns):
+        start = bucket_ts - bucket_ts % width
+        if start != group:
+            if count:
+                out.append(group, total / count, lo, hi)
+            group, total, count, lo, hi = start, 0.0, 0, bucket_lo, bucket_hi
+        total += avg
+        count += 1
+        lo = min(lo, bucket_lo)
+        hi = max(hi, bucket_hi)
+    if count:
+        out.append(group, total / count, lo, hi)
+    return out
+
+
+def encode_rows(
+    columns: Mapping[str, HistoryColumns], extra: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Encode series in the default {bucket_ts, avg, min, max} row format.
+
+    Args:
+        columns: Series per metric.
+        extra: Additional top-level fields (e.g. a delta cursor).
+
+    Returns:
+        UTF-8 JSON in the query_history() shape per metric.
+    """
+    result: Dict[str, Any] = {
+        metric: [
+            {"bucket_ts": bucket_ts, "avg": avg, "min": lo, "max": hi}
+            for bucket_ts, avg, lo, hi in zip(*col)
+        ]
+        for metric, col in columns.items()
+    }
+    result.update(extra or {})
+    return json.dumps(result).encode("utf-8")
+
+
+def timeline(
+    columns: Mapping[str, HistoryColumns], step: int
+) -> Tuple[int, int]:
+    """
+    Return the shared (start, count) timeline covering every series.
+
+    Args:
+        columns: Series per metric.
+        step: Bucket width in seconds.
+
+    Returns:
+        (start bucket_ts, number of steps); (0, 0) if every series is empty.
+    """
+    firsts = [c.bucket_ts[0] for c in columns.values() if c.bucket_ts]
+    if not firsts:
+        return 0, 0
+    start = min(firsts)
+    end = max(c.bucket_ts[-1] for c in columns.values() if c.bucket_ts)
+    return start, (end - start) // step + 1
+
+
+def encode_columnar(
+    columns: Mapping[str, HistoryColumns],
+    step: int,
+    quantize: bool = False,
+    extra: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """
+    Encode series as columnar JSON on a shared timeline.
+
+    Args:
+        columns: Series per metric.
+        step: Bucket width in seconds.
+        quantize: Round values to integers (watts and percent need no more).
+        extra: Additional top-level fields (e.g. a delta cursor).
+
+    Returns:
+        UTF-8 JSON: {"start", "step", "count", "series": {metric: {"avg",
+        "min", "max"}}} with null for missing buckets.
+    """
+    start, count = timeline(columns, step)
+    series: Dict[str, Dict[str, List[Optional[float]]]] = {}
+    for metric, col in columns.items():
+        fields: Dict[str, List[Optional[float]]] = {}
+        for name in ("avg", "min", "max"):
+            values: List[Optional[float]] = [None] * count
+            for bucket_ts, value in zip(col.bucket_ts, getattr(col, name)):
+                values[(bucket_ts - start) // step] = round(value) if quantize else value
+            fields[name] = values
+        series[metric] = fields
+
+    result: Dict[str, Any] = {"start": start, "step": step, "count": count}
+    result.update(extra or {})
+    result["series"] = series
+    return json.dumps(result, separators=(",", ":")).encode("utf-8")
+
+
+def encode_binary(columns: Mapping[str, HistoryColumns], step: int) -> bytes:
+    """
+    Encode series as little-endian float32 arrays on a shared timeline.
+
+    Args:
+        columns: Series per metric; arrays follow the mapping's order.
+        step: Bucket width in seconds.
+
+    Returns:
+        Header plus 3 * count float32 values per metric (see module docstring).
+    """
+    start, count = timeline(columns, step)
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, len(columns), start, step, count)]
+    for col in columns.values():
+        offsets = [(bucket_ts - start) // step for bucket_ts in col.bucket_ts]
+        for values in (col.avg, col.min, col.max):
+            out = array("f", [_NAN]) * count
+            for offset, value in zip(offsets, values):
+                out[offset] = value
+            if sys.byteorder != "little":
+                out.byteswap()
+            parts.append(out.tobytes())
+    return b"".join(parts)
+
+
+def decode_binary(body: bytes) -> Tuple[int, int, List[Tuple[array, array, array]]]:
+    """
+    Decode a binary history body (the inverse of encode_binary).
+
+    Args:
+        body: Bytes produced by encode_binary.
+
+    Returns:
+        (start, step, [(avg, min, max) float32 arrays per metric]).
+
+    Raises:
+        ValueError: If the magic or length does not match.
+    """
+    magic, metrics, start, step, count = BINARY_HEADER.unpack_from(body)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a binary history body")
+    if len(body) != BINARY_HEADER.size + metrics * 3 * count * 4:
+        raise ValueError("Binary history body has the wrong length")
+
+    series: List[Tuple[array, array, array]] = []
+    offset = BINARY_HEADER.size
+    for _ in range(metrics):
+        fields = []
+        for _ in range(3):
+            values = array("f")
+            values.frombytes(body[offset:offset + count * 4])
+            if sys.byteorder != "little":
+                values.byteswap()
+            fields.append(values)
+            offset += count * 4
+        series.append((fields[0], fields[1], fields[2]))
+    return start, step, series
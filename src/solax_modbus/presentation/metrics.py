@@ -0,0 +1,165 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Per-route request instrumentation for the Solax telemetry server.
+
+Counts requests, status codes and bytes sent per route and keeps fixed-bucket
+latency histograms, with the time handlers spent waiting on the store lock
+recorded separately, so /api/stats shows where request time goes under load.
+
+Design: design-9b7e2c4a-component_presentation_server.md
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (a final bucket holds the rest)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+# Routes reported individually; anything else is counted under OTHER_ROUTE
+OTHER_ROUTE = "other"
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations with percentile estimates."""
+
+    def __init__(self, bounds_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        """
+        Initialize empty buckets.
+
+        Args:
+            bounds_ms: Ascending bucket upper bounds in milliseconds.
+        """
+        self.bounds_ms = bounds_ms
+        self.counts: List[int] = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration."""
+        ms = seconds * 1000.0
+        self.counts[bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Estimate a percentile as the upper bound of the bucket reaching it.
+
+        Args:
+            fraction: Percentile as a fraction (e.g. 0.99).
+
+        Returns:
+            Milliseconds (the observed maximum for the overflow bucket), or
+            None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index < len(self.bounds_ms):
+                    return float(min(self.bounds_ms[index], self.max_ms))
+                return self.max_ms
+        return self.max_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Return count, mean, max, p50/p90/p99 and the bucket counts."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {
+                **{f"le_{bound:g}": n for bound, n in zip(self.bounds_ms, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class RouteStats:
+    """Counters and histograms for one route."""
+
+    def __init__(self) -> None:
+        """Initialize zeroed counters."""
+        self.count = 0
+        self.statuses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self.latency = LatencyHistogram()
+        self.store_wait = LatencyHistogram()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the route's counters as a JSON-ready dictionary."""
+        return {
+            "count": self.count,
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items())},
+            "bytes_sent": self.bytes_sent,
+            "latency": self.latency.stats(),
+            "store_lock_wait": self.store_wait.stats(),
+        }
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics for one server.
+
+    Owned by the server's event loop: record() and stats() run on the loop
+    thread, so no locking is needed.
+    """
+
+    def __init__(self, routes: Iterable[str]) -> None:
+        """
+        Initialize counters for the server's routes.
+
+        Args:
+            routes: Routes reported individually; others share OTHER_ROUTE,
+                which keeps the set bounded whatever paths clients send.
+        """
+        self.routes: Dict[str, RouteStats] = {route: RouteStats() for route in routes}
+        self.routes[OTHER_ROUTE] = RouteStats()
+
+    def record(
+        self,
+        route: str,
+        status: int,
+        bytes_sent: int,
+        seconds: Optional[float],
+        store_wait: float,
+    ) -> None:
+        """
+        Record one completed request.
+
+        Args:
+            route: Request path without query.
+            status: Response status (0 if no response was sent).
+            bytes_sent: Bytes written, headers included.
+            seconds: Handling time, or None for held or streamed responses
+                (long-polls, event streams, exports) whose duration is not a
+                latency.
+            store_wait: Seconds spent waiting for the store lock.
+        """
+        entry = self.routes.get(route) or self.routes[OTHER_ROUTE]
+        entry.count += 1
+        entry.statuses[status] = entry.statuses.get(status, 0) + 1
+        entry.bytes_sent += bytes_sent
+        if seconds is not None:
+            entry.latency.observe(seconds)
+            entry.store_wait.observe(store_wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-route statistics for routes that have seen requests."""
+        return {
+            route: entry.stats() for route, entry in self.routes.items() if entry.count
+        }
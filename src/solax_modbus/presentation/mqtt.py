@@ -0,0 +1,418 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+MQTT publisher for Solax telemetry (e.g. for Home Assistant).
+
+Each telemetry field is published to its own retained topic,
+<prefix>/<field>, and only when it has moved by at least the field's
+deadband since the value last published, so a steady system sends little
+more than its keepalives. The sink is fed from the snapshot bus: handle()
+only records changed values, and a separate network thread sends everything
+changed since its last write as one batch. While the broker is unreachable
+the changes accumulate as the latest value per topic (retained topics only
+need the newest), and are sent on reconnect together with a resync of every
+field, so a restarted broker without persistence is repopulated.
+
+Implements the small part of MQTT 3.1.1 needed (CONNECT with last will,
+QoS 0 PUBLISH, PINGREQ, DISCONNECT) on the standard library, so no client
+package is required.
+
+Design: design-af5c3d4e-domain_presentation.md
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MQTT_PORT = 1883
+DEFAULT_TOPIC_PREFIX = "solax"
+
+# Keepalive negotiated with the broker, in seconds
+KEEPALIVE_SECONDS = 60
+
+# Connect/write timeout and reconnect backoff bounds, in seconds
+CONNECT_TIMEOUT_SECONDS = 5.0
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+
+# Retained availability topic (<prefix>/status) values
+STATUS_ONLINE = "online"
+STATUS_OFFLINE = "offline"
+
+# Fields never published (the poll timestamp changes every tick)
+EXCLUDED_FIELDS = frozenset({"timestamp"})
+
+# Minimum change worth publishing, by field-name part (so "_voltage" covers
+# grid_voltage_r); fields matching no part are published on any change
+DEFAULT_DEADBANDS: Dict[str, float] = {
+    "_power": 20.0,  # W
+    "_voltage": 1.0,  # V
+    "_current": 0.2,  # A
+    "_frequency": 0.05,  # Hz
+    "_temperature": 1.0,  # °C
+}
+
+# Control packets
+_CONNECT = 0x10
+_CONNACK = 0x20
+_PUBLISH = 0x30
+PINGREQ = b"\xc0\x00"
+DISCONNECT = b"\xe0\x00"
+
+_PROTOCOL_LEVEL = 4  # MQTT 3.1.1
+
+
+class MqttError(Exception):
+    """Broker refused the connection or broke the protocol."""
+
+
+def encode_remaining_length(length: int) -> bytes:
+    """Encode a packet's remaining length as an MQTT variable-length integer."""
+    out = bytearray()
+    while True:
+        length, digit = divmod(length, 128)
+        out.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(out)
+
+
+def _string(value: str) -> bytes:
+    """Encode a length-prefixed UTF-8 string."""
+    raw = value.encode("utf-8")
+    return struct.pack("!H", len(raw)) + raw
+
+
+def _packet(first: int, body: bytes) -> bytes:
+    """Frame a packet body with its fixed header."""
+    return bytes((first,)) + encode_remaining_length(len(body)) + body
+
+
+def connect_packet(
+    client_id: str,
+    keepalive: int = KEEPALIVE_SECONDS,
+    will: Optional[Tuple[str, str]] = None,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+) -> bytes:
+    """
+    Build a clean-session CONNECT packet.
+
+    Args:
+        client_id: Client identifier.
+        keepalive: Keepalive interval in seconds.
+        will: Optional (topic, message) published retained by the broker if
+            the connection drops without DISCONNECT.
+        username: Optional user name.
+        password: Optional password (sent only with a user name).
+    """
+    flags = 0x02
+    payload = _string(client_id)
+    if will is not None:
+        flags |= 0x04 | 0x20
+        payload += _string(will[0]) + _string(will[1])
+    if username is not None:
+        flags |= 0x80
+        payload += _string(username)
+        if password is not None:
+            flags |= 0x40
+            payload += _string(password)
+    header = _string("MQTT") + struct.pack("!BBH", _PROTOCOL_LEVEL, flags, keepalive)
+    return _packet(_CONNECT, header + payload)
+
+
+def publish_packet(topic: str, payload: str, retain: bool = True) -> bytes:
+    """Build a QoS 0 PUBLISH packet."""
+    return _packet(_PUBLISH | (0x01 if retain else 0), _string(topic) + payload.encode("utf-8"))
+
+
+def encode_value(value: Any) -> str:
+    """Render a telemetry value as a topic payload."""
+    if isinstance(value, float):
+        return str(round(value, 3))
+    return str(value)
+
+
+def deadband_for(field: str, deadbands: Dict[str, float]) -> float:
+    """
+    Return the deadband of a field.
+
+    Args:
+        field: Telemetry field name.
+        deadbands: Bands keyed by exact field name or by a "_"-prefixed
+            part of the name; an exact name wins.
+    """
+    if field in deadbands:
+        return deadbands[field]
+    for part, band in deadbands.items():
+        if part.startswith("_") and part in field:
+            return band
+    return 0.0
+
+
+def changed(last: Any, value: Any, band: float) -> bool:
+    """Return True if value differs from last by at least band (any change if 0)."""
+    numeric = (int, float)
+    if band > 0 and isinstance(last, numeric) and isinstance(value, numeric):
+        # Tolerance absorbs float error in scaled register values
+        return abs(value - last) + 1e-9 >= band
+    return value != last
+
+
+class MqttSink:
+    """
+    Change-only, batched publisher of telemetry snapshots to an MQTT broker.
+
+    handle() runs on the caller's thread (a snapshot bus subscription) and
+    never touches the socket; connection, batching and keepalive live on the
+    sink's own network thread.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_MQTT_PORT,
+        prefix: str = DEFAULT_TOPIC_PREFIX,
+        deadbands: Optional[Dict[str, float]] = None,
+        client_id: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        keepalive: int = KEEPALIVE_SECONDS,
+    ) -> None:
+        """
+        Initialize the sink (not started).
+
+        Args:
+            host: Broker host name or address.
+            port: Broker port.
+            prefix: Topic prefix; fields go to <prefix>/<field>.
+            deadbands: Per-field bands (see deadband_for); None uses
+                DEFAULT_DEADBANDS.
+            client_id: MQTT client identifier (None = derived from the pid).
+            username: Optional broker user name.
+            password: Optional broker password.
+            keepalive: Keepalive interval in seconds.
+        """
+        self.host = host
+        self.port = port
+        self.prefix = prefix.rstrip("/")
+        self.deadbands = DEFAULT_DEADBANDS if deadbands is None else deadbands
+        self.client_id = client_id or f"solax-monitor-{os.getpid()}"
+        self.username = username
+        self.password = password
+        self.keepalive = max(int(keepalive), 5)
+        self.status_topic = f"{self.prefix}/status"
+
+        # Last accepted value per field (handle() thread only)
+        self._last: Dict[str, Any] = {}
+
+        # Topic payloads: every field's latest, and those not yet sent
+        self._cond = threading.Condition()
+        self._values: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._running = False
+        self._connected = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters (guarded by _cond)
+        self._snapshots = 0
+        self._changes = 0
+        self._suppressed = 0
+        self._published = 0
+        self._batches = 0
+        self._bytes_sent = 0
+        self._connects = 0
+
+    def start(self) -> None:
+        """Start the network thread. Idempotent."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="MqttSink", daemon=True)
+        self._thread.start()
+        logger.info("MQTT sink started: %s:%d, topics %s/#", self.host, self.port, self.prefix)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Send pending changes, mark the monitor offline and disconnect.
+
+        Args:
+            timeout: Maximum seconds to wait for the network thread.
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("MQTT sink did not stop within %.1fs", timeout)
+            self._thread = None
+        logger.info("MQTT sink stopped: %s", self.stats())
+
+    def handle(self, message: Any) -> None:
+        """
+        Record one snapshot's changed fields for the next batch.
+
+        Args:
+            message: Snapshot bus message (anything with a data mapping).
+        """
+        changes: Dict[str, str] = {}
+        suppressed = 0
+        for field, value in message.data.items():
+            if field in EXCLUDED_FIELDS or value is None:
+                continue
+            if field in self._last and not changed(
+                self._last[field], value, deadband_for(field, self.deadbands)
+            ):
+                suppressed += 1
+                continue
+            self._last[field] = value
+            changes[f"{self.prefix}/{field}"] = encode_value(value)
+
+        with self._cond:
+            self._snapshots += 1
+            self._suppressed += suppressed
+            self._changes += len(changes)
+            if changes:
+                self._values.update(changes)
+                self._pending.update(changes)
+                self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection state and traffic counters."""
+        with self._cond:
+            return {
+                "connected": self._connected,
+                "connects": self._connects,
+                "snapshots": self._snapshots,
+                "changes": self._changes,
+                "suppressed": self._suppressed,
+                "pending": len(self._pending),
+                "published": self._published,
+                "batches": self._batches,
+                "bytes_sent": self._bytes_sent,
+            }
+
+    def _run(self) -> None:
+        """Connect, run sessions and reconnect with backoff until stopped."""
+        backoff = RECONNECT_MIN_SECONDS
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+            sock = self._connect()
+            if sock is None:
+                with self._cond:
+                    self._cond.wait_for(lambda: not self._running, backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+                continue
+
+            backoff = RECONNECT_MIN_SECONDS
+            try:
+                self._session(sock)
+            except (OSError, MqttError) as e:
+                logger.warning("MQTT connection lost: %s", e)
+            finally:
+                with self._cond:
+                    self._connected = False
+                sock.close()
+
+    def _connect(self) -> Optional[socket.socket]:
+        """Open a connection and complete the CONNECT handshake, or return None."""
+        try:
+            sock = socket.create_connection((self.host, self.port), CONNECT_TIMEOUT_SECONDS)
+        except OSError as e:
+            logger.warning("MQTT broker %s:%d unreachable: %s", self.host, self.port, e)
+            return None
+        try:
+            sock.sendall(connect_packet(
+                self.client_id,
+                self.keepalive,
+                will=(self.status_topic, STATUS_OFFLINE),
+                username=self.username,
+                password=self.password,
+            ))
+            connack = _recv_exact(sock, 4)
+            if connack[0] != _CONNACK or connack[1] != 2:
+                raise MqttError(f"unexpected reply {connack.hex()}")
+            if connack[3] != 0:
+                raise MqttError(f"connection refused (code {connack[3]})")
+        except (OSError, MqttError) as e:
+            logger.warning("MQTT connect to %s:%d failed: %s", self.host, self.port, e)
+            sock.close()
+            return None
+
+        with self._cond:
+            self._connected = True
+            self._connects += 1
+            # Resync every field; the broker may have lost its retained state
+            self._pending = dict(self._values)
+        logger.info("MQTT connected to %s:%d", self.host, self.port)
+        return sock
+
+    def _session(self, sock: socket.socket) -> None:
+        """Send batches and keepalives until stopped or the connection fails."""
+        self._send(sock, publish_packet(self.status_topic, STATUS_ONLINE), 0)
+        last_ping = last_recv = time.monotonic()
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending or not self._running, 1.0
+                )
+                batch, self._pending = self._pending, {}
+                running = self._running
+
+            if batch:
+                data = b"".join(publish_packet(t, p) for t, p in batch.items())
+                try:
+                    self._send(sock, data, len(batch))
+                except OSError:
+                    # Requeue unless a newer value arrived meanwhile
+                    with self._cond:
+                        self._pending = {**batch, **self._pending}
+                    raise
+
+            if not running:
+                self._send(sock, publish_packet(self.status_topic, STATUS_OFFLINE) + DISCONNECT, 0)
+                return
+
+            now = time.monotonic()
+            if select.select([sock], [], [], 0)[0]:
+                if not sock.recv(4096):
+                    raise MqttError("broker closed the connection")
+                last_recv = now
+            if now - last_recv > self.keepalive * 1.5:
+                raise MqttError("broker stopped responding")
+            # Ping on a fixed cadence: the replies prove the broker is alive
+            if now - last_ping >= self.keepalive / 2:
+                self._send(sock, PINGREQ, 0)
+                last_ping = now
+
+    def _send(self, sock: socket.socket, data: bytes, messages: int) -> None:
+        """Write one batch and count it."""
+        sock.sendall(data)
+        with self._cond:
+            self._published += messages
+            self._batches += 1 if messages else 0
+            self._bytes_sent += len(data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise MqttError("connection closed")
+        data += chunk
+    return data
@@ -4,271 +4,1496 @@ HTTP telemetry server for Solax inverter monitoring.
 
 Provides a read-only HTTP interface to live inverter telemetry. The server reads
 from a thread-safe shared state populated by the polling loop; it never contacts
-the inverter directly.
+the inverter directly. Connections are served by an asyncio HTTP/1.1 core on a
+single background thread, with keep-alive, a connection limit, and header,
+idle and write timeouts.
 
 Design: design-9b7e2c4a-component_presentation_server.md
 """
 
 from __future__ import annotations
 
+import asyncio
+import errno
+import hashlib
 import ipaddress
 import json
 import logging
+import math
+import socket
 import threading
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from solax_modbus.data.base import (
+    DAILY_ROLLUP_BUCKET_SECONDS,
+    DAILY_ROLLUP_RETENTION_SECONDS,
+    EXPORT_BATCH_ROWS,
+    EXPORT_TABLES,
+    ROLLUP_BUCKET_SECONDS,
+    STORED_METRICS,
+    TIER_DAILY,
+    TIER_ROLLUP,
+    HistoryColumns,
+)
+from solax_modbus.presentation.admission import ROUTE_RETRY_AFTER_SECONDS, AdmissionControl
+from solax_modbus.presentation.allowlist import Allowlist, IPNetwork
+from solax_modbus.presentation.assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    STATIC_PREFIX,
+    DashboardAssets,
+)
+from solax_modbus.presentation.compression import CompressedVariants, negotiate_encoding
+from solax_modbus.presentation.export import (
+    EXPORT_CONTENT_TYPES,
+    FORMAT_CSV,
+    LAST_CHUNK,
+    chunk,
+    encode_batch,
+    encode_header,
+)
+from solax_modbus.presentation.history_format import (
+    BINARY_CONTENT_TYPE,
+    FORMAT_BINARY,
+    FORMAT_COLUMNAR,
+    FORMAT_ROWS,
+    HISTORY_FORMATS,
+    MAX_POINTS,
+    clip,
+    downsample,
+    encode_binary,
+    encode_columnar,
+    encode_rows,
+    group_width,
+)
+from solax_modbus.presentation.metrics import RequestMetrics
 
 logger = logging.getLogger(__name__)
 
 # Default HTTP port for telemetry server (non-privileged, avoids common conflict)
 DEFAULT_HTTP_PORT: int = 8181
 
-# Default RFC 1918 private networks plus link-local (USB-gadget direct path)
-DEFAULT_ALLOWED_NETWORKS: List[ipaddress.IPv4Network] = [
+# Default RFC 1918 private networks plus link-local (USB-gadget direct path),
+# and their IPv6 counterparts: unique local (ULA) and link-local
+DEFAULT_ALLOWED_NETWORKS: List[IPNetwork] = [
     ipaddress.IPv4Network("10.0.0.0/8"),
     ipaddress.IPv4Network("172.16.0.0/12"),
     ipaddress.IPv4Network("192.168.0.0/16"),
     ipaddress.IPv4Network("169.254.0.0/16"),
+    ipaddress.IPv6Network("fc00::/7"),
+    ipaddress.IPv6Network("fe80::/10"),
 ]
 
+# Connection handling limits
+DEFAULT_MAX_CONNECTIONS: int = 512  # Open connections (keep-alive and SSE included)
+DEFAULT_WORKERS: int = 2  # Threads for store queries and compression
+LISTEN_BACKLOG: int = 128
+HEADER_TIMEOUT_SECONDS: float = 10.0  # Request head must arrive within this
+KEEPALIVE_TIMEOUT_SECONDS: float = 30.0  # Idle time allowed between requests
+WRITE_TIMEOUT_SECONDS: float = 10.0  # Clients not reading for this long are dropped
+MAX_HEADER_LINE_BYTES: int = 8192
+MAX_HEADER_FIELDS: int = 64
+SHUTDOWN_TIMEOUT_SECONDS: float = 3.0
+
+_OVERLOAD_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 19\r\n"
+    b"Retry-After: 5\r\n"
+    b"Connection: close\r\n\r\n"
+    b"Service Unavailable"
+)
+
+# Server-Sent Events stream settings
+SSE_HEARTBEAT_SECONDS: float = 15.0  # Comment line sent when idle (keeps proxies open)
+SSE_RETRY_MS: int = 5000  # Client reconnect delay advertised in the stream
+SSE_BACKLOG: int = 32  # Recent events kept for Last-Event-ID resume
+
+# History routes: default metrics and rollup window (overridable per request)
+HISTORY_METRICS: Tuple[str, ...] = (
+    "pv_power", "battery_power", "battery_soc", "grid_power_total",
+)
+HISTORY_WINDOW_SECONDS: int = 30 * 24 * 3600
+HISTORY_CACHE_ENTRIES: int = 64  # Encoded bodies kept across parameter sets
+
+# Served routes (per-route metrics are kept for these)
+ROUTES: Tuple[str, ...] = (
+    "/",
+    "/api/telemetry",
+    "/api/history",
+    "/api/history/12mo",
+    "/api/stream",
+    "/api/stats",
+    "/api/export",
+    STATIC_PREFIX,
+)
+
+# Long-poll /api/telemetry?after=<version> settings
+LONG_POLL_TIMEOUT_SECONDS: float = 30.0  # Default wait when no timeout= is given
+LONG_POLL_MAX_SECONDS: float = 60.0  # Upper bound on a client-requested wait
+
+
+class Snapshot(NamedTuple):
+    """
+    Immutable telemetry snapshot published by StateHolder.
+
+    Attributes:
+        version: Monotonic snapshot number (0 = nothing published yet).
+        data: Read-only view of the telemetry dictionary.
+        encoded: Compact JSON encoding of data, produced once at publish.
+        ts: Publish time (epoch seconds).
+    """
+
+    version: int
+    data: Mapping[str, Any]
+    encoded: bytes
+    ts: float
+
+
+EMPTY_SNAPSHOT = Snapshot(0, MappingProxyType({}), b"{}", 0.0)
+
+# Snapshot subscriber: called with each new Snapshot after set()
+SnapshotCallback = Callable[[Snapshot], None]
+
+
+class HistoryQuery(NamedTuple):
+    """
+    Series selection of a history request.
+
+    Attributes:
+        metrics: Metrics to return, in response order.
+        start: Oldest bucket_ts wanted (None = the tier's retention window).
+        end: Buckets at or after this are omitted (None = up to now).
+        points: Point budget per series, e.g. the chart width in pixels
+            (None = no downsampling).
+    """
+
+    metrics: Tuple[str, ...]
+    start: Optional[int]
+    end: Optional[int]
+    points: Optional[int]
+
+
+DEFAULT_HISTORY_QUERY = HistoryQuery(HISTORY_METRICS, None, None, None)
+
 
 class StateHolder:
     """
     Thread-safe holder for the latest telemetry snapshot.
 
     The Application domain instantiates this class and shares it between the
-    polling loop (writer) and the HTTP server (reader). All access is guarded
-    by a single lock.
+    polling loop (writer) and the HTTP server (reader). set() builds an
+    immutable Snapshot (read-only data plus pre-encoded JSON) and swaps it in
+    as a single reference assignment, so readers take the current snapshot
+    without copying or locking. Subscribers are notified, outside the lock,
+    on the setting thread; threads may instead block in wait() on the
+    holder's condition variable until a newer snapshot is published.
     """
 
     def __init__(self) -> None:
-        """Initialize with an empty snapshot and a lock."""
-        self._lock = threading.Lock()
-        self._snapshot: Dict[str, Any] = {}
+        """Initialize with an empty snapshot and a condition variable."""
+        self._lock = threading.Condition()
+        self._current: Snapshot = EMPTY_SNAPSHOT
+        self._subscribers: List[SnapshotCallback] = []
+
+    @property
+    def version(self) -> int:
+        """Return the version of the current snapshot."""
+        return self._current.version
 
-    def get(self) -> Dict[str, Any]:
+    def snapshot(self) -> Snapshot:
+        """
+        Return the current immutable snapshot.
+
+        Returns:
+            The Snapshot reference itself; safe to share, never mutated.
         """
-        Return a copy of the most recent telemetry snapshot.
+        return self._current
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> Snapshot:
+        """
+        Block until the current snapshot's version differs from after.
+
+        A version other than after is returned at once, including one lower
+        than after (a cursor held across a restart). Waits on the condition
+        variable set() notifies; no polling.
+
+        Args:
+            after: Version the caller already holds.
+            timeout: Maximum seconds to wait (None = indefinitely).
 
         Returns:
-            Shallow copy of the snapshot dictionary.
+            The current snapshot; its version equals after on timeout.
         """
         with self._lock:
-            return self._snapshot.copy()
+            self._lock.wait_for(lambda: self._current.version != after, timeout)
+            return self._current
+
+    def subscribe(self, callback: SnapshotCallback) -> None:
+        """
+        Register a callback invoked with each new Snapshot after set().
+
+        Args:
+            callback: Must not block; exceptions are logged and ignored.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: SnapshotCallback) -> None:
+        """Remove a callback registered with subscribe(); unknown ones are ignored."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def get(self) -> Mapping[str, Any]:
+        """
+        Return the most recent telemetry data.
+
+        Returns:
+            Read-only view of the current snapshot's dictionary (no copy).
+        """
+        return self._current.data
 
     def set(self, data: Dict[str, Any]) -> None:
         """
-        Replace the telemetry snapshot.
+        Publish a new telemetry snapshot.
+
+        Copies data once and encodes it to JSON before taking the lock; the
+        lock only orders versions and the reference swap.
 
         Args:
             data: New telemetry dictionary from poll_inverter().
         """
+        frozen = dict(data)
+        try:
+            encoded = json.dumps(frozen, separators=(",", ":")).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning("Snapshot field not JSON-serializable, using str(): %s", e)
+            encoded = json.dumps(frozen, separators=(",", ":"), default=str).encode("utf-8")
+        view = MappingProxyType(frozen)
+
         with self._lock:
-            self._snapshot = data.copy()
+            snapshot = Snapshot(self._current.version + 1, view, encoded, time.time())
+            self._current = snapshot
+            subscribers = list(self._subscribers)
+            self._lock.notify_all()
+
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error("Snapshot subscriber failed: %s", e, exc_info=True)
 
 
-class TelemetryRequestHandler(BaseHTTPRequestHandler):
+class TelemetryBroadcaster:
     """
-    HTTP request handler for telemetry endpoints.
+    Fan-out of telemetry snapshots to Server-Sent Events subscribers.
+
+    Owned by the server's event loop: publish() and wait() must run on the
+    loop thread (TelemetryServer marshals StateHolder callbacks onto it).
+    Each snapshot's pre-encoded JSON is framed once as an SSE event (id =
+    snapshot version) and kept in a short backlog, from which every stream
+    handler reads. Clients resuming with Last-Event-ID receive the events
+    they missed, or the latest snapshot if the gap is outside the backlog.
+    """
+
+    def __init__(self, backlog: int = SSE_BACKLOG) -> None:
+        """
+        Initialize an empty backlog.
+
+        Args:
+            backlog: Number of recent events retained for resume.
+        """
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=max(backlog, 1))
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._long_polls = 0
+        self._closed = False
+
+    def publish(self, snapshot: Snapshot) -> None:
+        """
+        Frame a snapshot as an SSE event and wake all subscribers.
+
+        Args:
+            snapshot: Published snapshot; its version is the event id.
+        """
+        event = b"id: %d\nevent: telemetry\ndata: %s\n\n" % (
+            snapshot.version,
+            snapshot.encoded,
+        )
+        self._events.append((snapshot.version, event))
+        self._wake()
+
+    async def wait(
+        self, last_id: Optional[int], timeout: float
+    ) -> Optional[List[Tuple[int, bytes]]]:
+        """
+        Wait until events newer than last_id exist, or timeout.
+
+        Args:
+            last_id: Id of the last event the client holds (None = none).
+            timeout: Seconds to wait before returning an empty list.
+
+        Returns:
+            List of (id, event) pairs, empty on timeout, or None once closed.
+        """
+        while True:
+            if self._closed:
+                return None
+            events = self._after(last_id)
+            if events:
+                return events
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+    async def wait_newer(self, version: int, timeout: float) -> bool:
+        """
+        Wait until a snapshot newer than version has been published.
+
+        Backs long-polling: the waiter is a suspended coroutine woken by
+        publish(), the loop-side counterpart of StateHolder.wait().
+
+        Args:
+            version: Snapshot version the client already holds.
+            timeout: Seconds to wait.
+
+        Returns:
+            True if a newer version is available, False on timeout or once
+            closed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self._long_polls += 1
+        try:
+            while not self._closed:
+                latest = self._events[-1][0] if self._events else 0
+                if latest > version:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+            return False
+        finally:
+            self._long_polls -= 1
+
+    def _after(self, last_id: Optional[int]) -> List[Tuple[int, bytes]]:
+        """Return backlog events to send to a client holding last_id."""
+        if not self._events:
+            return []
+        newest = self._events[-1][0]
+        oldest = self._events[0][0]
+        # Unknown position (new client, server restart, gap): latest snapshot only
+        if last_id is None or last_id > newest or last_id < oldest - 1:
+            return [self._events[-1]]
+        return [event for event in self._events if event[0] > last_id]
+
+    def _wake(self) -> None:
+        """Release current waiters; later waiters get a fresh event."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def attach(self) -> None:
+        """Count a connected stream."""
+        self._subscribers += 1
+
+    def detach(self) -> None:
+        """Uncount a disconnected stream."""
+        self._subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return stream and long-poll counts and the latest event id."""
+        return {
+            "subscribers": self._subscribers,
+            "long_polls": self._long_polls,
+            "last_event_id": self._events[-1][0] if self._events else None,
+        }
+
+    def close(self) -> None:
+        """Release every waiting stream handler. Idempotent."""
+        self._closed = True
+        self._wake()
+
+
+class HistoryCache:
+    """
+    Pre-encoded history response bodies keyed by path and store generation.
+
+    A body is encoded once per history generation (see
+    StoreBackend.history_generation) and served from memory until the
+    relevant rollup or prune advances it. Each entry carries a strong ETag
+    derived from the body, so it stays valid across restarts, and memoizes
+    its compressed variants.
+    """
+
+    def __init__(self, max_entries: int = HISTORY_CACHE_ENTRIES) -> None:
+        """
+        Initialize an empty cache and a lock.
+
+        Args:
+            max_entries: Bodies kept; the oldest is evicted beyond this
+                (requests differing in format, metrics or points are
+                separate entries).
+        """
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, CompressedVariants, str]] = {}
+        self.max_entries = max(max_entries, 1)
+
+    def lookup(
+        self, path: str, generation: int
+    ) -> Optional[Tuple[CompressedVariants, str]]:
+        """
+        Return the cached (variants, etag) for path if still current.
+
+        Args:
+            path: Request path the body is served at.
+            generation: Current store generation of the path's history tier.
+
+        Returns:
+            (variants, etag), or None on a miss or a stale generation.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == generation:
+            return entry[1], entry[2]
+        return None
+
+    def put(
+        self, path: str, generation: int, body: bytes
+    ) -> Tuple[CompressedVariants, str]:
+        """
+        Cache a freshly encoded body.
+
+        Args:
+            path: Request path the body is served at.
+            generation: Store generation the body was encoded at.
+            body: Encoded identity body.
+
+        Returns:
+            (variants, etag) tuple; etag identifies the identity body.
+        """
+        variants = CompressedVariants(body)
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._entries.pop(path, None)
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[path] = (generation, variants, etag)
+        return variants, etag
+
+
+class Request:
+    """One parsed HTTP request head."""
+
+    def __init__(
+        self, method: str, path: str, version: str, headers: Dict[str, str]
+    ) -> None:
+        """
+        Initialize from the parsed request line and header fields.
+
+        Args:
+            method: Request method (e.g. GET).
+            path: Request target as sent.
+            version: HTTP version string (HTTP/1.0 or HTTP/1.1).
+            headers: Header fields keyed by lower-case name.
+        """
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        target = urlsplit(path)
+        self.route = target.path
+        self.query: Dict[str, List[str]] = parse_qs(target.query)
+
+    @property
+    def keep_alive(self) -> bool:
+        """Return True if the client wants the connection kept open."""
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in connection
+        return "keep-alive" in connection
+
+
+class HttpError(Exception):
+    """Malformed or unacceptable request; answered with status, then closed."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize with the response status and plain-text message."""
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class TelemetryRequestHandler:
+    """
+    HTTP/1.1 connection handler for telemetry endpoints.
+
+    One instance serves one client connection on the server's event loop,
+    handling requests in sequence while the client keeps the connection
+    alive. Store queries and large compressions run on the server's bounded
+    worker pool so the loop never blocks on the store lock.
 
     Routes:
-        /               - Static dashboard HTML
-        /api/telemetry  - Current telemetry snapshot as JSON
-        /api/history    - Downsampled rollup series as JSON (30-day window)
-        /api/history/12mo - Daily rollup series as JSON (365-day window)
+        /               - Dashboard HTML shell (revalidated by ETag)
+        /static/<name>.<hash>.<ext> - Dashboard CSS/JS (immutable)
+        /api/telemetry  - Current telemetry snapshot as JSON; with ?after=<version>
+                          waits (long-poll) for a newer snapshot
+        /api/history    - Downsampled rollup series as JSON (30-day window);
+                          with ?since=<bucket_ts> only newer buckets (delta)
+        /api/history/12mo - Daily rollup series as JSON (365-day window);
+                          ?since= as above; both take ?format=columnar|binary
+                          and ?metrics=, ?start=, ?end=, ?points=
+        /api/stream     - Telemetry snapshots as Server-Sent Events
+        /api/stats      - Runtime metrics (storage writer queue, streams,
+                          per-route requests and latency) as JSON
+        /api/export     - Rows of raw, rollup or daily_rollup as chunked CSV
+                          or NDJSON (?table=, ?format=, ?start=, ?end=)
         Other paths     - 404 Not Found
         Disallowed IP   - 403 Forbidden
+        Other methods   - 405 Method Not Allowed
+        Client over its request rate - 429 Too Many Requests (Retry-After)
+        History routes saturated     - 503 Service Unavailable (Retry-After)
     """
 
-    # Suppress default stderr logging
-    def log_message(self, format: str, *args: Any) -> None:
-        """Route HTTP logs through the module logger."""
-        logger.debug("HTTP %s - %s", self.address_string(), format % args)
+    def __init__(
+        self,
+        server: TelemetryServer,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """
+        Bind the handler to one accepted connection.
+
+        Args:
+            server: Owning TelemetryServer (routes read its shared context).
+            reader: Connection input stream.
+            writer: Connection output stream.
+        """
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        peer = writer.get_extra_info("peername") or ("", 0)
+        self.client_address: Tuple[str, int] = (peer[0], peer[1])
+        self.request: Optional[Request] = None
+        self._close_after = False
+        self._status = 0
+        self._bytes_sent = 0
+        self._store_wait = 0.0
+        # Set by handlers that hold the response open or stream it, whose
+        # duration is not a latency
+        self._held = False
+
+    @property
+    def path(self) -> str:
+        """Return the current request target (including any query)."""
+        return self.request.path if self.request is not None else ""
+
+    @property
+    def route(self) -> str:
+        """Return the current request path without the query string."""
+        return self.request.route if self.request is not None else ""
+
+    def query_param(self, name: str) -> Optional[str]:
+        """Return the first value of a query parameter, or None if absent."""
+        values = self.request.query.get(name) if self.request is not None else None
+        return values[0] if values else None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Return the current request headers (lower-case names)."""
+        return self.request.headers if self.request is not None else {}
+
+    async def handle(self) -> None:
+        """Serve requests on this connection until close, timeout or error."""
+        try:
+            first = True
+            while True:
+                timeout = HEADER_TIMEOUT_SECONDS if first else KEEPALIVE_TIMEOUT_SECONDS
+                try:
+                    self.request = await self._read_request(timeout)
+                except HttpError as e:
+                    self._close_after = True
+                    await self._send_error(e.status, e.message)
+                    return
+                if self.request is None:
+                    return
+                first = False
+                self._close_after = not self.request.keep_alive
+
+                await self._dispatch()
+                if self._close_after:
+                    return
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug("HTTP %s - connection dropped: %r", self.client_address[0], e)
+        finally:
+            self.writer.close()
+
+    async def _read_request(self, idle_timeout: float) -> Optional[Request]:
+        """
+        Read one request head.
+
+        Args:
+            idle_timeout: Seconds to wait for the request line to start.
+
+        Returns:
+            Parsed Request, or None if the client closed or went idle.
+
+        Raises:
+            HttpError: Malformed request, oversized head or slow client.
+        """
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HttpError(431, "Request Header Fields Too Large")
+        if not line:
+            return None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + HEADER_TIMEOUT_SECONDS
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+            raise HttpError(400, "Bad Request")
+        method, path, version = parts
 
-    def do_GET(self) -> None:
-        """Handle GET requests with IP filtering and routing."""
+        headers: Dict[str, str] = {}
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HttpError(408, "Request Timeout")
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), remaining)
+            except asyncio.TimeoutError:
+                raise HttpError(408, "Request Timeout")
+            except (ValueError, asyncio.LimitOverrunError):
+                raise HttpError(431, "Request Header Fields Too Large")
+            if not line:
+                return None
+            if line in (b"\r\n", b"\n"):
+                break
+            if len(headers) >= MAX_HEADER_FIELDS:
+                raise HttpError(431, "Request Header Fields Too Large")
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise HttpError(400, "Bad Request")
+            headers[name.strip().lower()] = value.strip()
+
+        # Read-only API: request bodies are not accepted
+        if headers.get("content-length", "0") not in ("", "0") or "transfer-encoding" in headers:
+            raise HttpError(413, "Payload Too Large")
+        return Request(method, path, version, headers)
+
+    async def _dispatch(self) -> None:
+        """Route the current request, answering 5xx on unexpected errors."""
+        started = time.monotonic()
+        self._status = 0
+        self._bytes_sent = 0
+        self._store_wait = 0.0
+        self._held = False
         try:
+            if self.request.method != "GET":
+                self._close_after = True
+                await self._send_error(405, "Method Not Allowed", {"Allow": "GET"})
+                return
+
             # Check source IP against allowlist
             if not self._client_allowed():
                 logger.warning(
                     "Rejected request from disallowed IP: %s", self.client_address[0]
                 )
-                self._send_error(403, "Forbidden")
+                await self._send_error(403, "Forbidden")
                 return
 
-            # Route request
-            if self.path == "/":
-                self._serve_dashboard()
-            elif self.path == "/api/telemetry":
-                self._serve_telemetry()
-            elif self.path == "/api/history":
-                self._serve_history()
-            elif self.path == "/api/history/12mo":
-                self._serve_history_12mo()
-            else:
-                self._send_error(404, "Not Found")
+            # Per-client rate, then the route's concurrency limit
+            admission: Optional[AdmissionControl] = getattr(self.server, "admission", None)
+            limiter = None
+            if admission is not None:
+                wait = admission.clients.check(self.client_address[0])
+                if wait:
+                    await self._send_error(
+                        429, "Too Many Requests", {"Retry-After": str(math.ceil(wait))}
+                    )
+                    return
+                limiter = admission.limiter(self.route)
+            if limiter is not None and not await limiter.acquire():
+                await self._send_error(
+                    503,
+                    "Service Unavailable",
+                    {"Retry-After": str(ROUTE_RETRY_AFTER_SECONDS)},
+                )
+                return
 
+            try:
+                await self._route()
+            finally:
+                if limiter is not None:
+                    limiter.release()
+
+        except (asyncio.TimeoutError, ConnectionError):
+            raise
         except Exception as e:
             logger.error("Unhandled error in request handler: %s", e, exc_info=True)
-            self._send_error(500, "Internal Server Error")
+            self._close_after = True
+            await self._send_error(500, "Internal Server Error")
+        finally:
+            elapsed = time.monotonic() - started
+            metrics: Optional[RequestMetrics] = getattr(self.server, "metrics", None)
+            if metrics is not None:
+                # Long-polls, event streams and exports last as long as the
+                # client waits or reads; they are counted but not timed
+                metrics.record(
+                    STATIC_PREFIX if self.route.startswith(STATIC_PREFIX) else self.route,
+                    self._status,
+                    self._bytes_sent,
+                    None if self._held else elapsed,
+                    self._store_wait,
+                )
+            logger.debug(
+                'HTTP %s - "%s %s" %d %.1f ms (store lock %.1f ms)',
+                self.client_address[0],
+                self.request.method,
+                self.path,
+                self._status,
+                elapsed * 1000,
+                self._store_wait * 1000,
+            )
+
+    async def _route(self) -> None:
+        """Serve the current request by route (see ROUTES)."""
+        route = self.route
+        if route == "/":
+            await self._serve_dashboard()
+        elif route == "/api/telemetry":
+            await self._serve_telemetry()
+        elif route == "/api/history":
+            await self._serve_history()
+        elif route == "/api/history/12mo":
+            await self._serve_history_12mo()
+        elif route == "/api/stream":
+            await self._serve_stream()
+        elif route == "/api/stats":
+            await self._serve_stats()
+        elif route == "/api/export":
+            await self._serve_export()
+        elif route.startswith(STATIC_PREFIX):
+            await self._serve_static()
+        else:
+            await self._send_error(404, "Not Found")
 
     def _client_allowed(self) -> bool:
-        """Check if the client IP is in any allowed network."""
-        try:
-            client_ip = ipaddress.IPv4Address(self.client_address[0])
-            allowed_networks = getattr(self.server, "allowed_networks", [])
-            return any(client_ip in network for network in allowed_networks)
-        except (ValueError, TypeError) as e:
-            logger.debug("Could not parse client address: %s", e)
-            return False
+        """Check if the client IP is in any allowed network (IPv4 or IPv6)."""
+        allowlist: Optional[Allowlist] = getattr(self.server, "allowlist", None)
+        return allowlist is not None and allowlist.allows(self.client_address[0])
 
-    def _serve_dashboard(self) -> None:
-        """Serve the static dashboard HTML."""
-        template_path: Path = getattr(self.server, "template_path", None)
-        if template_path is None or not template_path.exists():
-            logger.error("Dashboard template not found: %s", template_path)
-            self._send_error(500, "Dashboard template not found")
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking call (store query, compression) on the worker pool.
+
+        Time the call spent waiting for the store lock is added to the
+        request's store wait.
+        """
+        loop = asyncio.get_running_loop()
+        store = getattr(self.server, "store", None)
+        result, wait = await loop.run_in_executor(
+            self.server.executor, _call_timed, store, func, args
+        )
+        self._store_wait += wait
+        return result
+
+    async def _serve_dashboard(self) -> None:
+        """Serve the dashboard HTML shell loaded at start, revalidated by ETag."""
+        dashboard: Optional[DashboardAssets] = getattr(self.server, "dashboard", None)
+        if dashboard is None:
+            await self._send_error(500, "Dashboard template not found")
             return
+        shell = dashboard.shell
+        await self._send_variants(
+            200, shell.content_type, shell.variants, etag=shell.etag
+        )
 
-        try:
-            content = template_path.read_text(encoding="utf-8")
-            self._send_response(200, "text/html", content.encode("utf-8"))
-        except Exception as e:
-            logger.error("Error reading dashboard template: %s", e, exc_info=True)
-            self._send_error(500, "Error reading dashboard")
+    async def _serve_static(self) -> None:
+        """Serve a hashed dashboard asset with a cache lifetime of a year."""
+        dashboard: Optional[DashboardAssets] = getattr(self.server, "dashboard", None)
+        asset = dashboard.lookup(self.route) if dashboard is not None else None
+        if asset is None:
+            await self._send_error(404, "Not Found")
+            return
+        await self._send_variants(
+            200,
+            asset.content_type,
+            asset.variants,
+            headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+        )
 
-    def _serve_telemetry(self) -> None:
-        """Serve the current telemetry snapshot as JSON."""
+    async def _serve_telemetry(self) -> None:
+        """
+        Serve the current telemetry snapshot's pre-encoded JSON.
+
+        With ?after=<version>, waits until a snapshot other than that version
+        is published, or until ?timeout= seconds (default
+        LONG_POLL_TIMEOUT_SECONDS, capped at LONG_POLL_MAX_SECONDS) elapse, and
+        then serves the current snapshot. The X-Telemetry-Version header
+        carries the version to send as the next after=; on timeout it is
+        unchanged.
+        """
         state: StateHolder = getattr(self.server, "state", None)
         if state is None:
-            self._send_error(500, "State holder not configured")
+            await self._send_error(500, "State holder not configured")
             return
 
+        after = self.query_param("after")
+        if after is not None:
+            try:
+                version = int(after)
+                timeout = float(self.query_param("timeout") or LONG_POLL_TIMEOUT_SECONDS)
+            except ValueError:
+                await self._send_error(400, "Invalid after or timeout parameter")
+                return
+            timeout = min(max(timeout, 0.0), LONG_POLL_MAX_SECONDS)
+
+            broadcaster: Optional[TelemetryBroadcaster] = getattr(
+                self.server, "broadcaster", None
+            )
+            # A cursor ahead of the state (held across a restart) is answered at once
+            if broadcaster is not None and state.version == version:
+                self._held = True
+                await broadcaster.wait_newer(version, timeout)
+
+        snapshot = state.snapshot()
+        await self._send_variants(
+            200,
+            "application/json",
+            self.server.snapshot_variants(snapshot),
+            headers={"X-Telemetry-Version": str(snapshot.version)},
+        )
+
+    async def _serve_stream(self) -> None:
+        """
+        Stream telemetry snapshots as Server-Sent Events until disconnect.
+
+        Sends the latest snapshot (or the events missed since Last-Event-ID),
+        then each new snapshot as it is set, with a comment heartbeat when
+        idle. An idle stream costs one suspended coroutine; a client that
+        stops reading is dropped once a write stalls past the write timeout.
+        """
+        broadcaster: Optional[TelemetryBroadcaster] = getattr(
+            self.server, "broadcaster", None
+        )
+        if broadcaster is None:
+            await self._send_error(503, "Stream not available")
+            return
+
+        last_id: Optional[int] = None
         try:
-            snapshot = state.get()
-            content = json.dumps(snapshot, indent=2)
-            self._send_response(200, "application/json", content.encode("utf-8"))
-        except (TypeError, ValueError) as e:
-            logger.error("JSON serialization failed: %s", e, exc_info=True)
-            self._send_error(500, "Serialization error")
+            last_id = int(self.headers.get("last-event-id", ""))
+        except ValueError:
+            pass
+
+        # The stream has no length; it ends when the connection closes
+        self._close_after = True
+        self._held = True
+        await self._write_head(200, {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
+        broadcaster.attach()
+        try:
+            await self._write(f"retry: {SSE_RETRY_MS}\n\n".encode("ascii"))
+            while True:
+                events = await broadcaster.wait(last_id, SSE_HEARTBEAT_SECONDS)
+                if events is None:
+                    break
+                if events:
+                    await self._write(b"".join(event for _, event in events))
+                    last_id = events[-1][0]
+                else:
+                    await self._write(b": keepalive\n\n")
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug("SSE client %s disconnected: %r", self.client_address[0], e)
+        finally:
+            broadcaster.detach()
+
+    async def _serve_cached(
+        self,
+        tier: str,
+        key: str,
+        content_type: str,
+        encode: Callable[[], bytes],
+    ) -> None:
+        """
+        Serve a pre-encoded history body with ETag revalidation.
 
-    def _serve_history(self) -> None:
-        """Serve downsampled rollup series as JSON for all primary metrics."""
-        # Metrics to include in the history response
-        metrics = ("pv_power", "battery_power", "battery_soc", "grid_power_total")
-        # 30-day window in seconds
-        window_seconds = 30 * 24 * 3600
+        Bodies are re-encoded only when the store's generation for tier has
+        advanced; an If-None-Match hit is answered 304 without touching the
+        store or the serializer.
 
+        Args:
+            tier: History tier backing the path (TIER_ROLLUP or TIER_DAILY).
+            key: Cache key (route plus any parameters that change the body).
+            content_type: Content-Type of the encoded body.
+            encode: Builds the body on a cache miss (runs on the pool).
+        """
         store = getattr(self.server, "store", None)
+        cache: Optional[HistoryCache] = getattr(self.server, "history_cache", None)
+        generation = store.history_generation(tier) if store is not None else 0
 
-        # Build the response object with all metrics
-        result: Dict[str, List[Dict[str, Any]]] = {}
+        cached = cache.lookup(key, generation) if cache is not None else None
+        if cached is None:
+            try:
+                body = await self._run_blocking(encode)
+            except (TypeError, ValueError) as e:
+                logger.error("History serialization failed: %s", e, exc_info=True)
+                await self._send_error(500, "Serialization error")
+                return
+            if cache is None:
+                await self._send_variants(200, content_type, CompressedVariants(body))
+                return
+            cached = cache.put(key, generation, body)
 
-        for metric in metrics:
-            if store is None:
-                result[metric] = []
-            else:
-                try:
-                    result[metric] = store.query_history(metric, window_seconds)
-                except ValueError as e:
-                    logger.warning("query_history failed for %s: %s", metric, e)
-                    result[metric] = []
-                except Exception as e:
-                    logger.error(
-                        "Unexpected error in query_history for %s: %s",
-                        metric,
-                        e,
-                        exc_info=True,
-                    )
-                    result[metric] = []
+        variants, etag = cached
+        await self._send_variants(200, content_type, variants, etag=etag)
+
+    def _etag_matches(self, etag: str) -> bool:
+        """Check the If-None-Match request header against etag."""
+        header = self.headers.get("if-none-match")
+        if not header:
+            return False
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == "*" or candidate == etag:
+                return True
+        return False
+
+    async def _serve_history(self) -> None:
+        """Serve downsampled rollup series for all primary metrics (30-day window)."""
+        await self._serve_series(TIER_ROLLUP)
+
+    async def _serve_history_12mo(self) -> None:
+        """Serve daily rollup series for all primary metrics (365-day window)."""
+        await self._serve_series(TIER_DAILY)
+
+    async def _serve_series(self, tier: str) -> None:
+        """
+        Serve a history route in full (cached) or as a delta after ?since=.
+
+        ?format= selects rows (default), columnar or binary (see
+        history_format); ?quantize=1 rounds columnar values to integers.
+        ?metrics=, ?start=, ?end= and ?points= select the series and range
+        and downsample them to a point budget (see HistoryQuery). Requests
+        without start/end are cached per parameter set; ranged ones are
+        encoded per request.
+
+        Args:
+            tier: History tier backing the route.
+        """
+        fmt = self.query_param("format") or FORMAT_ROWS
+        quantize = self.query_param("quantize") in ("1", "true")
+        since = self.query_param("since")
+        if fmt not in HISTORY_FORMATS:
+            await self._send_error(400, "Invalid format parameter")
+            return
+        query = self._parse_history_query()
+        if query is None:
+            await self._send_error(400, "Invalid metrics, start, end or points parameter")
+            return
+        content_type = BINARY_CONTENT_TYPE if fmt == FORMAT_BINARY else "application/json"
+
+        if since is None and query.start is None and query.end is None:
+            key = self.route
+            if fmt != FORMAT_ROWS or query != DEFAULT_HISTORY_QUERY:
+                key += f"?{fmt}:{quantize:d}:{','.join(query.metrics)}:{query.points}"
+            await self._serve_cached(
+                tier, key, content_type,
+                lambda: self._encode_series(tier, None, fmt, quantize, query)[0],
+            )
+            return
 
         try:
-            content = json.dumps(result)
-            self._send_response(200, "application/json", content.encode("utf-8"))
+            since_ts = int(since) if since is not None else None
+        except ValueError:
+            await self._send_error(400, "Invalid since parameter")
+            return
+        try:
+            body, cursor = await self._run_blocking(
+                self._encode_series, tier, since_ts, fmt, quantize, query
+            )
         except (TypeError, ValueError) as e:
-            logger.error("History JSON serialization failed: %s", e, exc_info=True)
-            self._send_error(500, "Serialization error")
+            logger.error("History serialization failed: %s", e, exc_info=True)
+            await self._send_error(500, "Serialization error")
+            return
+        headers = {"X-History-Cursor": str(cursor)} if cursor is not None else None
+        await self._send_variants(200, content_type, CompressedVariants(body), headers=headers)
+
+    def _parse_history_query(self) -> Optional[HistoryQuery]:
+        """
+        Parse ?metrics=, ?start=, ?end= and ?points= of the current request.
+
+        Returns:
+            HistoryQuery (defaults for absent parameters), or None if a value
+            is malformed, names an unknown metric or gives an empty range.
+        """
+        try:
+            metrics = self.query_param("metrics")
+            selected = (
+                tuple(m for m in metrics.split(",") if m) if metrics else HISTORY_METRICS
+            )
+            start = self.query_param("start")
+            end = self.query_param("end")
+            points = self.query_param("points")
+            query = HistoryQuery(
+                selected,
+                int(start) if start is not None else None,
+                int(end) if end is not None else None,
+                min(max(int(points), 1), MAX_POINTS) if points is not None else None,
+            )
+        except ValueError:
+            return None
+
+        if not query.metrics or any(m not in STORED_METRICS for m in query.metrics):
+            return None
+        if query.start is not None and query.end is not None and query.end <= query.start:
+            return None
+        return query
+
+    def _encode_series(
+        self,
+        tier: str,
+        since: Optional[int] = None,
+        fmt: str = FORMAT_ROWS,
+        quantize: bool = False,
+        query: Optional[HistoryQuery] = None,
+    ) -> Tuple[bytes, Optional[int]]:
+        """
+        Query and encode one series per selected metric.
+
+        A full response (since None) holds only stored buckets. A delta holds
+        the stored buckets at or after since, with the currently open bucket
+        (aggregated from the in-memory window) merged in as the last point,
+        plus the since value for the next delta (the "cursor" field, and the
+        X-History-Cursor header for binary bodies). The cursor is the newest
+        stored bucket (or its downsampling group), the only one a later
+        rollup can still change.
+
+        With a point budget the series are downsampled to groups of
+        group_width() over the requested range, keeping each group's min and
+        max; the step of columnar and binary bodies is then the group width.
 
-    def _serve_history_12mo(self) -> None:
-        """Serve daily rollup series as JSON for all primary metrics (365-day window)."""
-        # Metrics to include in the history response
-        metrics = ("pv_power", "battery_power", "battery_soc", "grid_power_total")
+        Args:
+            tier: TIER_ROLLUP (30-day window) or TIER_DAILY (365-day window).
+            since: Delta cursor, or None for the full series.
+            fmt: One of HISTORY_FORMATS.
+            quantize: Round columnar values to integers.
+            query: Metrics, range and point budget (None = defaults).
+
+        Returns:
+            (body, next cursor); the cursor is None for a full response.
+        """
+        query = query or DEFAULT_HISTORY_QUERY
+        daily = tier == TIER_DAILY
+        window_seconds = DAILY_ROLLUP_RETENTION_SECONDS if daily else HISTORY_WINDOW_SECONDS
+        bucket_seconds = DAILY_ROLLUP_BUCKET_SECONDS if daily else ROLLUP_BUCKET_SECONDS
+        name = "query_history_12mo" if daily else "query_history"
+
+        now = int(time.time())
+        end = query.end if query.end is not None else now + bucket_seconds
+        start = query.start if query.start is not None else now - window_seconds
+        step = bucket_seconds
+        if query.points is not None:
+            step = group_width(end - start, query.points, bucket_seconds)
+        # Full default responses keep the store's row series unchanged
+        rows = fmt == FORMAT_ROWS and query == DEFAULT_HISTORY_QUERY
+        lower = start if query.start is not None else None
+        if since is not None:
+            lower = max(lower, since) if lower is not None else since
 
         store = getattr(self.server, "store", None)
 
-        # Build the response object with all metrics
-        result: Dict[str, List[Dict[str, Any]]] = {}
+        # Build the response object with the selected metrics
+        result: Dict[str, Any] = {}
+        stored_last: List[int] = []
 
-        for metric in metrics:
+        for metric in query.metrics:
+            result[metric] = [] if rows else HistoryColumns.empty()
             if store is None:
-                result[metric] = []
-            else:
-                try:
-                    result[metric] = store.query_history_12mo(metric)
-                except ValueError as e:
-                    logger.warning("query_history_12mo failed for %s: %s", metric, e)
-                    result[metric] = []
-                except Exception as e:
-                    logger.error(
-                        "Unexpected error in query_history_12mo for %s: %s",
-                        metric,
-                        e,
-                        exc_info=True,
-                    )
-                    result[metric] = []
+                continue
+            try:
+                if rows and daily:
+                    series = store.query_history_12mo(metric, since=lower)
+                elif rows:
+                    series = store.query_history(metric, window_seconds, since=lower)
+                elif daily:
+                    series = store.query_history_12mo_columns(metric, since=lower)
+                else:
+                    series = store.query_history_columns(metric, window_seconds, since=lower)
+                result[metric] = series
+                if since is None:
+                    continue
+
+                last = (series[-1]["bucket_ts"] if series else None) if rows else (
+                    series.bucket_ts[-1] if series.bucket_ts else None
+                )
+                if last is not None:
+                    stored_last.append(last)
+                live = store.query_live_bucket(metric, bucket_seconds)
+                if live is None or (last is not None and live["bucket_ts"] < last):
+                    continue
+                if rows:
+                    if last == live["bucket_ts"]:
+                        series.pop()
+                    series.append(live)
+                else:
+                    if last == live["bucket_ts"]:
+                        for column in series:
+                            column.pop()
+                    series.append(live["bucket_ts"], live["avg"], live["min"], live["max"])
+            except ValueError as e:
+                logger.warning("%s failed for %s: %s", name, metric, e)
+            except Exception as e:
+                logger.error(
+                    "Unexpected error in %s for %s: %s",
+                    name,
+                    metric,
+                    e,
+                    exc_info=True,
+                )
+
+        if not rows:
+            for metric, columns in result.items():
+                if query.end is not None:
+                    columns = clip(columns, query.end)
+                if step != bucket_seconds:
+                    columns = downsample(columns, step)
+                result[metric] = columns
+
+        cursor: Optional[int] = None
+        extra: Dict[str, Any] = {}
+        if since is not None:
+            cursor = min(stored_last) if stored_last else since
+            if step != bucket_seconds:
+                cursor -= cursor % step
+            extra["cursor"] = cursor
+
+        if fmt == FORMAT_COLUMNAR:
+            return encode_columnar(result, step, quantize, extra), cursor
+        if fmt == FORMAT_BINARY:
+            return encode_binary(result, step), cursor
+        if not rows:
+            return encode_rows(result, extra), cursor
+        result.update(extra)
+        return json.dumps(result).encode("utf-8"), cursor
+
+    async def _serve_stats(self) -> None:
+        """Serve runtime metrics as JSON."""
+        writer = getattr(self.server, "writer", None)
+        broadcaster = getattr(self.server, "broadcaster", None)
+        admission = getattr(self.server, "admission", None)
+        allowlist = getattr(self.server, "allowlist", None)
+        metrics = getattr(self.server, "metrics", None)
+        result: Dict[str, Any] = {
+            "storage_writer": writer.stats() if writer is not None else None,
+            "stream": broadcaster.stats() if broadcaster is not None else None,
+            "http": self.server.connection_stats(),
+            "admission": admission.stats() if admission is not None else None,
+            "allowlist": allowlist.stats() if allowlist is not None else None,
+            "routes": metrics.stats() if metrics is not None else None,
+        }
 
         try:
             content = json.dumps(result)
-            self._send_response(200, "application/json", content.encode("utf-8"))
         except (TypeError, ValueError) as e:
-            logger.error("History 12mo JSON serialization failed: %s", e, exc_info=True)
-            self._send_error(500, "Serialization error")
+            logger.error("Stats JSON serialization failed: %s", e, exc_info=True)
+            await self._send_error(500, "Serialization error")
+            return
+        await self._send_variants(
+            200, "application/json", CompressedVariants(content.encode("utf-8"))
+        )
+
+    async def _serve_export(self) -> None:
+        """
+        Stream one table's rows as chunked CSV or NDJSON.
+
+        Each batch is read from the store on the worker pool and written as
+        one chunk before the next is read, so memory stays at one batch and
+        a slow client paces the export. The export stops, and the store's
+        read connection is closed, as soon as the client disconnects or
+        stops reading. HTTP/1.0 clients get the same body unchunked, ended
+        by closing the connection.
 
-    def _send_response(self, status: int, content_type: str, body: bytes) -> None:
+        Once the 200 head is sent an error can no longer be reported as a
+        status, so a failed export closes the connection without the
+        terminating chunk and the client sees a truncated transfer.
+        """
+        table = self.query_param("table") or "raw"
+        fmt = self.query_param("format") or FORMAT_CSV
+        try:
+            start = self.query_param("start")
+            end = self.query_param("end")
+            start_ts = int(start) if start is not None else None
+            end_ts = int(end) if end is not None else None
+        except ValueError:
+            await self._send_error(400, "Bad Request")
+            return
+        if table not in EXPORT_TABLES or fmt not in EXPORT_CONTENT_TYPES:
+            await self._send_error(400, "Bad Request")
+            return
+
+        store = getattr(self.server, "store", None)
+        if store is None:
+            await self._send_error(503, "Store not available")
+            return
+
+        chunked = self.request.version == "HTTP/1.1"
+        if not chunked:
+            self._close_after = True
+        head = {
+            "Content-Type": EXPORT_CONTENT_TYPES[fmt],
+            "Content-Disposition": f'attachment; filename="{table}.{fmt}"',
+            "Cache-Control": "no-cache",
+        }
+        if chunked:
+            head["Transfer-Encoding"] = "chunked"
+        self._held = True
+        await self._write_head(200, head)
+
+        columns = EXPORT_TABLES[table]
+        frame = chunk if chunked else (lambda data: data)
+        batches = store.export_rows(table, start_ts, end_ts, EXPORT_BATCH_ROWS)
+        rows = 0
+        try:
+            header = encode_header(columns, fmt)
+            if header:
+                await self._write(frame(header))
+            while not self.writer.is_closing():
+                batch = await self._run_blocking(next, batches, None)
+                if batch is None:
+                    if chunked:
+                        await self._write(LAST_CHUNK)
+                    break
+                rows += len(batch)
+                await self._write(frame(encode_batch(columns, batch, fmt)))
+            else:
+                self._close_after = True
+                logger.debug("Export to %s cancelled by client", self.client_address[0])
+        except (asyncio.TimeoutError, ConnectionError):
+            # The response is incomplete; the connection cannot be reused
+            self._close_after = True
+            logger.debug(
+                "Export to %s stopped after %d rows: client gone",
+                self.client_address[0],
+                rows,
+            )
+            raise
+        except Exception as e:
+            # Not re-raised: _dispatch would write a 500 into the body
+            self._close_after = True
+            logger.error(
+                "Export of %s to %s failed after %d rows: %s",
+                table,
+                self.client_address[0],
+                rows,
+                e,
+                exc_info=True,
+            )
+        finally:
+            try:
+                await self._run_blocking(batches.close)
+            except (RuntimeError, ValueError) as e:
+                # Still executing on a worker; it is closed when collected
+                logger.debug("Export reader not closed: %r", e)
+
+    async def _write(self, data: bytes) -> None:
+        """
+        Write and drain, dropping clients that stop reading.
+
+        Raises:
+            asyncio.TimeoutError: The client did not accept data within
+                WRITE_TIMEOUT_SECONDS.
+        """
+        self.writer.write(data)
+        self._bytes_sent += len(data)
+        await asyncio.wait_for(self.writer.drain(), WRITE_TIMEOUT_SECONDS)
+
+    async def _write_head(self, status: int, headers: Dict[str, str]) -> None:
+        """Write a status line and header block (Connection is added here)."""
+        self._status = status
+        lines = [f"HTTP/1.1 {status} {_reason(status)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append("Connection: close" if self._close_after else "Connection: keep-alive")
+        await self._write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_response(
+        self,
+        status: int,
+        content_type: str,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
         """Send an HTTP response with headers and body."""
-        self.send_response(status)
-        self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(body)))
-        self.send_header("Cache-Control", "no-cache")
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _send_error(self, status: int, message: str) -> None:
+        head = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Cache-Control": "no-cache",
+        }
+        head.update(headers or {})
+        await self._write_head(status, head)
+        await self._write(body)
+
+    async def _send_variants(
+        self,
+        status: int,
+        content_type: str,
+        variants: CompressedVariants,
+        etag: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Send the variant of a body matching the request's Accept-Encoding.
+
+        Args:
+            status: HTTP status code.
+            content_type: Content-Type of the uncompressed body.
+            variants: Body with its (memoized) compressed variants.
+            etag: Strong ETag of the identity body; compressed representations
+                get a coding suffix, and a matching If-None-Match yields 304.
+            headers: Extra response headers.
+        """
+        encoding = negotiate_encoding(self.headers.get("accept-encoding"))
+        if variants.ready(encoding):
+            body, applied = variants.select(encoding)
+        else:
+            body, applied = await self._run_blocking(variants.select, encoding)
+
+        head = {"Vary": "Accept-Encoding"}
+        head.update(headers or {})
+        if applied is not None:
+            head["Content-Encoding"] = applied
+        if etag is not None:
+            if applied is not None:
+                etag = f'{etag[:-1]}-{applied}"'
+            head["ETag"] = etag
+            if self._etag_matches(etag):
+                head.pop("Content-Encoding", None)
+                head["Cache-Control"] = "no-cache"
+                await self._write_head(304, head)
+                return
+
+        await self._send_response(status, content_type, body, head)
+
+    async def _send_error(
+        self, status: int, message: str, headers: Optional[Dict[str, str]] = None
+    ) -> None:
         """Send an error response."""
         body = message.encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "text/plain")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        head = {"Content-Type": "text/plain", "Content-Length": str(len(body))}
+        head.update(headers or {})
+        await self._write_head(status, head)
+        await self._write(body)
+
+
+def _call_timed(
+    store: Optional[Any], func: Callable[..., Any], args: Tuple[Any, ...]
+) -> Tuple[Any, float]:
+    """Call func on a worker thread; return (result, store-lock wait seconds)."""
+    if store is None:
+        return func(*args), 0.0
+    store.take_lock_wait()
+    try:
+        return func(*args), store.take_lock_wait()
+    except BaseException:
+        store.take_lock_wait()
+        raise
+
+
+def _dual_stack_socket(port: int) -> Optional[socket.socket]:
+    """
+    Create a listening socket accepting IPv6 and IPv4 (as mapped) clients.
+
+    Returns:
+        Bound, listening socket, or None if the host has no IPv6 (the caller
+        then binds IPv4 only).
+
+    Raises:
+        OSError: The port is unavailable.
+    """
+    try:
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+    except OSError as e:
+        logger.info("IPv6 unavailable, serving IPv4 only: %s", e)
+        return None
+    try:
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("::", port))
+        sock.listen(LISTEN_BACKLOG)
+        sock.setblocking(False)
+    except OSError as e:
+        sock.close()
+        if e.errno in (errno.EADDRNOTAVAIL, errno.EAFNOSUPPORT):
+            logger.info("IPv6 unavailable, serving IPv4 only: %s", e)
+            return None
+        raise
+    return sock
+
+
+def _reason(status: int) -> str:
+    """Return the standard reason phrase for a status code."""
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
 
 
 class TelemetryServer:
     """
-    Background HTTP server for telemetry endpoints.
+    Background asyncio HTTP server for telemetry endpoints.
 
-    Owns the ThreadingHTTPServer lifecycle on a dedicated thread. The server
-    reads telemetry from shared state; it never contacts the inverter.
+    Runs an event loop on a dedicated thread, so every connection, including
+    idle keep-alive and SSE clients, costs a coroutine rather than an OS
+    thread. Store queries and compression go to a small worker pool. The
+    server reads telemetry from shared state; it never contacts the inverter.
     """
 
     def __init__(
         self,
         state: StateHolder,
-        bind_host: str = "0.0.0.0",
+        bind_host: Optional[str] = None,
         port: int = DEFAULT_HTTP_PORT,
-        allowed_networks: Optional[List[ipaddress.IPv4Network]] = None,
+        allowed_networks: Optional[List[IPNetwork]] = None,
         store: Optional[Any] = None,
+        writer: Optional[Any] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        workers: int = DEFAULT_WORKERS,
     ) -> None:
         """
         Initialize the telemetry server.
 
         Args:
             state: Shared, lock-guarded telemetry snapshot holder.
-            bind_host: Interface to bind (default all interfaces).
-            port: TCP port (non-privileged default 8181).
-            allowed_networks: Permitted source ranges (None = DEFAULT_ALLOWED_NETWORKS).
-            store: Optional TimeSeriesStore for /api/history (None yields empty series).
+            bind_host: Interface to bind (None = all interfaces, dual-stack
+                IPv6/IPv4 where available).
+            port: TCP port (non-privileged default 8181; 0 = ephemeral).
+            allowed_networks: Permitted IPv4/IPv6 source ranges (None =
+                DEFAULT_ALLOWED_NETWORKS); compiled into an Allowlist at start().
+            store: Optional StoreBackend for /api/history (None yields empty series).
+            writer: Optional StorageWriter whose queue metrics /api/stats reports.
+            max_connections: Open connections beyond this are answered 503.
+            workers: Worker threads for store queries and compression.
         """
         self.state = state
         self.bind_host = bind_host
@@ -277,37 +1502,74 @@ class TelemetryServer:
             allowed_networks if allowed_networks is not None else DEFAULT_ALLOWED_NETWORKS
         )
         self.store = store
+        self.writer = writer
+        self.max_connections = max(int(max_connections), 1)
+        self.workers = max(int(workers), 1)
+        self.history_cache = HistoryCache()
+        self.broadcaster: Optional[TelemetryBroadcaster] = None
+        self.admission: Optional[AdmissionControl] = None
+        self.allowlist: Optional[Allowlist] = None
+        self.metrics = RequestMetrics(ROUTES)
+        self.executor: Optional[ThreadPoolExecutor] = None
 
-        # Resolve dashboard template path relative to this module
+        # Resolve dashboard shell and asset paths relative to this module
         self.template_path = Path(__file__).parent / "templates" / "dashboard.html"
+        self.static_dir = Path(__file__).parent / "static"
+        self.dashboard: Optional[DashboardAssets] = None
 
-        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
         self._thread: Optional[threading.Thread] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._rejected = 0
+        self._snapshot_variants: Tuple[int, CompressedVariants] = (
+            EMPTY_SNAPSHOT.version,
+            CompressedVariants(EMPTY_SNAPSHOT.encoded),
+        )
+
+    @property
+    def server_address(self) -> Optional[Tuple[str, int]]:
+        """Return the bound (host, port), or None if not started."""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+
+    def snapshot_variants(self, snapshot: Snapshot) -> CompressedVariants:
+        """
+        Return the response body variants for a snapshot (loop thread only).
+
+        Wraps each snapshot's encoded JSON once, so compressed variants are
+        shared by every request for the same version.
+        """
+        version, variants = self._snapshot_variants
+        if version != snapshot.version:
+            variants = CompressedVariants(snapshot.encoded)
+            self._snapshot_variants = (snapshot.version, variants)
+        return variants
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """Return open/limit/rejected connection counts (loop thread only)."""
+        return {
+            "connections": len(self._connections),
+            "max_connections": self.max_connections,
+            "rejected": self._rejected,
+        }
 
     def start(self) -> None:
         """
-        Bind the server and begin serving on a background thread.
+        Bind the server and begin serving on a background event loop thread.
 
         Raises:
             OSError: Port unavailable. Logged; the polling loop should continue.
         """
+        self.dashboard = DashboardAssets.load(self.template_path, self.static_dir)
+        self.allowlist = Allowlist(self.allowed_networks)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="TelemetryServer-worker"
+        )
+        self._loop = asyncio.new_event_loop()
         try:
-            self._httpd = ThreadingHTTPServer(
-                (self.bind_host, self.port), TelemetryRequestHandler
-            )
-            # Attach context for the handler to access
-            self._httpd.state = self.state  # type: ignore[attr-defined]
-            self._httpd.allowed_networks = self.allowed_networks  # type: ignore[attr-defined]
-            self._httpd.template_path = self.template_path  # type: ignore[attr-defined]
-            self._httpd.store = self.store  # type: ignore[attr-defined]
-
-            self._thread = threading.Thread(
-                target=self._httpd.serve_forever, name="TelemetryServer", daemon=True
-            )
-            self._thread.start()
-            logger.info(
-                "Telemetry server started on http://%s:%d/", self.bind_host, self.port
-            )
+            self._loop.run_until_complete(self._bind())
         except OSError as e:
             logger.error(
                 "Failed to bind telemetry server on port %d: %s",
@@ -315,28 +1577,115 @@ class TelemetryServer:
                 e,
                 exc_info=True,
             )
+            self._loop.close()
+            self._loop = None
+            self.executor.shutdown(wait=False)
+            self.executor = None
             raise
 
+        self.state.subscribe(self._on_snapshot)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="TelemetryServer", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Telemetry server started on http://%s:%d/",
+            self.bind_host or "*",
+            self.server_address[1],
+        )
+
+    async def _bind(self) -> None:
+        """Create loop-owned objects and bind the listening socket (on the loop)."""
+        self.broadcaster = TelemetryBroadcaster()
+        self.admission = AdmissionControl()
+        if self.state.version:
+            self.broadcaster.publish(self.state.snapshot())
+        if self.bind_host is None:
+            sock = _dual_stack_socket(self.port)
+            if sock is not None:
+                self._server = await asyncio.start_server(
+                    self._accept, sock=sock, limit=MAX_HEADER_LINE_BYTES
+                )
+                return
+        self._server = await asyncio.start_server(
+            self._accept,
+            self.bind_host or "0.0.0.0",
+            self.port,
+            limit=MAX_HEADER_LINE_BYTES,
+            backlog=LISTEN_BACKLOG,
+        )
+
+    def _on_snapshot(self, snapshot: Snapshot) -> None:
+        """StateHolder callback: hand the snapshot to the loop thread."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.broadcaster.publish, snapshot)
+
+    async def _accept(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Connection callback: enforce the connection limit, then serve."""
+        if len(self._connections) >= self.max_connections:
+            self._rejected += 1
+            writer.write(_OVERLOAD_RESPONSE)
+            try:
+                await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT_SECONDS)
+            except (asyncio.TimeoutError, ConnectionError):
+                pass
+            writer.close()
+            return
+
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            await TelemetryRequestHandler(self, reader, writer).handle()
+        finally:
+            self._connections.discard(task)
+
+    async def _shutdown(self) -> None:
+        """Stop accepting, release streams and cancel open connections."""
+        if self.broadcaster is not None:
+            self.broadcaster.close()
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(list(self._connections), timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        if self._server is not None:
+            await self._server.wait_closed()
+
     def stop(self) -> None:
         """
         Stop serving and release the socket.
 
-        Calls httpd.shutdown() then httpd.server_close(), then joins the server
-        thread. Idempotent; safe if not started.
+        Closes the listener and open connections on the loop, then stops the
+        loop and joins its thread. Open event streams are released first.
+        Idempotent; safe if not started.
         """
-        if self._httpd is not None:
+        self.state.unsubscribe(self._on_snapshot)
+
+        if self._loop is not None and self._thread is not None:
             logger.info("Stopping telemetry server...")
             try:
-                self._httpd.shutdown()
-                self._httpd.server_close()
+                future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+                future.result(timeout=SHUTDOWN_TIMEOUT_SECONDS + 1)
             except Exception as e:
                 logger.error("Error during server shutdown: %s", e, exc_info=True)
+            self._loop.call_soon_threadsafe(self._loop.stop)
 
         if self._thread is not None and self._thread.is_alive():
             self._thread.join(timeout=5.0)
             if self._thread.is_alive():
                 logger.warning("Telemetry server thread did not stop within timeout")
 
-        self._httpd = None
+        if self._loop is not None and not self._loop.is_running():
+            self._loop.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+        self._loop = None
+        self._server = None
         self._thread = None
+        self.executor = None
         logger.info("Telemetry server stopped")
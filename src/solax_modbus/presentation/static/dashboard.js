@@ -0,0 +1,481 @@
+const TELEMETRY_INTERVAL = 5000;   // 5 seconds (polling fallback)
+const HISTORY_INTERVAL = 60000;    // 60 seconds
+const HISTORY_12MO_INTERVAL = 600000; // 10 minutes
+const HISTORY_METRICS = ['pv_power', 'battery_power', 'battery_soc', 'grid_power_total'];
+const HISTORY_WINDOW_SECONDS = 30 * 86400;
+const HISTORY_12MO_WINDOW_SECONDS = 365 * 86400;
+
+// History data cache (30-day) and delta cursor (?since=)
+let historyData = null;
+let historyCursor = null;
+
+// 12-month history data cache (lazily fetched) and delta cursor
+let history12moData = null;
+let history12moCursor = null;
+let history12moFetching = false;
+
+// Per-card range toggle state: 'solar', 'battery', 'load' -> '30d' or '12mo'
+const cardRangeState = {
+    solar: '30d',
+    battery: '30d',
+    load: '30d'
+};
+
+function formatValue(value, unit, decimals = 1) {
+    if (value === undefined || value === null) return '--';
+    return value.toFixed(decimals) + ' ' + unit;
+}
+
+function formatPower(value) {
+    if (value === undefined || value === null) return '--';
+    return Math.abs(value).toFixed(0);
+}
+
+/**
+ * Calculate house_load from the three stored primitives.
+ *
+ * PROVISIONAL: This formula assumes conservation of energy across PV,
+ * battery, and the instrumented grid port. On a true off-grid island
+ * the grid port may read near zero if house loads are served via an
+ * EPS or backup output not present in the current register map.
+ * Validate against live and emulator data before relying on this.
+ * See issue-a2d5f7c9 analysis.
+ */
+function calculateHouseLoad(pvPower, batteryPower, gridPowerTotal) {
+    if (pvPower === null || pvPower === undefined) return null;
+    if (batteryPower === null || batteryPower === undefined) return null;
+    if (gridPowerTotal === null || gridPowerTotal === undefined) return null;
+    // house_load = pv_power - battery_power + grid_power_total
+    return pvPower - batteryPower + gridPowerTotal;
+}
+
+/**
+ * Render an inline SVG sparkline into the given container.
+ *
+ * @param {HTMLElement} container - The container element for the sparkline
+ * @param {Array} data - Array of {avg, min, max} objects
+ * @param {string} color - Stroke color for the line
+ */
+function renderSparkline(container, data, color) {
+    container.innerHTML = '';
+    if (!data || data.length === 0) return;
+
+    const width = container.clientWidth || 200;
+    const height = container.clientHeight || 50;
+    const padding = 2;
+
+    // Extract avg values, filtering nulls
+    const values = data.map(d => d.avg).filter(v => v !== null && v !== undefined);
+    if (values.length === 0) return;
+
+    const minVal = Math.min(...values);
+    const maxVal = Math.max(...values);
+    const range = maxVal - minVal || 1;
+
+    // Build path
+    const points = [];
+    let validIndex = 0;
+    for (let i = 0; i < data.length; i++) {
+        const v = data[i].avg;
+        if (v !== null && v !== undefined) {
+            const x = padding + (validIndex / (values.length - 1 || 1)) * (width - 2 * padding);
+            const y = height - padding - ((v - minVal) / range) * (height - 2 * padding);
+            points.push(`${validIndex === 0 ? 'M' : 'L'}${x.toFixed(1)},${y.toFixed(1)}`);
+            validIndex++;
+        }
+    }
+
+    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+    svg.setAttribute('viewBox', `0 0 ${width} ${height}`);
+    svg.setAttribute('preserveAspectRatio', 'none');
+
+    const path = document.createElementNS('http://www.w3.org/2000/svg', 'path');
+    path.setAttribute('d', points.join(' '));
+    path.setAttribute('fill', 'none');
+    path.setAttribute('stroke', color);
+    path.setAttribute('stroke-width', '2');
+    path.setAttribute('stroke-linecap', 'round');
+    path.setAttribute('stroke-linejoin', 'round');
+
+    svg.appendChild(path);
+    container.appendChild(svg);
+}
+
+/**
+ * Derive house load sparkline from the three primitive series.
+ */
+function deriveHouseLoadSeries(history) {
+    if (!history) return [];
+    const pv = history.pv_power || [];
+    const bat = history.battery_power || [];
+    const grid = history.grid_power_total || [];
+
+    // Build lookup by bucket_ts
+    const batMap = {};
+    const gridMap = {};
+    bat.forEach(d => { batMap[d.bucket_ts] = d; });
+    grid.forEach(d => { gridMap[d.bucket_ts] = d; });
+
+    const result = [];
+    for (const pvPoint of pv) {
+        const ts = pvPoint.bucket_ts;
+        const batPoint = batMap[ts];
+        const gridPoint = gridMap[ts];
+
+        const pvAvg = pvPoint.avg;
+        const batAvg = batPoint ? batPoint.avg : null;
+        const gridAvg = gridPoint ? gridPoint.avg : null;
+
+        const loadAvg = calculateHouseLoad(pvAvg, batAvg, gridAvg);
+        result.push({ bucket_ts: ts, avg: loadAvg, min: null, max: null });
+    }
+    return result;
+}
+
+function updateTelemetryUI(data) {
+    const indicator = document.getElementById('status-indicator');
+    const timestamp = document.getElementById('timestamp');
+
+    if (!data || Object.keys(data).length === 0) {
+        indicator.className = '';
+        timestamp.textContent = 'No data available';
+        return;
+    }
+
+    indicator.className = 'ok';
+    timestamp.textContent = data.timestamp || '--';
+
+    // Solar Production (pv1_power + pv2_power)
+    const pvTotal = (data.pv1_power || 0) + (data.pv2_power || 0);
+    document.getElementById('solar-value').textContent = formatPower(pvTotal);
+
+    // Battery SOC
+    const batteryEl = document.getElementById('battery-value');
+    if (data.battery_soc !== undefined) {
+        batteryEl.textContent = data.battery_soc;
+    } else {
+        batteryEl.textContent = '--';
+    }
+
+    // House Load (derived)
+    const gridPowerTotal = (data.grid_power_r || 0) + (data.grid_power_s || 0) + (data.grid_power_t || 0);
+    const houseLoad = calculateHouseLoad(pvTotal, data.battery_power, gridPowerTotal);
+    const loadEl = document.getElementById('load-value');
+    if (houseLoad !== null) {
+        loadEl.textContent = formatPower(houseLoad);
+    } else {
+        loadEl.textContent = '--';
+    }
+
+    // Status
+    const statusEl = document.getElementById('status-value');
+    const statusDetailEl = document.getElementById('status-detail');
+    statusEl.textContent = data.run_mode || '--';
+    statusEl.className = 'card-value';
+    if (data.run_mode === 'Normal') {
+        statusEl.classList.add('status');
+    } else if (data.run_mode === 'Fault' || data.run_mode === 'Permanent Fault') {
+        statusEl.classList.add('fault');
+    } else {
+        statusEl.classList.add('status');
+    }
+
+    // Status detail: energy today
+    if (data.energy_today !== undefined) {
+        statusDetailEl.textContent = `Today: ${data.energy_today.toFixed(1)} kWh`;
+    } else {
+        statusDetailEl.textContent = '';
+    }
+
+    // Detail section - PV
+    document.getElementById('pv1-v').textContent = formatValue(data.pv1_voltage, 'V');
+    document.getElementById('pv1-i').textContent = formatValue(data.pv1_current, 'A');
+    document.getElementById('pv1-p').textContent = formatValue(data.pv1_power, 'W', 0);
+    document.getElementById('pv2-v').textContent = formatValue(data.pv2_voltage, 'V');
+    document.getElementById('pv2-i').textContent = formatValue(data.pv2_current, 'A');
+    document.getElementById('pv2-p').textContent = formatValue(data.pv2_power, 'W', 0);
+
+    // Detail section - Grid
+    document.getElementById('grid-r').textContent = formatValue(data.grid_power_r, 'W', 0);
+    document.getElementById('grid-s').textContent = formatValue(data.grid_power_s, 'W', 0);
+    document.getElementById('grid-t').textContent = formatValue(data.grid_power_t, 'W', 0);
+    document.getElementById('grid-total').textContent = formatValue(gridPowerTotal, 'W', 0);
+    document.getElementById('grid-freq').textContent = formatValue(data.grid_frequency_r, 'Hz', 2);
+
+    const feedIn = data.feed_in_power;
+    const feedInEl = document.getElementById('feed-in');
+    if (feedIn !== undefined) {
+        const direction = feedIn > 0 ? ' (export)' : feedIn < 0 ? ' (import)' : '';
+        feedInEl.textContent = formatValue(Math.abs(feedIn), 'W', 0) + direction;
+    } else {
+        feedInEl.textContent = '--';
+    }
+
+    // Detail section - Battery
+    document.getElementById('battery-voltage').textContent = formatValue(data.battery_voltage, 'V');
+    const batCurrent = data.battery_current;
+    if (batCurrent !== undefined) {
+        const direction = batCurrent > 0 ? ' (charging)' : batCurrent < 0 ? ' (discharging)' : '';
+        document.getElementById('battery-current').textContent = formatValue(Math.abs(batCurrent), 'A') + direction;
+    } else {
+        document.getElementById('battery-current').textContent = '--';
+    }
+    const batPower = data.battery_power;
+    if (batPower !== undefined) {
+        const direction = batPower > 0 ? ' (charging)' : batPower < 0 ? ' (discharging)' : '';
+        document.getElementById('battery-power').textContent = formatValue(Math.abs(batPower), 'W', 0) + direction;
+    } else {
+        document.getElementById('battery-power').textContent = '--';
+    }
+    document.getElementById('battery-temp').textContent = data.battery_temperature !== undefined ? data.battery_temperature + ' C' : '--';
+
+    // Detail section - System
+    document.getElementById('inverter-temp').textContent = data.inverter_temperature !== undefined ? data.inverter_temperature + ' C' : '--';
+    document.getElementById('energy-today').textContent = formatValue(data.energy_today, 'kWh');
+    document.getElementById('energy-total').textContent = formatValue(data.energy_total, 'kWh');
+}
+
+/**
+ * Get the data source for a card based on its current range state.
+ */
+function getDataForCard(card) {
+    const range = cardRangeState[card];
+    if (range === '12mo' && history12moData) {
+        return history12moData;
+    }
+    return historyData;
+}
+
+/**
+ * Update a single card's sparkline based on its range state.
+ */
+function updateCardSparkline(card) {
+    const data = getDataForCard(card);
+    if (!data) return;
+
+    if (card === 'solar') {
+        renderSparkline(
+            document.getElementById('solar-sparkline'),
+            data.pv_power || [],
+            '#ffca28'
+        );
+    } else if (card === 'battery') {
+        renderSparkline(
+            document.getElementById('battery-sparkline'),
+            data.battery_soc || [],
+            '#4caf50'
+        );
+    } else if (card === 'load') {
+        const loadSeries = deriveHouseLoadSeries(data);
+        renderSparkline(
+            document.getElementById('load-sparkline'),
+            loadSeries,
+            '#ff9800'
+        );
+    }
+}
+
+function updateSparklines() {
+    // Update each card based on its range state
+    updateCardSparkline('solar');
+    updateCardSparkline('battery');
+    updateCardSparkline('load');
+}
+
+async function fetchTelemetry() {
+    const indicator = document.getElementById('status-indicator');
+    try {
+        const response = await fetch('/api/telemetry');
+        if (!response.ok) {
+            throw new Error('HTTP ' + response.status);
+        }
+        const data = await response.json();
+        updateTelemetryUI(data);
+    } catch (err) {
+        indicator.className = 'error';
+        console.error('Telemetry fetch error:', err);
+    }
+}
+
+// Polling fallback timer, active only while the event stream is down
+let telemetryTimer = null;
+
+function startTelemetryPolling() {
+    if (telemetryTimer !== null) return;
+    fetchTelemetry();
+    telemetryTimer = setInterval(fetchTelemetry, TELEMETRY_INTERVAL);
+}
+
+function stopTelemetryPolling() {
+    if (telemetryTimer === null) return;
+    clearInterval(telemetryTimer);
+    telemetryTimer = null;
+}
+
+/**
+ * Subscribe to pushed telemetry over Server-Sent Events. The browser
+ * reconnects on its own (resuming with Last-Event-ID); polling covers
+ * the gap and browsers without EventSource.
+ */
+function startTelemetryStream() {
+    if (!window.EventSource) {
+        startTelemetryPolling();
+        return;
+    }
+    const source = new EventSource('/api/stream');
+    source.addEventListener('telemetry', (event) => {
+        stopTelemetryPolling();
+        updateTelemetryUI(JSON.parse(event.data));
+    });
+    source.onerror = () => {
+        startTelemetryPolling();
+    };
+}
+
+/**
+ * Cursor for the first delta after a full fetch: the oldest of the
+ * metrics' newest stored buckets (the only ones a rollup can change).
+ */
+function initialCursor(data) {
+    const last = HISTORY_METRICS
+        .map(metric => data[metric] || [])
+        .filter(series => series.length)
+        .map(series => series[series.length - 1].bucket_ts);
+    return last.length ? Math.min(...last) : null;
+}
+
+/**
+ * Point budget for history requests: the sparkline width in device
+ * pixels, so the server downsamples to what can be drawn.
+ */
+function sparklinePoints() {
+    const el = document.getElementById('solar-sparkline');
+    const width = (el && el.clientWidth) || 200;
+    return Math.max(Math.round(width * (window.devicePixelRatio || 1)), 2);
+}
+
+/**
+ * Fetch a history series in full, or only the buckets at or after
+ * the cursor once cached. Deltas replace cached points from the
+ * cursor on, and points older than the window are dropped. A change
+ * of point budget (resize) triggers a full fetch.
+ * Returns {data, cursor}.
+ */
+async function fetchSeries(url, cached, cursor, windowSeconds) {
+    const points = sparklinePoints();
+    const delta = cached !== null && cursor !== null && cached.points === points;
+    const query = '?points=' + points + (delta ? '&since=' + cursor : '');
+    const response = await fetch(url + query);
+    if (!response.ok) {
+        throw new Error('HTTP ' + response.status);
+    }
+    const body = await response.json();
+    if (!delta) {
+        body.points = points;
+        return { data: body, cursor: initialCursor(body) };
+    }
+
+    const cutoff = Date.now() / 1000 - windowSeconds;
+    const merged = { points: points };
+    HISTORY_METRICS.forEach(metric => {
+        const kept = (cached[metric] || []).filter(
+            p => p.bucket_ts < cursor && p.bucket_ts >= cutoff
+        );
+        merged[metric] = kept.concat(body[metric] || []);
+    });
+    return { data: merged, cursor: body.cursor };
+}
+
+async function fetchHistory() {
+    try {
+        const result = await fetchSeries(
+            '/api/history', historyData, historyCursor, HISTORY_WINDOW_SECONDS
+        );
+        historyData = result.data;
+        historyCursor = result.cursor;
+        updateSparklines();
+    } catch (err) {
+        console.error('History fetch error:', err);
+    }
+}
+
+/**
+ * Fetch 12-month history data. Called lazily on first toggle to 12mo.
+ */
+async function fetchHistory12mo() {
+    if (history12moFetching) return;
+    history12moFetching = true;
+
+    try {
+        const result = await fetchSeries(
+            '/api/history/12mo', history12moData, history12moCursor,
+            HISTORY_12MO_WINDOW_SECONDS
+        );
+        history12moData = result.data;
+        history12moCursor = result.cursor;
+        updateSparklines();
+    } catch (err) {
+        console.error('History 12mo fetch error:', err);
+    } finally {
+        history12moFetching = false;
+    }
+}
+
+/**
+ * Check if any card is currently in 12mo view.
+ */
+function anyCardIn12moView() {
+    return Object.values(cardRangeState).some(r => r === '12mo');
+}
+
+/**
+ * Handle toggle button clicks.
+ */
+function initRangeToggles() {
+    document.querySelectorAll('.range-toggle').forEach(toggle => {
+        const card = toggle.dataset.card;
+        toggle.querySelectorAll('button').forEach(btn => {
+            btn.addEventListener('click', () => {
+                const range = btn.dataset.range;
+                if (cardRangeState[card] === range) return;
+
+                // Update state
+                cardRangeState[card] = range;
+
+                // Update button styles
+                toggle.querySelectorAll('button').forEach(b => {
+                    b.classList.toggle('active', b.dataset.range === range);
+                });
+
+                // Fetch 12mo data if switching to 12mo and not yet fetched
+                if (range === '12mo' && !history12moData && !history12moFetching) {
+                    fetchHistory12mo();
+                } else {
+                    // Re-render this card's sparkline
+                    updateCardSparkline(card);
+                }
+            });
+        });
+    });
+}
+
+// Initialize range toggles
+initRangeToggles();
+
+// Initial fetch
+fetchTelemetry();
+fetchHistory();
+
+// Live telemetry is pushed; history is refreshed periodically
+startTelemetryStream();
+setInterval(fetchHistory, HISTORY_INTERVAL);
+
+// Periodic 12mo history refresh (only when at least one card is in 12mo view)
+setInterval(() => {
+    if (anyCardIn12moView() && history12moData) {
+        fetchHistory12mo();
+    }
+}, HISTORY_12MO_INTERVAL);
+
+// Re-render sparklines on window resize
+window.addEventListener('resize', updateSparklines);
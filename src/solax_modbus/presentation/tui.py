@@ -0,0 +1,398 @@
+# Copyright (c) 2025 William Watson. This work is licensed under the MIT License.
+"""
+Full-screen curses dashboard for the Solax monitor.
+
+Shows the live values of the stored metrics with a sparkline of the last
+hour beside each, for terminals without a browser (e.g. over SSH to a
+headless Pi). Sparklines are drawn from the store's in-memory recent window
+(StoreBackend.query_recent), never from SQL. Each refresh recomposes the
+screen as text rows and writes only the rows that changed; curses then sends
+the terminal only the changed cells.
+
+curses is in the standard library on Linux; where it is unavailable the
+monitor falls back to the plain console display.
+
+Design: design-af5c3d4e-domain_presentation.md
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import curses
+except ImportError:  # Not built on every platform (e.g. Windows)
+    curses = None  # type: ignore[assignment]
+
+from solax_modbus.data.base import derive_metrics
+from solax_modbus.presentation.console import FULL_REDRAW_UPDATES
+
+logger = logging.getLogger(__name__)
+
+# Raised by curses for writes past the screen edge
+_DRAW_ERROR = curses.error if curses is not None else Exception
+
+# Key code curses queues when the terminal is resized
+_KEY_RESIZE = curses.KEY_RESIZE if curses is not None else None
+
+# Log records held while the TUI owns the terminal, written out on close
+TUI_LOG_RECORDS: int = 500
+
+# Sparkline span in seconds
+TUI_WINDOW_SECONDS: int = 3600
+
+# Eight block heights, lowest first
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# Sparkline rows: (label, stored metric, unit)
+TUI_METRICS: Tuple[Tuple[str, str, str], ...] = (
+    ("PV", "pv_power", "W"),
+    ("Battery", "battery_power", "W"),
+    ("SOC", "battery_soc", "%"),
+    ("Grid", "grid_power_total", "W"),
+)
+
+# Columns before the sparkline: label, value, gap
+_LABEL_WIDTH = 9
+_VALUE_WIDTH = 8
+_SPARK_COLUMN = _LABEL_WIDTH + _VALUE_WIDTH + 2
+
+RecentSource = Callable[[str, int], List[Dict[str, Any]]]
+
+
+class _LogBuffer(logging.Handler):
+    """Handler holding the most recent records in memory."""
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__()
+        self.records: Deque[logging.LogRecord] = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def live_value(data: Dict[str, Any], metric: str) -> Optional[int]:
+    """
+    Derive a stored metric from a telemetry dictionary.
+
+    Uses the storage derivation (derive_metrics), so the live value always
+    matches the sparkline drawn beside it.
+
+    Args:
+        data: Telemetry dictionary from poll_inverter().
+        metric: One of the TUI_METRICS metrics.
+
+    Returns:
+        The value, or None if its inputs are missing.
+    """
+    return derive_metrics(data).get(metric)
+
+
+def sparkline(
+    points: Sequence[Tuple[int, float]], width: int, start: int, end: int
+) -> str:
+    """
+    Render (ts, value) points as a fixed-width sparkline.
+
+    Each column covers an equal slice of [start, end) and shows the mean of
+    the points in it, scaled between the smallest and largest column; columns
+    without points are blank.
+
+    Args:
+        points: Chronological (ts, value) pairs.
+        width: Columns to fill.
+        start: Timestamp of the left edge.
+        end: Timestamp of the right edge.
+
+    Returns:
+        A string of exactly width characters.
+    """
+    if width <= 0:
+        return ""
+    span = max(end - start, 1)
+    sums = [0.0] * width
+    counts = [0] * width
+    for ts, value in points:
+        if start <= ts < end:
+            column = (ts - start) * width // span
+            sums[column] += value
+            counts[column] += 1
+
+    means = [total / count for total, count in zip(sums, counts) if count]
+    if not means:
+        return " " * width
+    lo, hi = min(means), max(means)
+    scale = (len(SPARK_CHARS) - 1) / (hi - lo) if hi > lo else 0.0
+    return "".join(
+        SPARK_CHARS[int((total / count - lo) * scale)] if count else " "
+        for total, count in zip(sums, counts)
+    )
+
+
+def compose_rows(
+    data: Dict[str, Any],
+    series: Dict[str, Sequence[Tuple[int, float]]],
+    width: int,
+    now: int,
+    window: int = TUI_WINDOW_SECONDS,
+) -> List[str]:
+    """
+    Lay out the dashboard as text rows.
+
+    Args:
+        data: Latest telemetry dictionary.
+        series: Recent (ts, value) points per stored metric.
+        width: Screen columns.
+        now: Right edge of the sparklines (epoch seconds).
+        window: Sparkline span in seconds.
+
+    Returns:
+        One string per screen row, none longer than width - 1.
+    """
+    title = "Solax X3 Hybrid"
+    status = " ".join(str(data[key]) for key in ("run_mode", "timestamp") if key in data)
+    rows = [f"{title}  {status}", ""]
+
+    spark_width = max(width - _SPARK_COLUMN - 1, 0)
+    for label, metric, unit in TUI_METRICS:
+        value = live_value(data, metric)
+        text = f"{value}{unit}" if value is not None else "--"
+        spark = sparkline(series.get(metric, ()), spark_width, now - window, now)
+        rows.append(f"{label:<{_LABEL_WIDTH}}{text:>{_VALUE_WIDTH}}  {spark}")
+
+    rows.append("")
+    details = []
+    if "feed_in_power" in data:
+        details.append(f"Feed-in {data['feed_in_power']}W")
+    if "battery_temperature" in data:
+        details.append(f"Battery {data['battery_temperature']}°C")
+    if "inverter_temperature" in data:
+        details.append(f"Inverter {data['inverter_temperature']}°C")
+    rows.append("   ".join(details))
+    energy = []
+    if "energy_today" in data:
+        energy.append(f"Today {data['energy_today']:.1f}kWh")
+    if "energy_total" in data:
+        energy.append(f"Total {data['energy_total']:.1f}kWh")
+    rows.append("   ".join(energy))
+    rows.append("")
+    rows.append(f"Sparklines: last {window // 60} min   Ctrl+C to quit")
+    return [row[:max(width - 1, 0)] for row in rows]
+
+
+class TuiDisplay:
+    """
+    Curses screen showing live values and last-hour sparklines.
+
+    update() is called from the display worker thread only; open() and
+    close() bracket its use. While open, log output to the terminal is
+    held in a buffer (it would scribble over the screen) and written out
+    on close.
+    """
+
+    def __init__(
+        self,
+        screen: Any,
+        recent: Optional[RecentSource] = None,
+        window: int = TUI_WINDOW_SECONDS,
+        full_redraw_updates: int = FULL_REDRAW_UPDATES,
+    ) -> None:
+        """
+        Wrap an initialized curses window.
+
+        Args:
+            screen: curses window (the standard screen).
+            recent: Recent-window source, e.g. StoreBackend.query_recent
+                (None = sparklines stay blank).
+            window: Sparkline span in seconds.
+            full_redraw_updates: Updates between full repaints (repairs a
+                screen disturbed by other output).
+        """
+        self.screen = screen
+        self.recent = recent
+        self.window = window
+        self.full_redraw_updates = max(full_redraw_updates, 1)
+        self._series: Dict[str, Deque[Tuple[int, float]]] = {}
+        self._fetched: Optional[int] = None
+        self._rows: List[str] = []
+        self._size: Tuple[int, int] = (0, 0)
+        self._updates = 0
+        self._log_buffer: Optional[_LogBuffer] = None
+        self._log_handlers: List[logging.Handler] = []
+        self.rows_written = 0
+
+    @classmethod
+    def open(cls, recent: Optional[RecentSource] = None) -> Optional[TuiDisplay]:
+        """
+        Take over the terminal.
+
+        Returns:
+            A TuiDisplay, or None if curses is unavailable or stdout is not a
+            terminal (the caller falls back to the console display).
+        """
+        if curses is None or not sys.stdout.isatty():
+            logger.warning("TUI needs curses and a terminal; using the console display")
+            return None
+        try:
+            screen = curses.initscr()
+            curses.noecho()
+            curses.cbreak()
+            screen.nodelay(True)
+            screen.keypad(True)
+            try:
+                curses.curs_set(0)
+            except curses.error:
+                pass
+        except curses.error as e:
+            logger.warning("Could not start the TUI (%s); using the console display", e)
+            return None
+        tui = cls(screen, recent)
+        tui.capture_logs()
+        return tui
+
+    def close(self) -> None:
+        """Restore the terminal and write out held log records. Idempotent."""
+        if self.screen is None:
+            return
+        self.screen = None
+        if curses is not None:
+            try:
+                curses.nocbreak()
+                curses.echo()
+                curses.endwin()
+            except curses.error as e:
+                logger.debug("TUI teardown: %s", e)
+        self.release_logs()
+
+    def capture_logs(self) -> None:
+        """
+        Hold root-logger output to the terminal in a buffer.
+
+        Stream handlers on stdout/stderr are detached and replaced by a
+        bounded in-memory buffer; file handlers are left alone.
+        """
+        if self._log_buffer is not None:
+            return
+        root = logging.getLogger()
+        self._log_handlers = [
+            handler for handler in root.handlers
+            if isinstance(handler, logging.StreamHandler)
+            and getattr(handler, "stream", None) in (sys.stdout, sys.stderr)
+        ]
+        self._log_buffer = _LogBuffer(TUI_LOG_RECORDS)
+        for handler in self._log_handlers:
+            root.removeHandler(handler)
+        root.addHandler(self._log_buffer)
+
+    def release_logs(self) -> None:
+        """Reattach the terminal log handlers and write out held records."""
+        if self._log_buffer is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self._log_buffer)
+        for handler in self._log_handlers:
+            root.addHandler(handler)
+        for record in self._log_buffer.records:
+            for handler in self._log_handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self._log_buffer = None
+        self._log_handlers = []
+
+    def update(self, data: Dict[str, Any]) -> None:
+        """Recompose the screen for new telemetry and write the changed rows."""
+        if self.screen is None:
+            return
+        resized = self._poll_keys()
+        height, width = self.screen.getmaxyx()
+        if resized:
+            self._size = (0, 0)  # Force a full repaint
+        now = int(time.time())
+        self._follow(now)
+        rows = compose_rows(data, self._series, width, now, self.window)[:height]
+        self.paint(rows, (height, width))
+
+    def _poll_keys(self) -> bool:
+        """
+        Drain pending input (non-blocking) and pick up terminal resizes.
+
+        curses reports a resize as a KEY_RESIZE keypress; until it is read
+        getmaxyx() keeps returning the old size.
+
+        Returns:
+            True if the terminal was resized.
+        """
+        resized = False
+        while True:
+            try:
+                key = self.screen.getch()
+            except _DRAW_ERROR:
+                break
+            if key == -1:
+                break
+            if key == _KEY_RESIZE:
+                resized = True
+        if resized and curses is not None:
+            curses.update_lines_cols()
+        return resized
+
+    def _follow(self, now: int) -> None:
+        """
+        Bring the per-metric sparkline points up to now.
+
+        Only points newer than those already held are requested from the
+        recent window, and points older than the window are dropped, so a
+        refresh copies a few samples rather than the whole hour.
+        """
+        if self.recent is None:
+            return
+        cutoff = now - self.window
+        since = max(self._fetched, cutoff) if self._fetched is not None else cutoff
+        for _, metric, _ in TUI_METRICS:
+            points = self._series.setdefault(metric, deque())
+            last = points[-1][0] if points else cutoff - 1
+            # Re-read from the previous refresh to pick up late same-second samples
+            for point in self.recent(metric, now - since + 1):
+                if point["ts"] > last:
+                    points.append((point["ts"], point["value"]))
+            while points and points[0][0] < cutoff:
+                points.popleft()
+        self._fetched = now
+
+    def paint(self, rows: List[str], size: Tuple[int, int]) -> None:
+        """
+        Write rows that differ from the previous frame, then refresh.
+
+        Args:
+            rows: Screen rows, already fitted to the screen.
+            size: Current (height, width); a change forces a full repaint.
+        """
+        full = size != self._size or self._updates >= self.full_redraw_updates
+        if full:
+            self.screen.clear()
+            previous: List[str] = []
+            self._updates = 0
+        else:
+            previous = self._rows
+            self._updates += 1
+
+        for y, row in enumerate(rows):
+            if y < len(previous) and previous[y] == row:
+                continue
+            try:
+                self.screen.addstr(y, 0, row)
+                self.screen.clrtoeol()
+            except _DRAW_ERROR as e:
+                logger.debug("TUI row %d not drawn: %s", y, e)
+            self.rows_written += 1
+        for y in range(len(rows), len(previous)):
+            self.screen.move(y, 0)
+            self.screen.clrtoeol()
+
+        self._rows = rows
+        self._size = size
+        self.screen.refresh()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Solax History Storage Benchmark
+
+Created: 2026 October 19
+
+Replays a simulated day of telemetry through each history store target (the
+SQLite backend at every durability profile, plus the memory and segment-log
+backends) and reports throughput, bytes written to the device, on-disk and
+Python heap footprint, and the write latency distribution side by side, so
+targets can be compared on the target media (run with --dir pointing at the
+SD card). The sqlite+journal target stages samples in the append-only
+journal and compacts sealed segments, plus the records added to the active
+segment, at each rollup.
+"""
+
+import argparse
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Allow running from a source checkout without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from solax_modbus.data.base import (
+    BACKEND_MEMORY,
+    BACKEND_SEGMENT,
+    BACKEND_SQLITE,
+    StoreBackend,
+    create_store,
+)
+from solax_modbus.data.storage import DURABILITY_PROFILES
+
+# ============================================================================
+# CONFIGURATION CONSTANTS
+# ============================================================================
+
+SIMULATED_SECONDS = 86400  # One day
+SAMPLE_INTERVAL = 5  # Seconds between simulated polls
+ROLLUP_INTERVAL = 900  # Seconds between rollup/prune passes (matches main)
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# MEASUREMENT HELPERS
+# ============================================================================
+
+def read_proc_io() -> Optional[Dict[str, int]]:
+    """
+    Return this process's I/O counters from /proc/self/io (Linux only).
+
+    write_bytes counts bytes sent to the storage layer; wchar counts bytes
+    passed to write() calls regardless of caching.
+    """
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = {}
+            for line in f:
+                key, _, value = line.partition(':')
+                counters[key.strip()] = int(value)
+            return counters
+    except OSError:
+        return None
+
+
+def directory_size(path: str) -> int:
+    """Return the total size in bytes of regular files under path."""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest rank) of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+def simulated_sample(step: int) -> Dict[str, Any]:
+    """Return a plausible telemetry sample for the given step of the day."""
+    phase = (step * SAMPLE_INTERVAL % SIMULATED_SECONDS) / SIMULATED_SECONDS
+    sun = max(math.sin((phase - 0.25) * 2 * math.pi), 0.0)
+    pv = int(3000 * sun)
+    return {
+        'pv1_power': pv,
+        'pv2_power': int(pv * 0.9),
+        'battery_power': int(1500 * sun) - 500,
+        'battery_soc': 20 + int(70 * sun),
+        'grid_power_r': 300 - pv // 6,
+        'grid_power_s': 280 - pv // 6,
+        'grid_power_t': 310 - pv // 6,
+    }
+
+# ============================================================================
+# BENCHMARK TARGETS
+# ============================================================================
+
+def build_targets() -> Dict[str, Callable[[str], StoreBackend]]:
+    """Return target name -> factory(work_dir) for every benchmarkable store."""
+    targets: Dict[str, Callable[[str], StoreBackend]] = {}
+    for profile in DURABILITY_PROFILES:
+        targets[f'{BACKEND_SQLITE}:{profile}'] = (
+            lambda work_dir, p=profile: create_store(
+                BACKEND_SQLITE, os.path.join(work_dir, 'bench.db'), profile=p
+            )
+        )
+    targets[f'{BACKEND_SQLITE}+journal'] = lambda work_dir: create_store(
+        BACKEND_SQLITE,
+        os.path.join(work_dir, 'bench.db'),
+        journal_dir=os.path.join(work_dir, 'journal'),
+    )
+    targets[BACKEND_MEMORY] = lambda work_dir: create_store(BACKEND_MEMORY, work_dir)
+    targets[BACKEND_SEGMENT] = lambda work_dir: create_store(
+        BACKEND_SEGMENT, os.path.join(work_dir, 'segments')
+    )
+    return targets
+
+
+TARGETS = build_targets()
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def run_target(name: str, base_dir: str, samples: int) -> Dict[str, Any]:
+    """
+    Replay samples through a fresh store for one benchmark target.
+
+    Args:
+        name: Target name, one of TARGETS.
+        base_dir: Directory in which the benchmark store is created.
+        samples: Number of samples to write.
+
+    Returns:
+        Result dictionary for the target.
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"bench-{name.replace(':', '-')}-", dir=base_dir)
+    tracemalloc.start()
+    store = TARGETS[name](work_dir)
+
+    start_ts = int(time.time()) - samples * SAMPLE_INTERVAL
+    samples_per_rollup = max(ROLLUP_INTERVAL // SAMPLE_INTERVAL, 1)
+    latencies: List[float] = []
+
+    io_before = read_proc_io()
+    started = time.perf_counter()
+    try:
+        for step in range(samples):
+            t0 = time.perf_counter()
+            store.write_sample(simulated_sample(step), ts=start_ts + step * SAMPLE_INTERVAL)
+            latencies.append(time.perf_counter() - t0)
+
+            if (step + 1) % samples_per_rollup == 0:
+                store.rollup()
+                store.prune()
+        elapsed = time.perf_counter() - started
+        heap_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        store.close()
+        tracemalloc.stop()
+    io_after = read_proc_io()
+
+    result: Dict[str, Any] = {
+        'target': name,
+        'samples': samples,
+        'elapsed_s': elapsed,
+        'samples_per_s': samples / elapsed if elapsed > 0 else 0.0,
+        'heap_bytes': heap_bytes,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+        'footprint_bytes': directory_size(work_dir),
+        'device_bytes': None,
+        'write_call_bytes': None,
+    }
+    if io_before is not None and io_after is not None:
+        result['device_bytes'] = io_after.get('write_bytes', 0) - io_before.get('write_bytes', 0)
+        result['write_call_bytes'] = io_after.get('wchar', 0) - io_before.get('wchar', 0)
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def format_bytes(value: Optional[int]) -> str:
+    """Format a byte count for the results table."""
+    if value is None:
+        return 'n/a'
+    return f'{value / (1024 * 1024):.1f} MiB'
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print the per-target results table."""
+    print(f"\n{'Target':<16} {'Samples':>8} {'Rate/s':>9} {'Device':>11} {'write()':>11} "
+          f"{'On disk':>11} {'Py heap':>11} {'p50':>9} {'p99':>9} {'max':>9}")
+    print('-' * 122)
+    for r in results:
+        print(f"{r['target']:<16} {r['samples']:>8} {r['samples_per_s']:>9.0f} "
+              f"{format_bytes(r['device_bytes']):>11} "
+              f"{format_bytes(r['write_call_bytes']):>11} "
+              f"{format_bytes(r['footprint_bytes']):>11} "
+              f"{format_bytes(r['heap_bytes']):>11} "
+              f"{r['p50_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms {r['max_ms']:>7.2f}ms")
+    if results and results[0]['device_bytes'] is None:
+        print("\nDevice byte counters unavailable (requires Linux /proc/self/io).")
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark history store backends and SQLite profiles over a simulated day"
+    )
+    parser.add_argument(
+        "--dir",
+        default=None,
+        help="Directory on the device under test, created if missing (default: system temp dir)"
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        choices=tuple(TARGETS),
+        help="Target to run (repeatable; default: all)"
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=SIMULATED_SECONDS // SAMPLE_INTERVAL,
+        help=f"Samples to write (default: {SIMULATED_SECONDS // SAMPLE_INTERVAL}, one day at {SAMPLE_INTERVAL}s)"
+    )
+    args = parser.parse_args()
+
+    base_dir = args.dir or tempfile.gettempdir()
+    os.makedirs(base_dir, exist_ok=True)
+    targets = args.target or list(TARGETS)
+    results = []
+    for name in targets:
+        print(f"Running {name} ({args.samples} samples in {base_dir})...")
+        results.append(run_target(name, base_dir, args.samples))
+    print_results(results)
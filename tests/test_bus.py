@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Solax application domain
+Tests SnapshotBus fan-out, per-subscriber overflow policies and shutdown draining
+"""
+
+import pytest
+import threading
+import time
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.application.bus import (
+    POLICY_DROP_NEWEST,
+    POLICY_LATEST,
+    SnapshotBus,
+)
+
+
+class TestSnapshotBus:
+    """Test suite for SnapshotBus."""
+
+    def test_every_subscriber_receives_each_snapshot(self):
+        """Test publishes reach all subscribers in order as read-only views."""
+        bus = SnapshotBus()
+        first, second = [], []
+        bus.subscribe('first', first.append)
+        bus.subscribe('second', second.append)
+        bus.start()
+        data = {'battery_soc': 64}
+        bus.publish(data, ts=1000)
+        data['battery_soc'] = 65
+        bus.publish(data, ts=1005)
+        bus.stop()
+
+        assert [m.seq for m in first] == [1, 2]
+        assert [m.data['battery_soc'] for m in second] == [64, 65]
+        assert first[0] is second[0]
+        assert first[0].ts == 1000
+        with pytest.raises(TypeError):
+            first[0].data['battery_soc'] = 0
+        stats = bus.stats()
+        assert stats['published'] == 2
+        assert stats['subscribers']['first']['delivered'] == 2
+
+    def test_slow_subscriber_does_not_hold_up_producer(self):
+        """Test a stalled subscriber drops its own backlog, not others' messages."""
+        gate = threading.Event()
+        fast = []
+        bus = SnapshotBus()
+        bus.subscribe('slow', lambda message: gate.wait(5), max_queue=2)
+        bus.subscribe('fast', fast.append)
+        bus.start()
+
+        started = time.monotonic()
+        for i in range(20):
+            bus.publish({'n': i})
+        elapsed = time.monotonic() - started
+        time.sleep(0.05)
+        slow = bus.stats()['subscribers']['slow']
+        gate.set()
+        bus.stop()
+
+        assert elapsed < 0.5
+        assert slow['queue_size'] <= 2
+        assert slow['dropped'] >= 17
+        assert [m.data['n'] for m in fast] == list(range(20))
+
+    def test_drop_newest_keeps_queued_messages(self):
+        """Test drop-newest discards the incoming message when full."""
+        gate = threading.Event()
+        received = []
+
+        def handler(message):
+            gate.wait(5)
+            received.append(message.data['n'])
+
+        bus = SnapshotBus()
+        sub = bus.subscribe('sink', handler, max_queue=2, policy=POLICY_DROP_NEWEST)
+        bus.start()
+        bus.publish({'n': 0})
+        time.sleep(0.05)  # Handler now holds message 0
+        for i in range(1, 6):
+            bus.publish({'n': i})
+        gate.set()
+        bus.stop()
+
+        assert received == [0, 1, 2]
+        assert sub.stats()['dropped'] == 3
+
+    def test_latest_policy_conflates(self):
+        """Test the latest policy delivers the newest snapshot after a stall."""
+        gate = threading.Event()
+        received = []
+
+        def handler(message):
+            gate.wait(5)
+            received.append(message.data['n'])
+
+        bus = SnapshotBus()
+        bus.subscribe('state', handler, max_queue=10, policy=POLICY_LATEST)
+        bus.start()
+        bus.publish({'n': 0})
+        time.sleep(0.05)
+        for i in range(1, 6):
+            bus.publish({'n': i})
+        gate.set()
+        bus.stop()
+
+        assert received == [0, 5]
+
+    def test_failing_subscriber_is_contained(self):
+        """Test a raising handler is counted and keeps receiving."""
+        calls = []
+
+        def handler(message):
+            calls.append(message.seq)
+            raise RuntimeError('boom')
+
+        bus = SnapshotBus()
+        sub = bus.subscribe('broken', handler)
+        bus.start()
+        bus.publish({})
+        bus.publish({})
+        bus.stop()
+
+        assert calls == [1, 2]
+        assert sub.stats()['failed'] == 2
+
+    def test_subscribe_while_running_and_unsubscribe(self):
+        """Test late subscribers start at once and unsubscribed ones stop receiving."""
+        bus = SnapshotBus()
+        bus.start()
+        received = []
+        sub = bus.subscribe('late', received.append)
+        bus.publish({'n': 1})
+        bus.unsubscribe(sub)
+        bus.publish({'n': 2})
+        bus.stop()
+
+        assert [m.data['n'] for m in received] == [1]
+        assert 'late' not in bus.stats()['subscribers']
+
+    def test_publish_before_start_is_not_queued(self):
+        """Test publishes to a stopped bus reach nobody."""
+        received = []
+        bus = SnapshotBus()
+        bus.subscribe('sink', received.append)
+        bus.publish({})
+        bus.start()
+        bus.stop()
+        assert received == []
+
+    def test_invalid_policy(self):
+        """Test unknown policies are rejected."""
+        with pytest.raises(ValueError):
+            SnapshotBus().subscribe('sink', print, policy='fifo')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])
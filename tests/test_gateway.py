@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Solax Modbus TCP gateway
+Tests the register image, per-group freshness and serving cached registers
+to a real Modbus TCP client
+"""
+
+import ipaddress
+import pytest
+import socket
+import struct
+import time
+from unittest.mock import Mock
+
+from pymodbus.client import ModbusTcpClient
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.main import SolaxInverterClient
+from solax_modbus.presentation.gateway import (
+    GATEWAY_PATH_UNAVAILABLE,
+    GATEWAY_TARGET_FAILED,
+    ILLEGAL_DATA_ADDRESS,
+    ILLEGAL_FUNCTION,
+    ModbusGateway,
+    ModbusReplyError,
+    RegisterImage,
+    respond,
+)
+
+LOCALHOST = [ipaddress.ip_network('127.0.0.0/8')]
+
+
+@pytest.fixture
+def image():
+    """Create an image holding the PV voltage/current and power groups."""
+    img = RegisterImage(max_age=15)
+    img.update(0x0003, [3000, 3100, 50, 52])
+    img.update(0x000A, [1500, 1200])
+    return img
+
+
+@pytest.fixture
+def gateway(image):
+    """Start a gateway on an ephemeral localhost port."""
+    gw = ModbusGateway(image, bind_host='127.0.0.1', port=0, allowed_networks=LOCALHOST)
+    gw.start()
+    yield gw
+    gw.stop()
+
+
+class TestRegisterImage:
+    """Test suite for RegisterImage."""
+
+    def test_reads_within_and_across_groups(self, image):
+        """Test reads may cover part of a group or adjacent groups."""
+        assert image.read(0x0004, 2) == [3100, 50]
+        image.update(0x0007, [7, 8, 9])
+        assert image.read(0x0005, 7) == [50, 52, 7, 8, 9, 1500, 1200]
+
+    def test_unpolled_registers(self, image):
+        """Test registers outside every group are illegal addresses."""
+        for address, count in ((0x0000, 1), (0x0006, 2), (0x000B, 2)):
+            with pytest.raises(ModbusReplyError) as e:
+                image.read(address, count)
+            assert e.value.code == ILLEGAL_DATA_ADDRESS
+
+    def test_freshness_is_per_group(self, image):
+        """Test a stale group fails reads touching it but not its neighbours."""
+        now = time.monotonic()
+        image.update(0x0003, [1, 2, 3, 4], now=now - 60)
+        image.update(0x000A, [5, 6], now=now)
+        assert image.read(0x000A, 2, now=now) == [5, 6]
+        with pytest.raises(ModbusReplyError) as e:
+            image.read(0x0003, 1, now=now)
+        assert e.value.code == GATEWAY_TARGET_FAILED
+        assert image.stats(now=now)['groups']['0x0003']['age'] == 60
+
+    def test_freshness_is_per_register(self, image):
+        """Test a fresh overlapping group serves registers a stale one also covers."""
+        now = time.monotonic()
+        image.update(0x0003, [1, 2, 3, 4], now=now - 60)
+        image.update(0x0004, [20, 30], now=now)
+        assert image.read(0x0004, 2, now=now) == [20, 30]
+        for address, count in ((0x0003, 2), (0x0005, 2)):
+            with pytest.raises(ModbusReplyError) as e:
+                image.read(address, count, now=now)
+            assert e.value.code == GATEWAY_TARGET_FAILED
+
+        # A stale group overlapping a fresh one does not override it
+        image.update(0x0003, [5, 6, 7, 8], now=now)
+        image.update(0x0004, [0, 0], now=now - 60)
+        assert image.read(0x0003, 4, now=now) == [5, 6, 7, 8]
+
+    def test_respond_exceptions(self, image):
+        """Test writes and malformed reads get exception responses."""
+        assert respond(image, bytes([0x04, 0x00, 0x0A, 0x00, 0x02])) == b'\x04\x04\x05\xdc\x04\xb0'
+        assert respond(image, bytes([0x06, 0x00, 0x0A, 0x00, 0x01])) == bytes([0x86, ILLEGAL_FUNCTION])
+        assert respond(image, bytes([0x04, 0x00, 0x0A, 0x00, 0x00])) == b'\x84\x03'
+
+    def test_client_records_successful_reads(self):
+        """Test the inverter client fills the image and skips failed reads."""
+        image = RegisterImage(max_age=15)
+        client = SolaxInverterClient('192.168.1.100', register_image=image)
+        client.client = Mock()
+        client.client.read_input_registers.return_value = Mock(
+            registers=[1500, 1200], isError=Mock(return_value=False)
+        )
+        client.read_registers(0x000A, 2, 'PV power')
+        client.client.read_input_registers.return_value = Mock(isError=Mock(return_value=True))
+        client.read_registers(0x0014, 9, 'battery')
+
+        assert image.read(0x000A, 2) == [1500, 1200]
+        assert list(image.stats()['groups']) == ['0x000A']
+
+
+class TestModbusGateway:
+    """Test suite for ModbusGateway."""
+
+    def test_serves_cached_registers(self, gateway, image):
+        """Test a Modbus client reads the image, never the inverter."""
+        client = ModbusTcpClient('127.0.0.1', port=gateway.server_address[1])
+        assert client.connect()
+        try:
+            result = client.read_input_registers(address=0x000A, count=2, device_id=1)
+            assert not result.isError()
+            assert result.registers == [1500, 1200]
+
+            image.update(0x000A, [1600, 1300])
+            result = client.read_input_registers(address=0x000A, count=2, device_id=1)
+            assert result.registers == [1600, 1300]
+
+            result = client.read_input_registers(address=0x0014, count=9, device_id=1)
+            assert result.isError()
+            assert result.exception_code == ILLEGAL_DATA_ADDRESS
+        finally:
+            client.close()
+
+        assert gateway.stats()['requests'] == 3
+
+    def test_stale_group_refused(self, gateway, image):
+        """Test a group past its max age answers gateway-target-failed."""
+        image.update(0x000A, [1500, 1200], now=time.monotonic() - 60)
+        with socket.create_connection(gateway.server_address, timeout=2) as sock:
+            sock.sendall(struct.pack('>HHHBBHH', 7, 0, 6, 1, 0x04, 0x000A, 2))
+            reply = sock.recv(64)
+        assert reply == struct.pack('>HHHBBB', 7, 0, 3, 1, 0x84, GATEWAY_TARGET_FAILED)
+        assert gateway.stats()['refused'] == 1
+
+    def test_other_unit_refused(self, gateway):
+        """Test requests for another unit id get gateway-path-unavailable."""
+        with socket.create_connection(gateway.server_address, timeout=2) as sock:
+            sock.sendall(struct.pack('>HHHBBHH', 9, 0, 6, 2, 0x04, 0x000A, 2))
+            reply = sock.recv(64)
+        assert reply == struct.pack('>HHHBBB', 9, 0, 3, 2, 0x84, GATEWAY_PATH_UNAVAILABLE)
+        assert gateway.stats()['refused'] == 1
+
+    def test_pipelined_requests_answered_in_order(self, gateway):
+        """Test several frames in one segment get one reply each, in order."""
+        frames = b''.join(
+            struct.pack('>HHHBBHH', tid, 0, 6, 1, 0x04, 0x0003 + tid, 1) for tid in range(4)
+        )
+        with socket.create_connection(gateway.server_address, timeout=2) as sock:
+            sock.sendall(frames)
+            data = b''
+            while len(data) < 4 * 11:
+                data += sock.recv(256)
+        replies = [struct.unpack('>HHHBBBH', data[i:i + 11]) for i in range(0, 44, 11)]
+        assert [r[0] for r in replies] == [0, 1, 2, 3]
+        assert [r[6] for r in replies] == [3000, 3100, 50, 52]
+
+    def test_disallowed_source_closed(self, image):
+        """Test connections from outside the allowlist are closed unanswered."""
+        gw = ModbusGateway(
+            image, bind_host='127.0.0.1', port=0,
+            allowed_networks=[ipaddress.ip_network('192.168.0.0/16')],
+        )
+        gw.start()
+        try:
+            with socket.create_connection(gw.server_address, timeout=2) as sock:
+                assert sock.recv(64) == b''
+            assert gw.stats()['rejected'] == 1
+        finally:
+            gw.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])
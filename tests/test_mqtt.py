@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Solax MQTT sink
+Tests packet encoding, deadband filtering, batching and the offline queue
+against a local broker stand-in
+"""
+
+import pytest
+import socket
+import struct
+import threading
+import time
+from types import SimpleNamespace
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.presentation.mqtt import (
+    MqttSink,
+    changed,
+    deadband_for,
+    encode_remaining_length,
+    publish_packet,
+)
+
+
+SAMPLE = {
+    'pv1_power': 1500,
+    'grid_voltage_r': 230.1,
+    'battery_soc': 64,
+    'run_mode': 'Normal',
+    'timestamp': '2026-01-01 12:00:00',
+}
+
+
+class FakeBroker:
+    """Minimal MQTT 3.1.1 broker stand-in recording what clients send."""
+
+    def __init__(self, port=0):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(('127.0.0.1', port))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.connects = []
+        self.published = []  # (topic, payload, retain)
+        self.disconnected = threading.Event()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        self.listener.close()
+
+    def messages(self):
+        with self._lock:
+            return list(self.published)
+
+    def wait_for(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate(self.messages()):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def _serve(self):
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            return
+        buffer = b''
+        with conn:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                while True:
+                    packet = self._take(buffer)
+                    if packet is None:
+                        break
+                    first, body, buffer = packet
+                    self._handle(conn, first, body)
+        self.disconnected.set()
+
+    @staticmethod
+    def _take(buffer):
+        length, multiplier, i = 0, 1, 1
+        while True:
+            if i >= len(buffer):
+                return None
+            digit = buffer[i]
+            length += (digit & 0x7F) * multiplier
+            multiplier *= 128
+            i += 1
+            if not digit & 0x80:
+                break
+        if len(buffer) < i + length:
+            return None
+        return buffer[0], buffer[i:i + length], buffer[i + length:]
+
+    def _handle(self, conn, first, body):
+        kind = first & 0xF0
+        if kind == 0x10:
+            self.connects.append(body)
+            conn.sendall(b'\x20\x02\x00\x00')
+        elif kind == 0x30:
+            (size,) = struct.unpack('!H', body[:2])
+            topic = body[2:2 + size].decode()
+            with self._lock:
+                self.published.append((topic, body[2 + size:].decode(), bool(first & 1)))
+        elif kind == 0xC0:
+            conn.sendall(b'\xd0\x00')
+
+
+def snapshot(**overrides):
+    """Build a bus-style message."""
+    return SimpleNamespace(data={**SAMPLE, **overrides})
+
+
+@pytest.fixture
+def broker():
+    b = FakeBroker()
+    yield b
+    b.close()
+
+
+class TestMqttEncoding:
+    """Test suite for MQTT packet helpers and change detection."""
+
+    def test_remaining_length(self):
+        """Test variable-length integers at the encoding boundaries."""
+        assert encode_remaining_length(0) == b'\x00'
+        assert encode_remaining_length(127) == b'\x7f'
+        assert encode_remaining_length(128) == b'\x80\x01'
+        assert encode_remaining_length(16383) == b'\xff\x7f'
+        assert encode_remaining_length(16384) == b'\x80\x80\x01'
+
+    def test_publish_packet(self):
+        """Test a retained QoS 0 publish is framed as the spec requires."""
+        assert publish_packet('a/b', '12') == b'\x31\x07\x00\x03a/b12'
+        assert publish_packet('a/b', '12', retain=False)[0] == 0x30
+
+    def test_deadbands(self):
+        """Test exact and name-part deadbands and the any-change default."""
+        bands = {'_power': 20.0, 'battery_power': 5.0}
+        assert deadband_for('pv1_power', bands) == 20.0
+        assert deadband_for('battery_power', bands) == 5.0
+        assert deadband_for('grid_power_r', bands) == 20.0
+        assert deadband_for('battery_soc', bands) == 0.0
+        assert not changed(1500, 1519, 20.0)
+        assert changed(1500, 1480, 20.0)
+        assert changed(230.1, 230.2, 0.0)
+        assert changed(0.1, 0.30000000000000004, 0.2)
+        assert changed('Normal', 'Fault', 0.0)
+
+
+class TestMqttSink:
+    """Test suite for MqttSink against the broker stand-in."""
+
+    def test_publishes_retained_per_field_topics(self, broker):
+        """Test each field gets a retained topic, excluding the timestamp."""
+        sink = MqttSink('127.0.0.1', broker.port, prefix='home/solax')
+        sink.start()
+        sink.handle(snapshot())
+        assert broker.wait_for(lambda m: len(m) >= 5)
+        sink.stop()
+
+        published = {t: (p, r) for t, p, r in broker.messages()}
+        assert published['home/solax/pv1_power'] == ('1500', True)
+        assert published['home/solax/grid_voltage_r'] == ('230.1', True)
+        assert published['home/solax/run_mode'] == ('Normal', True)
+        assert 'home/solax/timestamp' not in published
+        assert broker.messages()[-1] == ('home/solax/status', 'offline', True)
+        assert broker.disconnected.wait(2)
+        # Last will marks the monitor offline if the connection drops
+        assert b'home/solax/status' in broker.connects[0]
+
+    def test_change_only_publishing_cuts_traffic(self, broker):
+        """Test values inside their deadband are not republished."""
+        sink = MqttSink('127.0.0.1', broker.port)
+        sink.start()
+        sink.handle(snapshot())
+        assert broker.wait_for(lambda m: any(t == 'solax/pv1_power' for t, _, _ in m))
+        for i in range(50):
+            sink.handle(snapshot(pv1_power=1500 + i % 10, grid_voltage_r=230.1 + (i % 3) * 0.1))
+        sink.handle(snapshot(pv1_power=1600, battery_soc=65))
+        assert broker.wait_for(lambda m: ('solax/battery_soc', '65', True) in m)
+        sink.stop()
+
+        fields = [t for t, _, _ in broker.messages() if t != 'solax/status']
+        assert len(fields) == 4 + 2
+        assert fields.count('solax/pv1_power') == 2
+        stats = sink.stats()
+        assert stats['snapshots'] == 52
+        assert stats['suppressed'] == 52 * 4 - 6
+
+    def test_snapshot_changes_sent_as_one_batch(self, broker):
+        """Test one tick's changed fields leave in a single write."""
+        sink = MqttSink('127.0.0.1', broker.port)
+        sink.start()
+        assert broker.wait_for(lambda m: ('solax/status', 'online', True) in m)
+        sink.handle(snapshot())
+        assert broker.wait_for(lambda m: len(m) >= 5)
+        stats = sink.stats()
+        sink.stop()
+
+        assert stats['published'] == 4
+        assert stats['batches'] == 1
+
+    def test_offline_queue_flushes_on_connect(self):
+        """Test changes made while the broker is down arrive once it is up."""
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()
+
+        sink = MqttSink('127.0.0.1', port)
+        sink.start()
+        for soc in (60, 61, 62):
+            sink.handle(snapshot(battery_soc=soc))
+        assert sink.stats()['pending'] == 4
+        assert not sink.stats()['connected']
+
+        broker = FakeBroker(port)
+        try:
+            assert broker.wait_for(lambda m: len(m) >= 5, timeout=10)
+            sink.stop()
+            published = [(t, p) for t, p, _ in broker.messages()]
+            assert ('solax/battery_soc', '62') in published
+            assert ('solax/battery_soc', '60') not in published
+        finally:
+            broker.close()
+
+    def test_stop_without_broker(self):
+        """Test stopping while the broker is unreachable does not hang."""
+        sink = MqttSink('127.0.0.1', 1)
+        sink.start()
+        sink.handle(snapshot())
+        started = time.monotonic()
+        sink.stop()
+        assert time.monotonic() - started < 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])
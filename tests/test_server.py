@@ -0,0 +1,995 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Solax presentation domain
+Tests TelemetryServer routes against a live loopback server
+"""
+
+import asyncio
+import gzip
+import hashlib
+import http.client
+import ipaddress
+import json
+import math
+import pytest
+import re
+import socket
+import sqlite3
+import threading
+import time
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.data.memory import MemoryStore
+from solax_modbus.presentation.admission import (
+    ClientRateLimiter, RouteLimiter, TokenBucket,
+)
+from solax_modbus.presentation.allowlist import Allowlist, compile_ranges
+from solax_modbus.presentation.assets import IMMUTABLE_CACHE_CONTROL, DashboardAssets
+from solax_modbus.presentation.compression import (
+    COMPRESSION_MIN_BYTES, negotiate_encoding,
+)
+from solax_modbus.presentation.history_format import decode_binary, group_width
+from solax_modbus.presentation.metrics import LatencyHistogram, RequestMetrics
+from solax_modbus.presentation.server import (
+    DEFAULT_ALLOWED_NETWORKS, HistoryCache, StateHolder, TelemetryBroadcaster,
+    TelemetryRequestHandler, TelemetryServer,
+)
+
+
+SAMPLE = {
+    'pv1_power': 1500,
+    'pv2_power': 1200,
+    'battery_power': -400,
+    'battery_soc': 64,
+    'grid_power_r': 100,
+    'grid_power_s': 120,
+    'grid_power_t': 90,
+}
+
+LOOPBACK = [ipaddress.IPv4Network('127.0.0.0/8')]
+
+
+@pytest.fixture
+def store():
+    """Create an in-memory history store."""
+    s = MemoryStore()
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def server(store):
+    """Start a telemetry server on an ephemeral loopback port."""
+    srv = TelemetryServer(
+        StateHolder(), bind_host='127.0.0.1', port=0,
+        allowed_networks=LOOPBACK, store=store,
+    )
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def request(server, path, headers=None):
+    """Issue a GET against the server; return (status, headers, body)."""
+    port = server.server_address[1]
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        conn.close()
+
+
+class TestHistoryCaching:
+    """Test pre-encoded history responses and ETag revalidation."""
+
+    @pytest.mark.parametrize('path', ['/api/history', '/api/history/12mo'])
+    def test_etag_revalidation(self, server, path):
+        """Test a matching If-None-Match is answered 304 with no body."""
+        status, headers, body = request(server, path)
+        assert status == 200
+        etag = headers['ETag']
+        assert etag.startswith('"')
+        assert set(json.loads(body)) == {
+            'pv_power', 'battery_power', 'battery_soc', 'grid_power_total'
+        }
+
+        status, headers, body = request(server, path, {'If-None-Match': etag})
+        assert status == 304
+        assert headers['ETag'] == etag
+        assert body == b''
+
+    def test_cached_until_rollup(self, server, store, monkeypatch):
+        """Test the store is queried again only after a rollup."""
+        calls = []
+        query = store.query_history
+        monkeypatch.setattr(
+            store, 'query_history', lambda *a, **k: calls.append(a) or query(*a, **k)
+        )
+
+        _, headers, _ = request(server, '/api/history')
+        request(server, '/api/history')
+        assert len(calls) == 4
+
+        store.write_sample(SAMPLE, ts=int(time.time()))
+        store.rollup()
+        status, fresh, body = request(
+            server, '/api/history', {'If-None-Match': headers['ETag']}
+        )
+        assert status == 200
+        assert len(calls) == 8
+        assert fresh['ETag'] != headers['ETag']
+        assert json.loads(body)['pv_power'][0]['avg'] == pytest.approx(2700)
+
+
+    def test_cache_is_bounded(self):
+        """Test the oldest body is evicted once the cache is full."""
+        cache = HistoryCache(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, 1, key.encode())
+        assert cache.lookup('a', 1) is None
+        assert cache.lookup('c', 1)[0].body == b'c'
+
+
+class TestDeltaHistory:
+    """Test ?since= delta history responses."""
+
+    def test_delta_returns_newer_buckets_and_cursor(self, server, store):
+        """Test a delta holds buckets at or after since and the next cursor."""
+        now = int(time.time())
+        current = now - now % 900
+        for offset in (1800, 3600):
+            store.write_sample(SAMPLE, ts=now - offset)
+        store.rollup()
+
+        cursor = (now - 1800) - (now - 1800) % 900
+        status, headers, body = request(server, f'/api/history?since={cursor}')
+        assert status == 200
+        assert 'ETag' not in headers
+        delta = json.loads(body)
+        assert delta['cursor'] == cursor
+        assert [p['bucket_ts'] for p in delta['pv_power']] == [cursor]
+
+        # A sample not yet rolled up arrives as the open bucket
+        store.write_sample(dict(SAMPLE, pv1_power=2500), ts=now)
+        delta = json.loads(request(server, f'/api/history?since={cursor}')[2])
+        assert [p['bucket_ts'] for p in delta['pv_power']] == [cursor, current]
+        assert delta['pv_power'][-1]['avg'] == pytest.approx(3700)
+        assert delta['cursor'] == cursor
+
+    def test_open_bucket_replaces_partial_rollup(self, server, store):
+        """Test the live aggregate supersedes a stored partial open bucket."""
+        now = int(time.time())
+        store.write_sample(SAMPLE, ts=now)
+        store.rollup()
+        store.write_sample(dict(SAMPLE, pv1_power=3500), ts=now)
+
+        current = now - now % 900
+        delta = json.loads(request(server, f'/api/history?since={current}')[2])
+        assert len(delta['pv_power']) == 1
+        assert delta['pv_power'][0]['avg'] == pytest.approx((2700 + 4700) / 2)
+        assert delta['cursor'] == current
+
+    def test_empty_delta_keeps_cursor(self, server):
+        """Test a delta with nothing new echoes the cursor back."""
+        status, _, body = request(server, '/api/history/12mo?since=1000')
+        assert status == 200
+        delta = json.loads(body)
+        assert delta['cursor'] == 1000
+        assert delta['battery_soc'] == []
+
+    def test_invalid_since(self, server):
+        """Test a non-integer cursor is rejected with 400."""
+        assert request(server, '/api/history?since=yesterday')[0] == 400
+
+
+class TestHistoryFormats:
+    """Test columnar and binary history wire formats."""
+
+    @pytest.fixture
+    def history(self, store):
+        """Roll up buckets an hour apart, leaving gaps between them."""
+        now = int(time.time())
+        start = (now - 3600) - (now - 3600) % 900
+        store.write_sample(SAMPLE, ts=start)
+        store.write_sample(dict(SAMPLE, pv1_power=1501, battery_soc=65), ts=start + 3600)
+        store.rollup()
+        return start
+
+    def test_columnar(self, server, history):
+        """Test parallel arrays on a fixed step with null for gaps."""
+        status, _, body = request(server, '/api/history?format=columnar')
+        assert status == 200
+        data = json.loads(body)
+        assert (data['start'], data['step'], data['count']) == (history, 900, 5)
+        pv = data['series']['pv_power']
+        assert pv['avg'] == [2700, None, None, None, 2701]
+        assert data['series']['battery_soc']['max'][-1] == 65
+
+    def test_columnar_quantized_and_smaller(self, server, store, history):
+        """Test quantized columnar bodies are integer and smaller than rows."""
+        store.write_sample(dict(SAMPLE, pv1_power=1600), ts=history)
+        store.rollup()
+        rows = request(server, '/api/history')[2]
+        body = request(server, '/api/history?format=columnar&quantize=1')[2]
+        assert json.loads(body)['series']['pv_power']['avg'][0] == 2750
+        assert len(body) < len(rows)
+
+    def test_binary_round_trip(self, server, history):
+        """Test the binary body decodes to float32 arrays with NaN gaps."""
+        status, headers, body = request(server, '/api/history?format=binary')
+        assert status == 200
+        assert headers['Content-Type'] == 'application/octet-stream'
+        start, step, series = decode_binary(body)
+        assert (start, step, len(series)) == (history, 900, 4)
+        avg = series[0][0]
+        assert avg[0] == 2700 and avg[4] == 2701
+        assert all(math.isnan(v) for v in avg[1:4])
+
+    def test_formats_cached_separately(self, server, history):
+        """Test each format has its own cached body and ETag."""
+        etags = {
+            request(server, f'/api/history?format={fmt}')[1]['ETag']
+            for fmt in ('rows', 'columnar', 'binary')
+        }
+        assert len(etags) == 3
+
+    def test_binary_delta_cursor_header(self, server, history):
+        """Test binary deltas report the next cursor in a header."""
+        _, headers, _ = request(server, f'/api/history?format=binary&since={history}')
+        assert headers['X-History-Cursor'] == str(history + 3600)
+
+    def test_invalid_format(self, server):
+        """Test an unknown format is rejected with 400."""
+        assert request(server, '/api/history?format=xml')[0] == 400
+
+
+class TestHistoryQuery:
+    """Test metrics/start/end/points history parameters."""
+
+    @pytest.fixture
+    def history(self, store):
+        """Roll up eight consecutive buckets with a single PV spike."""
+        now = int(time.time())
+        first = (now - 8 * 900) - (now - 8 * 900) % 900
+        for i in range(8):
+            pv = 9000 if i == 5 else 1000 + i
+            store.write_sample(dict(SAMPLE, pv1_power=pv, pv2_power=0), ts=first + i * 900)
+        store.rollup()
+        return first
+
+    def test_group_width(self):
+        """Test the group width is the smallest bucket multiple within budget."""
+        assert group_width(8 * 900, 100, 900) == 900
+        assert group_width(8 * 900, 4, 900) == 1800
+        assert group_width(8 * 900, 3, 900) == 2700
+        assert group_width(30 * 86400, 300, 900) == 9000
+
+    def test_metrics_selection(self, server, history):
+        """Test only the requested metrics are returned, in order."""
+        status, _, body = request(server, '/api/history?metrics=battery_soc,pv_power')
+        assert status == 200
+        assert list(json.loads(body)) == ['battery_soc', 'pv_power']
+
+    def test_points_downsample_preserves_extremes(self, server, history):
+        """Test a point budget reduces the series but keeps min and max."""
+        start = history
+        end = history + 8 * 900
+        body = request(
+            server, f'/api/history?metrics=pv_power&start={start}&end={end}&points=2'
+        )[2]
+        series = json.loads(body)['pv_power']
+        assert len(series) <= 3
+        assert max(p['max'] for p in series) == 9000
+        assert min(p['min'] for p in series) == 1000
+        assert all(p['bucket_ts'] % 3600 == 0 for p in series)
+
+    def test_start_end_range(self, server, history):
+        """Test start is inclusive and end exclusive."""
+        start = history + 2 * 900
+        body = request(
+            server,
+            f'/api/history?format=columnar&metrics=pv_power&start={start}&end={start + 1800}',
+        )[2]
+        data = json.loads(body)
+        assert (data['start'], data['count']) == (start, 2)
+        assert data['series']['pv_power']['max'] == [1002, 1003]
+
+    @pytest.mark.parametrize('query', [
+        'metrics=pv_power,bogus', 'metrics=,', 'start=1&end=1', 'points=wide',
+    ])
+    def test_invalid_parameters(self, server, query):
+        """Test malformed parameters are rejected with 400."""
+        assert request(server, '/api/history?' + query)[0] == 400
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiation and compressed responses."""
+
+    @pytest.mark.parametrize('header, expected', [
+        (None, None),
+        ('gzip', 'gzip'),
+        ('deflate, gzip;q=0.5', 'gzip'),
+        ('gzip;q=0', None),
+        ('identity', None),
+        ('*', 'gzip'),
+    ])
+    def test_negotiate_gzip(self, header, expected, monkeypatch):
+        """Test gzip negotiation honours q-values and wildcards."""
+        monkeypatch.setattr(
+            'solax_modbus.presentation.compression.SUPPORTED_ENCODINGS', ('gzip',)
+        )
+        assert negotiate_encoding(header) == expected
+
+    def test_dashboard_precompressed(self, server):
+        """Test the dashboard is served gzip-encoded from the start-time variant."""
+        shell = server.dashboard.shell.variants
+        assert 'gzip' in shell.variants()
+
+        status, headers, body = request(server, '/', {'Accept-Encoding': 'gzip'})
+        assert status == 200
+        assert headers['Content-Encoding'] == 'gzip'
+        assert headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(body) == shell.body
+        assert len(body) * 2 < len(shell.body)
+
+        status, headers, body = request(server, '/')
+        assert 'Content-Encoding' not in headers
+        assert body == shell.body
+
+    def test_small_json_not_compressed(self, server):
+        """Test bodies below the threshold are sent as identity."""
+        status, headers, body = request(
+            server, '/api/history/12mo', {'Accept-Encoding': 'gzip'}
+        )
+        assert len(body) < COMPRESSION_MIN_BYTES
+        assert 'Content-Encoding' not in headers
+
+    def test_large_history_compressed(self, server, store):
+        """Test large history bodies are compressed with a coding-specific ETag."""
+        now = int(time.time())
+        for offset in range(0, 3 * 86400, 900):
+            store.write_sample(SAMPLE, ts=now - offset)
+        store.rollup()
+
+        status, headers, body = request(server, '/api/history', {'Accept-Encoding': 'gzip'})
+        assert headers['Content-Encoding'] == 'gzip'
+        assert headers['ETag'].endswith('-gzip"')
+        assert len(json.loads(gzip.decompress(body))['pv_power']) > 200
+
+        status, _, _ = request(server, '/api/history', {
+            'Accept-Encoding': 'gzip', 'If-None-Match': headers['ETag'],
+        })
+        assert status == 304
+
+
+def open_stream(server, headers=None):
+    """Open /api/stream; return (connection, response)."""
+    port = server.server_address[1]
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', '/api/stream', headers=headers or {})
+    return conn, conn.getresponse()
+
+
+def read_event(response):
+    """Read one SSE event block; return its fields as a dict."""
+    fields = {}
+    while True:
+        line = response.fp.readline().decode('utf-8').rstrip('\n')
+        if not line:
+            if fields:
+                return fields
+            continue
+        name, _, value = line.partition(': ')
+        fields[name] = value
+
+
+class TestStateHolder:
+    """Test immutable snapshot publication."""
+
+    def test_snapshot_is_immutable_and_shared(self):
+        """Test readers share one read-only snapshot with pre-encoded JSON."""
+        state = StateHolder()
+        assert state.snapshot().version == 0
+
+        data = {'battery_soc': 64, 'mode': 'Normal'}
+        state.set(data)
+        data['battery_soc'] = 0  # Caller's dict is not aliased
+
+        snapshot = state.snapshot()
+        assert snapshot is state.snapshot()
+        assert state.get() is snapshot.data
+        assert snapshot.version == 1
+        assert json.loads(snapshot.encoded) == {'battery_soc': 64, 'mode': 'Normal'}
+        with pytest.raises(TypeError):
+            snapshot.data['battery_soc'] = 1
+        with pytest.raises(AttributeError):
+            snapshot.version = 5
+
+    def test_unserializable_field_does_not_raise(self):
+        """Test set() never fails the poll loop on odd field types."""
+        state = StateHolder()
+        state.set({'when': object()})
+        assert 'when' in json.loads(state.snapshot().encoded)
+
+    def test_telemetry_served_from_encoded_bytes(self, server):
+        """Test /api/telemetry returns the snapshot's encoded bytes verbatim."""
+        server.state.set({'battery_soc': 64})
+        status, _, body = request(server, '/api/telemetry')
+        assert status == 200
+        assert body == server.state.snapshot().encoded
+
+
+class TestTelemetryStream:
+    """Test the Server-Sent Events telemetry stream."""
+
+    def test_state_holder_notifies_subscribers(self):
+        """Test set() advances the version and calls subscribers."""
+        state = StateHolder()
+        seen = []
+        state.subscribe(lambda snapshot: seen.append((snapshot.version, dict(snapshot.data))))
+        state.set({'a': 1})
+        state.set({'a': 2})
+
+        assert state.version == 2
+        assert seen == [(1, {'a': 1}), (2, {'a': 2})]
+
+    def test_stream_pushes_snapshots(self, server):
+        """Test the latest snapshot is sent on connect and new ones are pushed."""
+        server.state.set({'battery_soc': 60})
+        conn, response = open_stream(server)
+        try:
+            assert response.status == 200
+            assert response.headers['Content-Type'] == 'text/event-stream'
+            assert read_event(response) == {'retry': '5000'}
+
+            event = read_event(response)
+            assert event['id'] == '1'
+            assert event['event'] == 'telemetry'
+            assert json.loads(event['data']) == {'battery_soc': 60}
+
+            server.state.set({'battery_soc': 61})
+            assert json.loads(read_event(response)['data']) == {'battery_soc': 61}
+        finally:
+            conn.close()
+
+    def test_stream_resumes_from_last_event_id(self, server):
+        """Test a reconnecting client receives the events it missed."""
+        for soc in (60, 61, 62):
+            server.state.set({'battery_soc': soc})
+
+        conn, response = open_stream(server, {'Last-Event-ID': '1'})
+        try:
+            read_event(response)
+            assert [read_event(response)['id'] for _ in range(2)] == ['2', '3']
+        finally:
+            conn.close()
+
+    def test_unknown_last_event_id_gets_latest(self):
+        """Test ids outside the backlog fall back to the latest snapshot."""
+        async def scenario():
+            state = StateHolder()
+            broadcaster = TelemetryBroadcaster(backlog=2)
+            for version in (1, 2, 3):
+                state.set({'v': version})
+                broadcaster.publish(state.snapshot())
+
+            assert [i for i, _ in await broadcaster.wait(None, 0)] == [3]
+            assert [i for i, _ in await broadcaster.wait(99, 0)] == [3]
+            assert [i for i, _ in await broadcaster.wait(2, 0)] == [3]
+            assert await broadcaster.wait(3, 0) == []
+            broadcaster.close()
+            assert await broadcaster.wait(3, 0) is None
+
+        asyncio.run(scenario())
+
+
+def set_later(state, data, delay=0.2):
+    """Publish a snapshot from another thread after a delay."""
+    timer = threading.Timer(delay, state.set, args=(data,))
+    timer.start()
+    return timer
+
+
+class TestLongPoll:
+    """Test long-polling /api/telemetry?after=<version>."""
+
+    def test_state_holder_wait(self):
+        """Test wait() blocks until set() and times out on no change."""
+        state = StateHolder()
+        state.set({'a': 1})
+        assert state.wait(0, timeout=0).version == 1
+
+        started = time.monotonic()
+        assert state.wait(1, timeout=0.1).version == 1
+        assert time.monotonic() - started >= 0.1
+
+        timer = set_later(state, {'a': 2}, delay=0.1)
+        snapshot = state.wait(1, timeout=5)
+        timer.join()
+        assert snapshot.version == 2
+        assert dict(snapshot.data) == {'a': 2}
+
+    def test_newer_version_returned_immediately(self, server):
+        """Test a client behind the current version is answered at once."""
+        server.state.set({'battery_soc': 60})
+        server.state.set({'battery_soc': 61})
+        started = time.monotonic()
+        status, headers, body = request(server, '/api/telemetry?after=1')
+        assert time.monotonic() - started < 1
+        assert status == 200
+        assert headers['X-Telemetry-Version'] == '2'
+        assert json.loads(body) == {'battery_soc': 61}
+
+    def test_waits_for_next_snapshot(self, server):
+        """Test a client holding the current version is woken by set()."""
+        server.state.set({'battery_soc': 60})
+        timer = set_later(server.state, {'battery_soc': 61})
+        started = time.monotonic()
+        status, headers, body = request(server, '/api/telemetry?after=1&timeout=5')
+        timer.join()
+        assert 0.15 <= time.monotonic() - started < 4
+        assert headers['X-Telemetry-Version'] == '2'
+        assert json.loads(body) == {'battery_soc': 61}
+
+    def test_timeout_returns_same_version(self, server):
+        """Test an expired wait returns the unchanged snapshot."""
+        server.state.set({'battery_soc': 60})
+        status, headers, body = request(server, '/api/telemetry?after=1&timeout=0.2')
+        assert status == 200
+        assert headers['X-Telemetry-Version'] == '1'
+        assert json.loads(body) == {'battery_soc': 60}
+
+    @pytest.mark.parametrize('query', ['after=x', 'after=1&timeout=soon'])
+    def test_invalid_parameters(self, server, query):
+        """Test malformed after/timeout values are rejected with 400."""
+        status, _, _ = request(server, '/api/telemetry?' + query)
+        assert status == 400
+
+
+class TestAsyncServerCore:
+    """Test HTTP/1.1 connection handling of the asyncio server core."""
+
+    def test_keep_alive_reuses_connection(self, server):
+        """Test several requests are served on one HTTP/1.1 connection."""
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        try:
+            for path in ('/api/telemetry', '/api/stats', '/api/history'):
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 200
+                assert response.headers['Connection'] == 'keep-alive'
+            assert json.loads(request(server, '/api/stats')[2])['http']['connections'] >= 1
+        finally:
+            conn.close()
+
+    def test_method_not_allowed(self, server):
+        """Test non-GET methods are refused."""
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        try:
+            conn.request('POST', '/api/telemetry', body=b'')
+            response = conn.getresponse()
+            assert response.status == 405
+            assert response.headers['Allow'] == 'GET'
+        finally:
+            conn.close()
+
+    def test_slow_client_times_out(self, server, monkeypatch):
+        """Test a client that never finishes its request head is answered 408."""
+        monkeypatch.setattr(
+            'solax_modbus.presentation.server.HEADER_TIMEOUT_SECONDS', 0.2
+        )
+        sock = socket.create_connection(server.server_address, timeout=5)
+        try:
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: x\r\n')
+            assert sock.recv(64).startswith(b'HTTP/1.1 408')
+        finally:
+            sock.close()
+
+    def test_connection_limit(self, store):
+        """Test connections beyond the limit get a fast 503 with Retry-After."""
+        srv = TelemetryServer(
+            StateHolder(), bind_host='127.0.0.1', port=0,
+            allowed_networks=LOOPBACK, store=store, max_connections=1,
+        )
+        srv.start()
+        held = socket.create_connection(srv.server_address, timeout=5)
+        try:
+            time.sleep(0.1)
+            status, headers, _ = request(srv, '/api/telemetry')
+            assert status == 503
+            assert headers['Retry-After'] == '5'
+        finally:
+            held.close()
+            srv.stop()
+
+    def test_idle_streams_share_one_thread(self, server):
+        """Test many open SSE streams add no threads and all receive updates."""
+        # All streams come from one address; lift its burst allowance
+        server.admission.clients = ClientRateLimiter(burst=200)
+        threads_before = threading.active_count()
+        streams = [open_stream(server) for _ in range(100)]
+        try:
+            assert threading.active_count() == threads_before
+            server.state.set({'battery_soc': 70})
+            for _, response in streams:
+                read_event(response)  # retry
+                assert json.loads(read_event(response)['data']) == {'battery_soc': 70}
+        finally:
+            for conn, _ in streams:
+                conn.close()
+
+
+
+class TestAdmissionControl:
+    """Test per-client rate limits and per-route concurrency limits."""
+
+    def test_token_bucket(self):
+        """Test a bucket admits its burst, then refills at its rate."""
+        bucket = TokenBucket(rate=2.0, burst=3, now=0.0)
+        assert [bucket.take(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.take(0.0) == pytest.approx(0.5)
+        assert bucket.take(0.5) == 0.0
+
+    def test_client_limiter_is_per_ip_and_bounded(self):
+        """Test clients have separate buckets and old ones are forgotten."""
+        limiter = ClientRateLimiter(rate=1.0, burst=1, max_clients=2)
+        assert limiter.check('10.0.0.1', now=0.0) == 0.0
+        assert limiter.check('10.0.0.1', now=0.0) > 0
+        assert limiter.check('10.0.0.2', now=0.0) == 0.0
+        limiter.check('10.0.0.3', now=0.0)
+        assert limiter.stats() == {'clients': 2, 'limited': 1}
+        assert limiter.check('10.0.0.1', now=0.0) == 0.0  # Evicted, so fresh
+
+    def test_route_limiter_queues_then_rejects(self):
+        """Test slots are handed to queued requests and overflow is rejected."""
+        async def scenario():
+            limiter = RouteLimiter(limit=1, queue=1, queue_timeout=1.0)
+            assert await limiter.acquire()
+            queued = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            assert not await limiter.acquire()  # Queue full: immediate reject
+
+            limiter.release()
+            assert await queued
+            assert limiter.stats() == {'active': 1, 'queued': 0, 'limit': 1, 'rejected': 1}
+            limiter.release()
+            assert limiter.stats()['active'] == 0
+
+            limiter.queue_timeout = 0.05
+            await limiter.acquire()
+            assert not await limiter.acquire()  # Timed out in the queue
+
+        asyncio.run(scenario())
+
+    def test_route_limiter_timeout_returns_handed_slot(self, monkeypatch):
+        """Test a slot handed over as the queue timeout fires is released."""
+        limiter = RouteLimiter(limit=1, queue=1)
+
+        async def release_then_time_out(waiter, timeout):
+            limiter.release()  # Hands the slot to this waiter
+            raise asyncio.TimeoutError
+
+        async def scenario():
+            assert await limiter.acquire()
+            monkeypatch.setattr(asyncio, 'wait_for', release_then_time_out)
+            assert not await limiter.acquire()
+            monkeypatch.undo()
+            assert limiter.stats()['active'] == 0
+            assert await limiter.acquire()
+
+        asyncio.run(scenario())
+
+    def test_rate_limited_client_gets_429(self, server):
+        """Test a client over its rate is answered 429 with Retry-After."""
+        server.admission.clients = ClientRateLimiter(rate=0.5, burst=2)
+        statuses = [request(server, '/api/telemetry')[0] for _ in range(2)]
+        status, headers, _ = request(server, '/api/telemetry')
+        assert statuses == [200, 200]
+        assert status == 429
+        assert headers['Retry-After'] == '2'
+
+    def test_history_burst_overflow_gets_503(self, server, monkeypatch):
+        """Test history overflow is rejected fast while telemetry still answers."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_encode(*args):
+            started.set()
+            release.wait(5)
+            return b'{}', None
+
+        limiter = server.admission.limiter('/api/history')
+        limiter.limit, limiter.queue = 1, 0
+        monkeypatch.setattr(TelemetryRequestHandler, '_encode_series', slow_encode)
+        blocked = threading.Thread(target=request, args=(server, '/api/history?start=0'))
+        blocked.start()
+        try:
+            assert started.wait(5)
+            began = time.monotonic()
+            status, headers, _ = request(server, '/api/history?start=0')
+            assert status == 503
+            assert headers['Retry-After'] == '2'
+            assert request(server, '/api/telemetry')[0] == 200
+            assert time.monotonic() - began < 1
+        finally:
+            release.set()
+            blocked.join()
+        history = json.loads(request(server, '/api/stats')[2])['admission']['groups']['history']
+        assert (history['active'], history['rejected']) == (0, 1)
+
+
+
+class TestAllowlist:
+    """Test the compiled IPv4/IPv6 allowlist."""
+
+    def test_ranges_are_merged(self):
+        """Test overlapping and adjacent networks compile to one range."""
+        starts, ends = compile_ranges([
+            ipaddress.ip_network('10.0.1.0/24'),
+            ipaddress.ip_network('10.0.0.0/24'),
+            ipaddress.ip_network('10.0.0.128/25'),
+            ipaddress.ip_network('10.0.3.0/24'),
+        ])
+        assert len(starts) == 2
+        assert ends[0] == int(ipaddress.ip_address('10.0.1.255'))
+
+    @pytest.mark.parametrize('address, allowed', [
+        ('192.168.1.20', True),
+        ('8.8.8.8', False),
+        ('fd12:3456::1', True),
+        ('fe80::1%eth0', True),
+        ('2001:db8::1', False),
+        ('::ffff:192.168.1.20', True),
+        ('::ffff:8.8.8.8', False),
+        ('not-an-ip', False),
+    ])
+    def test_default_networks(self, address, allowed):
+        """Test IPv4, IPv6, scoped and IPv4-mapped addresses."""
+        assert Allowlist(DEFAULT_ALLOWED_NETWORKS).allows(address) is allowed
+
+    def test_large_allowlist(self):
+        """Test thousands of networks match exactly at their boundaries."""
+        networks = [ipaddress.ip_network(f'10.{i // 256}.{i % 256}.0/25') for i in range(4096)]
+        allowlist = Allowlist(networks)
+        assert allowlist.stats()['ipv4_ranges'] == 4096
+        assert allowlist.allows('10.3.7.127')
+        assert not allowlist.allows('10.3.7.128')
+        assert not allowlist.allows('10.16.0.0')
+
+    def test_decision_cache_is_bounded(self):
+        """Test repeat checks hit the cache and old entries are evicted."""
+        allowlist = Allowlist([ipaddress.ip_network('10.0.0.0/8')], cache_size=2)
+        for address in ('10.0.0.1', '10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.1'):
+            allowlist.allows(address)
+        stats = allowlist.stats()
+        assert (stats['cache_hits'], stats['cache_misses']) == (1, 4)
+
+    def test_dual_stack_server(self, store):
+        """Test the default bind accepts IPv6 and IPv4-mapped clients."""
+        srv = TelemetryServer(
+            StateHolder(), port=0, store=store,
+            allowed_networks=[ipaddress.ip_network('::1/128'), LOOPBACK[0]],
+        )
+        srv.start()
+        try:
+            port = srv.server_address[1]
+            for host in ('::1', '127.0.0.1'):
+                conn = http.client.HTTPConnection(host, port, timeout=5)
+                try:
+                    conn.request('GET', '/api/telemetry')
+                    assert conn.getresponse().status == 200
+                finally:
+                    conn.close()
+        finally:
+            srv.stop()
+
+
+class TestRequestMetrics:
+    """Test per-route request instrumentation."""
+
+    def test_histogram_percentiles(self):
+        """Test percentiles report the bucket bound reaching the rank."""
+        histogram = LatencyHistogram(bounds_ms=(1, 10, 100))
+        for seconds in [0.0005] * 90 + [0.05] * 9 + [0.3]:
+            histogram.observe(seconds)
+        stats = histogram.stats()
+        assert (stats['p50_ms'], stats['p90_ms'], stats['p99_ms']) == (1, 1, 100)
+        assert stats['max_ms'] == pytest.approx(300)
+        assert stats['buckets'] == {'le_1': 90, 'le_10': 0, 'le_100': 9, 'inf': 1}
+
+    def test_unknown_routes_share_one_entry(self):
+        """Test arbitrary paths cannot grow the route table."""
+        metrics = RequestMetrics(['/api/telemetry'])
+        for path in ('/a', '/b', '/api/telemetry'):
+            metrics.record(path, 404 if path != '/api/telemetry' else 200, 10, 0.001, 0.0)
+        stats = metrics.stats()
+        assert set(stats) == {'/api/telemetry', 'other'}
+        assert stats['other']['statuses'] == {'404': 2}
+
+    def test_requests_are_recorded(self, server):
+        """Test counts, statuses and bytes per route appear in /api/stats."""
+        server.state.set({'battery_soc': 64})
+        _, _, body = request(server, '/api/telemetry')
+        request(server, '/missing')
+        routes = json.loads(request(server, '/api/stats')[2])['routes']
+
+        telemetry = routes['/api/telemetry']
+        assert telemetry['count'] == 1
+        assert telemetry['statuses'] == {'200': 1}
+        assert telemetry['bytes_sent'] > len(body)
+        assert telemetry['latency']['count'] == 1
+        assert routes['other']['statuses'] == {'404': 1}
+
+    def test_held_responses_not_timed(self, server, store):
+        """Test long-polls and exports are counted but kept out of latency."""
+        server.state.set({'battery_soc': 64})
+        assert request(server, '/api/telemetry?after=1&timeout=0.2')[0] == 200
+        assert request(server, '/api/telemetry')[0] == 200
+        assert request(server, '/api/export?table=raw')[0] == 200
+        routes = json.loads(request(server, '/api/stats')[2])['routes']
+
+        assert routes['/api/telemetry']['count'] == 2
+        assert routes['/api/telemetry']['latency']['count'] == 1
+        assert routes['/api/telemetry']['latency']['max_ms'] < 200
+        assert routes['/api/export']['count'] == 1
+        assert routes['/api/export']['latency']['count'] == 0
+
+    def test_store_lock_wait_split_out(self, server, store):
+        """Test time blocked on the store lock is reported separately."""
+        store._lock.acquire()
+        timer = threading.Timer(0.2, store._lock.release)
+        timer.start()
+        try:
+            assert request(server, '/api/history?start=0')[0] == 200
+        finally:
+            timer.join()
+        routes = json.loads(request(server, '/api/stats')[2])['routes']
+        history = routes['/api/history']
+        assert history['store_lock_wait']['max_ms'] >= 150
+        assert history['latency']['max_ms'] >= history['store_lock_wait']['max_ms']
+
+
+class TestStaticAssets:
+    """Test the dashboard shell and its content-hashed assets."""
+
+    def test_shell_links_hashed_assets(self, server):
+        """Test placeholders are replaced by hashed URLs that serve the files."""
+        _, _, body = request(server, '/')
+        urls = re.findall(r'(?:href|src)="(/static/[^"]+)"', body.decode())
+        assert sorted(u.rsplit('.', 1)[1] for u in urls) == ['css', 'js']
+        assert '{{' not in body.decode()
+
+        for url in urls:
+            status, headers, content = request(server, url)
+            assert status == 200
+            assert headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+            name = url.rsplit('/', 1)[1]
+            stem, digest, suffix = name.split('.')
+            source = (server.static_dir / f'{stem}.{suffix}').read_bytes()
+            assert content == source
+            assert digest == hashlib.sha256(source).hexdigest()[:len(digest)]
+
+    def test_shell_revalidates_by_etag(self, server):
+        """Test a repeat visit to the shell gets 304 with no body."""
+        status, headers, _ = request(server, '/')
+        assert status == 200
+        assert headers['Cache-Control'] == 'no-cache'
+        status, _, body = request(server, '/', {'If-None-Match': headers['ETag']})
+        assert status == 304
+        assert body == b''
+
+    def test_unknown_asset_not_found(self, server):
+        """Test stale or unhashed asset URLs get 404."""
+        assert request(server, '/static/dashboard.js')[0] == 404
+        assert request(server, '/static/dashboard.000000000000.js')[0] == 404
+
+    def test_missing_asset_fails_load(self, tmp_path):
+        """Test a shell naming an unreadable asset does not load."""
+        shell = tmp_path / 'shell.html'
+        shell.write_text('<script src="{{ app.js }}"></script>')
+        assert DashboardAssets.load(shell, tmp_path) is None
+        (tmp_path / 'app.js').write_text('run();')
+        assets = DashboardAssets.load(shell, tmp_path)
+        assert list(assets.assets) == [
+            '/static/app.%s.js' % hashlib.sha256(b'run();').hexdigest()[:12]
+        ]
+
+
+class TestExport:
+    """Test the chunked /api/export stream."""
+
+    def test_csv_export_is_chunked(self, server, store):
+        """Test raw rows stream as chunked CSV with a header line."""
+        now = int(time.time())
+        for offset in range(3):
+            store.write_sample(SAMPLE, ts=now - 3 + offset)
+        status, headers, body = request(server, '/api/export?table=raw')
+        assert status == 200
+        assert headers['Transfer-Encoding'] == 'chunked'
+        assert headers['Content-Type'].startswith('text/csv')
+        lines = body.decode().splitlines()
+        assert lines[0] == 'ts,pv_power,battery_power,battery_soc,grid_power_total'
+        assert lines[1:] == [f'{now - 3 + i},2700,-400,64,310' for i in range(3)]
+
+    def test_ndjson_export_reads_past_store_lock(self, server, tmp_path, monkeypatch):
+        """Test a SQLite export streams in batches while the writer holds the lock."""
+        from solax_modbus.data.storage import TimeSeriesStore
+        import solax_modbus.presentation.server as server_module
+        monkeypatch.setattr(server_module, 'EXPORT_BATCH_ROWS', 7)
+        sqlite = TimeSeriesStore(str(tmp_path / 'history.db'))
+        now = int(time.time())
+        for offset in range(50):
+            sqlite.write_sample(dict(SAMPLE, battery_soc=offset), ts=now - 50 + offset)
+        server.store = sqlite
+        sqlite._lock.acquire()
+        try:
+            status, _, body = request(server, '/api/export?table=raw&format=ndjson')
+        finally:
+            sqlite._lock.release()
+            sqlite.close()
+        assert status == 200
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row['battery_soc'] for row in rows] == list(range(50))
+        assert rows[0]['ts'] == now - 50
+
+    def test_bad_parameters_rejected(self, server):
+        """Test unknown tables, formats and malformed bounds get 400."""
+        for query in ('table=journal_state', 'format=xml', 'start=yesterday'):
+            assert request(server, f'/api/export?{query}')[0] == 400
+
+    def test_failed_export_is_truncated(self, server, store):
+        """Test a read error mid-export closes without the terminating chunk."""
+        def failing(table, start, end, batch_rows):
+            yield [(0, 1, 2, 3, 4)]
+            raise sqlite3.OperationalError('disk I/O error')
+
+        store.export_rows = failing
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            sock.sendall(b'GET /api/export HTTP/1.1\r\nHost: x\r\n\r\n')
+            data = b''
+            while True:
+                received = sock.recv(4096)
+                if not received:
+                    break
+                data += received
+
+        assert data.startswith(b'HTTP/1.1 200')
+        assert b'0,1,2,3,4' in data
+        assert not data.endswith(b'0\r\n\r\n')
+        assert b'HTTP/1.1 500' not in data
+
+    def test_disconnect_cancels_export(self, server, store):
+        """Test a client going away closes the export and frees its slot."""
+        closed = threading.Event()
+
+        def endless(table, start, end, batch_rows):
+            try:
+                while True:
+                    yield [(0, 1, 2, 3, 4)] * batch_rows
+            finally:
+                closed.set()
+
+        store.export_rows = endless
+        sock = socket.create_connection(server.server_address, timeout=5)
+        sock.sendall(b'GET /api/export HTTP/1.1\r\nHost: x\r\n\r\n')
+        assert sock.recv(4096).startswith(b'HTTP/1.1 200')
+        sock.close()
+
+        assert closed.wait(5)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            stats = json.loads(request(server, '/api/stats')[2])
+            if stats['admission']['groups']['export']['active'] == 0:
+                break
+            time.sleep(0.05)
+        assert stats['admission']['groups']['export']['active'] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])
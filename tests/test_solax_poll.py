@@ -4,7 +4,10 @@ Unit tests for Solax X3 Hybrid 6.0-D Inverter Monitoring Script
 Tests core functionality with mocked Modbus communication
 """
 
+import io
+import logging
 import pytest
+import threading
 import time
 from unittest.mock import Mock, MagicMock, patch, call
 from pymodbus.exceptions import ModbusException
@@ -13,7 +16,19 @@ from pymodbus.exceptions import ModbusException
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.data.memory import MemoryStore
 from solax_modbus.main import SolaxInverterClient, InverterDisplay
+from solax_modbus.presentation.console import (
+    AnsiRenderer, DisplayWorker, SummaryRenderer, create_renderer, display_width,
+)
+from solax_modbus.presentation.server import StateHolder
+from solax_modbus.presentation.tui import (
+    _KEY_RESIZE,
+    TuiDisplay,
+    compose_rows,
+    live_value,
+    sparkline,
+)
 
 
 class TestSolaxInverterClient:
@@ -312,6 +327,291 @@ class TestInverterDisplay:
         assert "IMPORTING 800W" in captured.out
 
 
+class TestConsoleRenderers:
+    """Test suite for in-place and summary console rendering."""
+
+    DATA = {
+        'timestamp': '2025-10-22 14:32:15',
+        'run_mode': 'Normal',
+        'pv1_voltage': 385.4,
+        'pv2_voltage': 382.1,
+        'pv1_power': 3160,
+        'pv2_power': 2980,
+        'battery_voltage': 270.5,
+        'battery_soc': 78,
+        'battery_power': 3354,
+        'feed_in_power': 0,
+        'inverter_temperature': 42,
+    }
+
+    def test_ansi_first_frame_is_full(self):
+        """Test the first frame clears the screen and draws every line."""
+        out = io.StringIO()
+        AnsiRenderer(out).update(self.DATA)
+        assert out.getvalue().startswith('\x1b[H\x1b[2J')
+        assert 'State of Charge: 78%' in out.getvalue()
+
+    def test_ansi_rewrites_only_changed_cells(self):
+        """Test a one-value change is written as a single short patch."""
+        out = io.StringIO()
+        renderer = AnsiRenderer(out)
+        renderer.update(self.DATA)
+        first = len(out.getvalue())
+        renderer.update(dict(self.DATA, battery_soc=79))
+        patch = out.getvalue()[first:]
+        assert '\x1b[2J' not in patch
+        assert patch.count('H') == 2  # one cursor move to the cell, one to the end
+        assert '9' in patch and 'State of Charge' not in patch
+        assert len(patch) < 20
+
+        renderer.update(dict(self.DATA, battery_soc=79))
+        assert len(out.getvalue()) == first + len(patch)  # unchanged: nothing written
+
+    def test_ansi_layout_change_redraws(self):
+        """Test a frame with a different line count is drawn in full."""
+        out = io.StringIO()
+        renderer = AnsiRenderer(out)
+        renderer.update(self.DATA)
+        first = len(out.getvalue())
+        renderer.update(dict(self.DATA, energy_today=28.4))
+        assert out.getvalue()[first:].startswith('\x1b[H\x1b[2J')
+
+    def test_patch_column_counts_wide_glyphs(self):
+        """Test cursor columns account for double-width emoji."""
+        assert display_width('🔋 Battery') == 10
+        assert display_width('☀️  Solar') == 9
+        patch = AnsiRenderer._patch(3, '🔋 Load 5W', '🔋 Load 6W')
+        assert patch == '\x1b[3;9H6'
+
+    def test_summary_is_rate_limited(self):
+        """Test non-terminal output is one line per interval."""
+        out = io.StringIO()
+        renderer = SummaryRenderer(out, interval=60)
+        for now in (0, 10, 59, 60, 100):
+            renderer.update(self.DATA, now=now)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 2
+        assert lines[0] == (
+            '2025-10-22 14:32:15 Normal | PV 6140W | Battery 78% +3354W | '
+            'Feed-in 0W | Inverter 42°C'
+        )
+
+    def test_renderer_follows_tty(self):
+        """Test terminals get in-place rendering and pipes get summaries."""
+        tty = io.StringIO()
+        tty.isatty = lambda: True
+        assert isinstance(create_renderer(tty), AnsiRenderer)
+        assert isinstance(create_renderer(io.StringIO()), SummaryRenderer)
+        display = InverterDisplay(stream=io.StringIO(), summary_interval=0)
+        display.update({'feed_in_power': -800})
+        display.update({'feed_in_power': 1500})
+        assert display.renderer.stream.getvalue() == 'Feed-in -800W\nFeed-in 1500W\n'
+
+
+class TestDisplayWorker:
+    """Test suite for the snapshot-following display thread."""
+
+    def test_renders_published_snapshots(self):
+        """Test each snapshot is rendered off the publishing thread."""
+        state = StateHolder()
+        rendered = []
+        worker = DisplayWorker(state, lambda data: rendered.append(data), interval=0)
+        worker.start()
+        try:
+            state.set({'battery_soc': 64})
+            deadline = time.monotonic() + 2
+            while not rendered and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        assert rendered == [{'battery_soc': 64}]
+
+    def test_bursts_coalesce_to_latest(self):
+        """Test snapshots published within one interval render once, as the latest."""
+        state = StateHolder()
+        rendered = []
+        worker = DisplayWorker(state, lambda data: rendered.append(data), interval=0.3)
+        worker.start()
+        try:
+            state.set({'battery_soc': 0})
+            time.sleep(0.1)
+            for soc in range(1, 6):
+                state.set({'battery_soc': soc})
+            time.sleep(0.5)
+        finally:
+            worker.stop()
+        assert rendered == [{'battery_soc': 0}, {'battery_soc': 5}]
+        assert worker.stats() == {'frames': 2, 'skipped': 4}
+
+    def test_slow_render_does_not_block_publisher(self):
+        """Test set() returns at once while a render is in progress."""
+        state = StateHolder()
+        started = threading.Event()
+
+        def slow(data):
+            started.set()
+            time.sleep(0.5)
+
+        worker = DisplayWorker(state, slow, interval=0)
+        worker.start()
+        try:
+            state.set({'battery_soc': 1})
+            assert started.wait(2)
+            begin = time.monotonic()
+            state.set({'battery_soc': 2})
+            assert time.monotonic() - begin < 0.1
+        finally:
+            worker.stop()
+
+
+class FakeScreen:
+    """Records curses window calls."""
+
+    def __init__(self, height=24, width=80):
+        self.size = (height, width)
+        self.writes = []
+        self.clears = 0
+        self.keys = []
+
+    def resize(self, height, width):
+        """Change size the way a terminal does: new size plus KEY_RESIZE."""
+        self.size = (height, width)
+        self.keys.append(_KEY_RESIZE)
+
+    def getch(self):
+        return self.keys.pop(0) if self.keys else -1
+
+    def getmaxyx(self):
+        return self.size
+
+    def addstr(self, y, x, text):
+        self.writes.append((y, text))
+
+    def clear(self):
+        self.clears += 1
+
+    def clrtoeol(self):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def refresh(self):
+        pass
+
+
+class TestTuiDisplay:
+    """Test suite for the curses dashboard layout and row diffing."""
+
+    def test_sparkline_scales_columns(self):
+        """Test columns average their points and span the block range."""
+        points = [(0, 0), (1, 10), (2, 20), (3, 30)]
+        assert sparkline(points, 4, 0, 4) == '▁▃▅█'
+        assert sparkline(points, 2, 0, 4) == '▁█'
+        assert sparkline([(3, 5)], 4, 0, 4) == '   ▁'
+        assert sparkline([], 3, 0, 4) == '   '
+
+    def test_rows_fit_width(self):
+        """Test every row fits the screen and sparklines fill the rest."""
+        data = {'pv1_power': 3160, 'pv2_power': 2980, 'battery_soc': 78}
+        series = {'battery_soc': [(ts, ts) for ts in range(0, 3600, 5)]}
+        rows = compose_rows(data, series, 60, now=3600)
+        assert all(len(row) <= 59 for row in rows)
+        pv = next(row for row in rows if row.startswith('PV'))
+        soc = next(row for row in rows if row.startswith('SOC'))
+        assert '6140W' in pv and pv.rstrip().endswith('6140W')
+        assert soc.endswith('█') and len(soc) == 59
+
+    def test_only_changed_rows_written(self):
+        """Test a refresh rewrites just the rows whose text changed."""
+        screen = FakeScreen()
+        tui = TuiDisplay(screen)
+        tui.update({'battery_soc': 78, 'timestamp': 't1'})
+        assert screen.clears == 1
+        first = len(screen.writes)
+
+        tui.update({'battery_soc': 79, 'timestamp': 't1'})
+        changed = screen.writes[first:]
+        assert [y for y, _ in changed] == [4]
+        assert '79%' in changed[0][1]
+
+        screen.resize(30, 100)
+        tui.update({'battery_soc': 79, 'timestamp': 't1'})
+        assert screen.clears == 2
+
+    def test_resize_forces_full_repaint(self):
+        """Test a KEY_RESIZE repaints every row at the new width."""
+        screen = FakeScreen()
+        tui = TuiDisplay(screen)
+        data = {'battery_soc': 78, 'timestamp': 't1'}
+        tui.update(data)
+        first = len(screen.writes)
+
+        screen.resize(24, 40)
+        tui.update(data)
+        repainted = screen.writes[first:]
+        assert screen.clears == 2
+        assert screen.keys == []
+        assert len(repainted) == len(compose_rows(data, {}, 40, 0))
+        assert all(len(text) <= 39 for _, text in repainted)
+
+        # Resized and back to the same size between updates: still repainted
+        screen.resize(24, 40)
+        tui.update(data)
+        assert screen.clears == 3
+
+    def test_live_values_match_storage(self):
+        """Test live values use the storage derivation."""
+        data = {'pv1_power': 1500, 'grid_power_r': 100, 'grid_power_s': -40}
+        assert live_value(data, 'grid_power_total') == 60
+        assert live_value(data, 'pv_power') is None
+        assert live_value({}, 'grid_power_total') is None
+
+    def test_logs_held_while_open(self):
+        """Test terminal log output is buffered until the TUI closes."""
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        root = logging.getLogger()
+        root.addHandler(handler)
+        try:
+            with patch('solax_modbus.presentation.tui.sys.stderr', stream):
+                tui = TuiDisplay(FakeScreen())
+                tui.capture_logs()
+                assert handler not in root.handlers
+                logging.getLogger('solax_modbus.test').warning('held back')
+                assert stream.getvalue() == ''
+
+                tui.close()
+            assert handler in root.handlers
+            assert 'held back' in stream.getvalue()
+        finally:
+            root.removeHandler(handler)
+
+    def test_sparklines_follow_recent_window(self):
+        """Test the TUI loads the last hour once, then only newer points."""
+        store = MemoryStore()
+        now = int(time.time())
+        for ts in range(now - 7200, now - 10, 60):
+            store.write_sample({'battery_soc': 50}, ts=ts)
+        windows = []
+
+        def recent(metric, window):
+            windows.append(window)
+            return store.query_recent(metric, window)
+
+        tui = TuiDisplay(FakeScreen(), recent=recent)
+        tui.update({})
+        assert windows[0] >= 3600
+        assert len(tui._series['battery_soc']) == 60
+
+        store.write_sample({'battery_soc': 60}, ts=now)
+        windows.clear()
+        tui.update({})
+        assert max(windows) < 120
+        assert tui._series['battery_soc'][-1] == (now, 60)
+        store.close()
+
+
 class TestMainExecution:
     """Test suite for main execution logic."""
     
@@ -332,6 +632,8 @@ class TestMainExecution:
         mock_args.serve = True
         mock_args.http_port = 8181
         mock_args.allow = None
+        mock_args.mqtt_host = None
+        mock_args.gateway_port = None
         mock_parse_args.return_value = mock_args
         
         # Setup client mock
@@ -380,6 +682,8 @@ class TestMainExecution:
         mock_args.serve = False  # --no-serve sets this to False
         mock_args.http_port = 8181
         mock_args.allow = None
+        mock_args.mqtt_host = None
+        mock_args.gateway_port = None
         mock_parse_args.return_value = mock_args
 
         # Setup client mock
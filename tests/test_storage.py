@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Solax data domain
+Tests TimeSeriesStore persistence, the sample journal and the background StorageWriter
+"""
+
+import pytest
+import threading
+import time
+from unittest.mock import Mock
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.data.journal import SampleJournal
+from solax_modbus.data.ringbuffer import RawRingBuffer
+from solax_modbus.data.storage import TimeSeriesStore
+from solax_modbus.data.writer import MaintenanceSchedule, StorageWriter, POLICY_BLOCK
+
+
+SAMPLE = {
+    'pv1_power': 1500,
+    'pv2_power': 1200,
+    'battery_power': -400,
+    'battery_soc': 64,
+    'grid_power_r': 100,
+    'grid_power_s': 120,
+    'grid_power_t': 90,
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a store backed by a temporary database."""
+    s = TimeSeriesStore(str(tmp_path / 'history.db'))
+    yield s
+    s.close()
+
+
+class TestTimeSeriesStore:
+    """Test suite for TimeSeriesStore."""
+
+    def test_write_and_rollup(self, store):
+        """Test samples are aggregated into rollup buckets."""
+        now = int(time.time())
+        assert store.write_sample(SAMPLE, ts=now)
+        assert store.write_sample(dict(SAMPLE, pv1_power=2500), ts=now)
+
+        assert store.rollup() > 0
+        series = store.query_history('pv_power', 3600)
+
+        assert len(series) == 1
+        assert series[0]['avg'] == pytest.approx(3200)
+        assert series[0]['min'] == 2700
+        assert series[0]['max'] == 3700
+
+    def test_out_of_range_stored_as_null(self, store):
+        """Test out-of-range metrics are stored as NULL."""
+        assert store.write_sample(dict(SAMPLE, battery_soc=150))
+        store.rollup()
+
+        assert store.query_history('battery_soc', 3600) == []
+        assert len(store.query_history('pv_power', 3600)) == 1
+
+    def test_unknown_metric_rejected(self, store):
+        """Test query_history rejects unknown metrics."""
+        with pytest.raises(ValueError):
+            store.query_history('bogus', 3600)
+
+    @pytest.mark.parametrize('profile,synchronous,checkpoint', [
+        ('safe', 2, 1000),
+        ('balanced', 1, 1000),
+        ('low-wear', 1, 10000),
+    ])
+    def test_durability_profile_applied(self, tmp_path, profile, synchronous, checkpoint):
+        """Test each durability profile sets its PRAGMAs on open."""
+        s = TimeSeriesStore(str(tmp_path / 'p.db'), profile=profile)
+        try:
+            assert s._conn.execute('PRAGMA synchronous').fetchone()[0] == synchronous
+            assert s._conn.execute('PRAGMA wal_autocheckpoint').fetchone()[0] == checkpoint
+        finally:
+            s.close()
+
+    def test_unknown_profile_rejected(self, tmp_path):
+        """Test unknown durability profiles are rejected."""
+        with pytest.raises(ValueError):
+            TimeSeriesStore(str(tmp_path / 'p.db'), profile='reckless')
+
+    def test_ring_rebuilt_from_raw(self, tmp_path):
+        """Test the in-memory window is reloaded from the raw table on open."""
+        now = int(time.time())
+        s = TimeSeriesStore(str(tmp_path / 'r.db'))
+        s.write_sample(SAMPLE, ts=now - 90000)
+        s.write_sample(SAMPLE, ts=now - 60)
+        s.close()
+
+        s = TimeSeriesStore(str(tmp_path / 'r.db'))
+        try:
+            assert len(s._ring) == 1
+            assert s.query_recent('pv_power', 3600) == [{'ts': now - 60, 'value': 2700}]
+        finally:
+            s.close()
+
+
+class TestRawRingBuffer:
+    """Test suite for RawRingBuffer."""
+
+    def test_wraps_at_capacity(self):
+        """Test the oldest samples are overwritten once full."""
+        ring = RawRingBuffer(3)
+        for ts in range(5):
+            ring.append(ts, [ts, None, 50, -ts])
+
+        assert len(ring) == 3
+        assert ring.samples() == [
+            (2, 2, None, 50, -2),
+            (3, 3, None, 50, -3),
+            (4, 4, None, 50, -4),
+        ]
+        assert ring.latest_ts() == 4
+
+    def test_window_and_eviction(self):
+        """Test since-filtering and eviction use timestamp order."""
+        ring = RawRingBuffer(10)
+        for ts in (100, 200, 300, 400):
+            ring.append(ts, [ts, 0, 0, 0])
+
+        assert ring.points('pv_power', since=250) == [(300, 300), (400, 400)]
+        assert ring.evict_before(300) == 2
+        assert ring.points('pv_power') == [(300, 300), (400, 400)]
+
+    def test_aggregate_matches_rollup(self):
+        """Test bucket aggregates skip NULLs and report avg/min/max."""
+        ring = RawRingBuffer(10)
+        ring.append(900, [100, None, 0, 0])
+        ring.append(1000, [300, None, 0, 0])
+        ring.append(1800, [50, None, 0, 0])
+
+        assert ring.aggregate('pv_power', 0, 900) == {
+            900: (200.0, 100.0, 300.0),
+            1800: (50.0, 50.0, 50.0),
+        }
+        assert ring.aggregate('battery_power', 0, 900) == {}
+
+    def test_fixed_footprint(self):
+        """Test a day of 5-second samples stays within a few hundred KB."""
+        ring = RawRingBuffer(86400 // 5)
+        assert ring.nbytes < 512 * 1024
+
+
+class TestSampleJournal:
+    """Test suite for SampleJournal and journaled TimeSeriesStore writes."""
+
+    VALUES = [2700, -400, 64, 310]
+
+    def raw_count(self, store):
+        """Return the number of rows in the raw table."""
+        return store._conn.execute("SELECT COUNT(*) FROM raw").fetchone()[0]
+
+    def test_full_segment_sealed(self, tmp_path):
+        """Test a segment is sealed once it holds segment_records records."""
+        j = SampleJournal(str(tmp_path), segment_records=3)
+        assert [j.append(100 + i, self.VALUES) for i in range(3)] == [False, False, True]
+        j.append(200, self.VALUES)
+
+        sealed = j.sealed()
+        assert [seq for seq, _ in sealed] == [1]
+        assert [s[0] for s in sealed[0][1]] == [100, 101, 102]
+        j.close()
+
+    def test_unflushed_segments_replayed(self, tmp_path):
+        """Test samples left in the journal by a crash reach SQLite on open."""
+        now = int(time.time())
+        j = SampleJournal(str(tmp_path / 'journal'), segment_records=4)
+        for i in range(6):
+            j.append(now - 60 + i, self.VALUES)
+        del j  # Crash: active segment never sealed
+
+        s = TimeSeriesStore(str(tmp_path / 'j.db'), journal_dir=str(tmp_path / 'journal'))
+        try:
+            assert self.raw_count(s) == 6
+            assert len(s._ring) == 6
+        finally:
+            s.close()
+
+    def test_recycled_slot_does_not_replay_stale_records(self, tmp_path):
+        """Test records from a slot's previous use are rejected by the CRC salt."""
+        j = SampleJournal(str(tmp_path), segment_records=4)
+        for i in range(4):
+            j.append(100 + i, self.VALUES)
+        j.recycle(1)
+        j.append(500, self.VALUES)
+        j.seal()
+
+        assert [[s[0] for s in samples] for _, samples in j.sealed()] == [[500]]
+        j.close()
+
+    def test_compaction_is_exactly_once(self, tmp_path):
+        """Test a segment compacted before a crash is not inserted again."""
+        journal_dir = tmp_path / 'journal'
+        j = SampleJournal(str(journal_dir))
+        j.append(int(time.time()), self.VALUES)
+        j.seal()
+        segment = journal_dir / 'journal-0.seg'
+        image = segment.read_bytes()
+
+        s = TimeSeriesStore(str(tmp_path / 'j.db'), journal_dir=str(journal_dir))
+        s.close()
+        # Crash between commit and recycle: the sealed header is still on disk
+        segment.write_bytes(image)
+
+        s = TimeSeriesStore(str(tmp_path / 'j.db'), journal_dir=str(journal_dir))
+        try:
+            assert self.raw_count(s) == 1
+        finally:
+            s.close()
+
+    def test_journaled_store_rollup(self, tmp_path):
+        """Test rollup compacts active-segment records without sealing it."""
+        now = int(time.time())
+        s = TimeSeriesStore(
+            str(tmp_path / 'j.db'),
+            journal_dir=str(tmp_path / 'journal'),
+            journal_segment_records=3,
+        )
+        try:
+            assert s.write_sample(SAMPLE, ts=now)
+            assert s.rollup() == 4
+            assert self.raw_count(s) == 1
+            assert s.query_history('pv_power', 3600)[0]['avg'] == pytest.approx(2700)
+            assert s._journal.pending == 0
+            assert s._journal.active()[1][0][0] == now  # Still open, not sealed
+
+            assert s.write_sample(SAMPLE, ts=now)
+            assert s.write_sample(SAMPLE, ts=now)  # Fills and seals the segment
+            s.rollup()
+            assert self.raw_count(s) == 3
+        finally:
+            s.close()
+
+    def test_partly_compacted_segment_replayed_once(self, tmp_path):
+        """Test a crash after an active-segment compaction replays only the rest."""
+        now = int(time.time())
+        journal_dir = str(tmp_path / 'journal')
+        s = TimeSeriesStore(str(tmp_path / 'j.db'), journal_dir=journal_dir)
+        s.write_sample(SAMPLE, ts=now - 10)
+        s.rollup()
+        s.write_sample(SAMPLE, ts=now)
+        # Crash: stop the compactor without sealing or compacting the journal
+        s._closed = True
+        s._compact_wake.set()
+        s._compactor.join()
+        s._conn.close()
+
+        s = TimeSeriesStore(str(tmp_path / 'j.db'), journal_dir=journal_dir)
+        try:
+            rows = s._conn.execute("SELECT ts FROM raw ORDER BY ts").fetchall()
+            assert rows == [(now - 10,), (now,)]
+        finally:
+            s.close()
+
+
+class TestStorageWriter:
+    """Test suite for StorageWriter."""
+
+    def test_samples_written_on_worker_thread(self, store):
+        """Test queued samples reach the store with their poll timestamp."""
+        writer = StorageWriter(store)
+        writer.start()
+        ts = int(time.time())
+        assert writer.submit_sample(SAMPLE)
+        assert writer.submit_job('rollup', store.rollup)
+        writer.stop()
+
+        stats = writer.stats()
+        assert stats['written'] == 1
+        assert stats['jobs_run'] == 1
+        assert stats['queue_size'] == 0
+        series = store.query_history('pv_power', 3600)
+        assert series[0]['bucket_ts'] == ts - ts % 900
+
+    def test_drop_oldest_policy(self):
+        """Test a full queue discards the oldest item without blocking."""
+        gate = threading.Event()
+        mock_store = Mock()
+        mock_store.write_sample.side_effect = lambda data, ts: gate.wait(5)
+
+        writer = StorageWriter(mock_store, max_queue=2)
+        writer.start()
+        for i in range(5):
+            assert writer.submit_sample({'n': i})
+        time.sleep(0.05)
+        stats = writer.stats()
+        gate.set()
+        writer.stop()
+
+        assert stats['dropped'] >= 2
+        assert stats['queue_size'] <= 2
+        written = [c.args[0]['n'] for c in mock_store.write_sample.call_args_list]
+        assert written[-1] == 4
+
+    def test_drop_oldest_never_drops_jobs(self):
+        """Test overflow sheds queued samples and keeps maintenance jobs."""
+        gate = threading.Event()
+        mock_store = Mock()
+        mock_store.write_sample.side_effect = lambda data, ts: gate.wait(5)
+        rollup = Mock()
+
+        writer = StorageWriter(mock_store, max_queue=2)
+        writer.start()
+        assert writer.submit_sample({'n': 0})
+        time.sleep(0.05)  # Worker now holds sample 0
+        assert writer.submit_job('rollup', rollup)
+        assert writer.submit_sample({'n': 1})
+        assert writer.submit_sample({'n': 2})
+        assert writer.submit_job('prune', rollup)
+        assert writer.submit_sample({'n': 3}) is False
+        gate.set()
+        writer.stop()
+
+        assert rollup.call_count == 2
+        assert writer.stats()['dropped'] == 3
+        written = [c.args[0]['n'] for c in mock_store.write_sample.call_args_list]
+        assert written == [0]
+
+    def test_maintenance_queued_behind_earlier_samples(self):
+        """Test due jobs run after every sample submitted before them."""
+        order = []
+        mock_store = Mock()
+        mock_store.write_sample.side_effect = lambda data, ts: order.append(ts)
+
+        writer = StorageWriter(mock_store)
+        writer.start()
+        schedule = MaintenanceSchedule(writer, start=1000)
+        schedule.every(900, 'rollup', lambda: order.append('rollup'))
+        schedule.every(900, 'prune', lambda: order.append('prune'))
+        schedule.every(3600, 'rollup_daily', lambda: order.append('rollup_daily'))
+        for ts in range(1000, 3000, 300):
+            assert schedule.submit_sample({}, ts=ts)
+        writer.stop()
+
+        assert order == [
+            1000, 1300, 1600, 1900, 'rollup', 'prune',
+            2200, 2500, 2800, 'rollup', 'prune',
+        ]
+
+    def test_block_policy_waits_for_space(self):
+        """Test the block policy delays the producer instead of dropping."""
+        mock_store = Mock()
+        mock_store.write_sample.side_effect = lambda data, ts: time.sleep(0.01)
+
+        writer = StorageWriter(mock_store, max_queue=1, policy=POLICY_BLOCK)
+        writer.start()
+        for i in range(5):
+            assert writer.submit_sample({'n': i})
+        writer.stop()
+
+        assert writer.stats()['dropped'] == 0
+        assert mock_store.write_sample.call_count == 5
+
+    def test_job_failure_is_contained(self):
+        """Test a failing job is counted and does not stop the worker."""
+        writer = StorageWriter(Mock())
+        writer.start()
+        writer.submit_job('boom', Mock(side_effect=RuntimeError('boom')))
+        writer.submit_sample(SAMPLE)
+        writer.stop()
+
+        stats = writer.stats()
+        assert stats['failed'] == 1
+        assert stats['written'] == 1
+
+    def test_submit_after_stop_rejected(self):
+        """Test submissions are refused once the writer is stopped."""
+        writer = StorageWriter(Mock())
+        assert writer.submit_sample(SAMPLE) is False
+
+    def test_invalid_policy(self):
+        """Test unknown policies are rejected."""
+        with pytest.raises(ValueError):
+            StorageWriter(Mock(), policy='fifo')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Conformance tests for Solax history store backends
+Runs the same StoreBackend contract checks against every backend
+"""
+
+import pytest
+import threading
+import time
+
+# Import from src directory
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from solax_modbus.data.base import (
+    EXPORT_TABLES, STORE_BACKENDS, TIER_DAILY, TIER_ROLLUP, StoreBackend, create_store,
+)
+from solax_modbus.data import segment as segment_module
+from solax_modbus.data.segment import SegmentLogStore, SAMPLE_RECORD_SIZE
+
+
+SAMPLE = {
+    'pv1_power': 1500,
+    'pv2_power': 1200,
+    'battery_power': -400,
+    'battery_soc': 64,
+    'grid_power_r': 100,
+    'grid_power_s': 120,
+    'grid_power_t': 90,
+}
+
+
+@pytest.fixture(params=STORE_BACKENDS)
+def backend(request, tmp_path):
+    """Open each backend in turn on a temporary path."""
+    s = create_store(request.param, str(tmp_path / 'history'))
+    yield s
+    s.close()
+
+
+def bucket(ts, size=900):
+    """Return the bucket start for ts."""
+    return ts - ts % size
+
+
+class TestStoreBackendConformance:
+    """StoreBackend contract, run once per backend."""
+
+    def test_is_store_backend(self, backend):
+        """Test every backend implements the abstract interface."""
+        assert isinstance(backend, StoreBackend)
+
+    def test_rollup_aggregates_raw(self, backend):
+        """Test rollup produces avg/min/max per 15-minute bucket."""
+        now = int(time.time())
+        assert backend.write_sample(SAMPLE, ts=now)
+        assert backend.write_sample(dict(SAMPLE, pv1_power=2500), ts=now)
+        assert backend.write_sample(dict(SAMPLE, battery_soc=150), ts=now)
+
+        assert backend.rollup() > 0
+        pv = backend.query_history('pv_power', 3600)
+        soc = backend.query_history('battery_soc', 3600)
+
+        assert [p['bucket_ts'] for p in pv] == [bucket(now)]
+        assert pv[0]['avg'] == pytest.approx((2700 * 2 + 3700) / 3)
+        assert pv[0]['min'] == 2700
+        assert pv[0]['max'] == 3700
+        # Out-of-range SOC stored as NULL and excluded from the aggregate
+        assert soc[0]['avg'] == pytest.approx(64)
+
+    def test_rollup_is_idempotent(self, backend):
+        """Test repeated rollups upsert rather than duplicate buckets."""
+        now = int(time.time())
+        backend.write_sample(SAMPLE, ts=now)
+        backend.rollup()
+        backend.rollup()
+
+        assert len(backend.query_history('grid_power_total', 3600)) == 1
+
+    def test_history_is_chronological(self, backend):
+        """Test series are returned oldest first."""
+        now = int(time.time())
+        for offset in (0, 1800, 3600):
+            backend.write_sample(SAMPLE, ts=now - offset)
+        backend.rollup()
+
+        series = backend.query_history('pv_power', 7200)
+        stamps = [p['bucket_ts'] for p in series]
+        assert stamps == sorted(stamps)
+        assert len(stamps) == 3
+
+    def test_history_since_cursor(self, backend):
+        """Test since= limits series to buckets at or after the cursor."""
+        now = int(time.time())
+        for offset in (0, 1800, 3600):
+            backend.write_sample(SAMPLE, ts=now - offset)
+        backend.rollup()
+        backend.rollup_daily()
+
+        cursor = bucket(now - 1800)
+        series = backend.query_history('pv_power', 7200, since=cursor)
+        assert [p['bucket_ts'] for p in series] == [cursor, bucket(now)]
+        assert backend.query_history('pv_power', 7200, since=now + 900) == []
+        assert len(backend.query_history('pv_power', 7200, since=0)) == 3
+        daily = backend.query_history_12mo('pv_power', since=bucket(now, 86400))
+        assert [p['bucket_ts'] for p in daily] == [bucket(now, 86400)]
+
+    def test_history_columns_match_rows(self, backend):
+        """Test columnar queries return the same buckets as the row queries."""
+        now = int(time.time())
+        for offset in (0, 1800, 3600):
+            backend.write_sample(dict(SAMPLE, pv1_power=1000 + offset), ts=now - offset)
+        backend.rollup()
+        backend.rollup_daily()
+
+        rows = backend.query_history('pv_power', 7200)
+        columns = backend.query_history_columns('pv_power', 7200)
+        assert list(columns.bucket_ts) == [p['bucket_ts'] for p in rows]
+        assert list(columns.avg) == pytest.approx([p['avg'] for p in rows])
+        assert list(columns.max) == pytest.approx([p['max'] for p in rows])
+        recent = backend.query_history_columns('pv_power', 7200, since=bucket(now))
+        assert list(recent.bucket_ts) == [bucket(now)]
+        daily = backend.query_history_12mo_columns('pv_power')
+        assert list(daily.bucket_ts) == [bucket(now, 86400)]
+        with pytest.raises(ValueError):
+            backend.query_history_columns('bogus', 3600)
+
+    def test_export_rows_in_batches(self, backend):
+        """Test exports yield every row in order, batched and range-bounded."""
+        now = int(time.time())
+        for offset in range(5):
+            backend.write_sample(dict(SAMPLE, pv1_power=1000 + offset), ts=now - 5 + offset)
+        backend.rollup()
+
+        batches = list(backend.export_rows('raw', batch_rows=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+        rows = [row for b in batches for row in b]
+        assert [row[0] for row in rows] == list(range(now - 5, now))
+        assert rows[0][1:] == (2200, -400, 64, 310)
+        bounded = [row for b in backend.export_rows('raw', now - 4, now - 2) for row in b]
+        assert [row[0] for row in bounded] == [now - 4, now - 3]
+
+        rollup = [row for b in backend.export_rows('rollup') for row in b]
+        assert [(row[0], row[1]) for row in rollup] == [
+            (bucket(now), metric) for metric in sorted(EXPORT_TABLES['raw'][1:])
+        ]
+        with pytest.raises(ValueError):
+            next(backend.export_rows('journal_state'))
+
+    def test_lock_wait_is_per_thread_and_reset(self, backend):
+        """Test take_lock_wait reports contention once, on the waiting thread."""
+        backend._lock.acquire()
+        release = threading.Timer(0.1, backend._lock.release)
+        release.start()
+        backend.query_history('pv_power', 3600)
+        release.join()
+        assert backend.take_lock_wait() >= 0.05
+        assert backend.take_lock_wait() == 0.0
+
+    def test_prune_drops_expired_rows(self, backend):
+        """Test prune removes rollup buckets past the 30-day retention."""
+        now = int(time.time())
+        old = now - 31 * 86400
+        backend.write_sample(SAMPLE, ts=old)
+        backend.write_sample(SAMPLE, ts=now)
+        backend.rollup()
+        assert len(backend.query_history('pv_power', 40 * 86400)) == 2
+
+        assert backend.prune() >= 2
+        series = backend.query_history('pv_power', 40 * 86400)
+        assert [p['bucket_ts'] for p in series] == [bucket(now)]
+
+    def test_daily_rollup_and_prune(self, backend):
+        """Test daily rollup aggregates rollup buckets and prunes after 365 days."""
+        now = int(time.time())
+        backend.write_sample(SAMPLE, ts=now)
+        backend.write_sample(SAMPLE, ts=now - 400 * 86400)
+        backend.rollup()
+
+        assert backend.rollup_daily() == 2 * 4
+        assert len(backend.query_history_12mo('pv_power')) == 1
+        assert backend.prune_daily() == 4
+
+        daily = backend.query_history_12mo('battery_power')
+        assert [p['bucket_ts'] for p in daily] == [bucket(now, 86400)]
+        assert daily[0]['avg'] == pytest.approx(-400)
+
+    def test_recent_window_from_memory(self, backend):
+        """Test recent raw points and the open bucket are served from memory."""
+        now = int(time.time())
+        backend.write_sample(SAMPLE, ts=now - 7200)
+        backend.write_sample(SAMPLE, ts=now)
+        backend.write_sample(dict(SAMPLE, battery_soc=70), ts=now)
+
+        recent = backend.query_recent('battery_soc', 3600)
+        assert recent == [{'ts': now, 'value': 64}, {'ts': now, 'value': 70}]
+
+        live = backend.query_live_bucket('battery_soc')
+        assert live == {'bucket_ts': bucket(now), 'avg': 67.0, 'min': 64.0, 'max': 70.0}
+
+    def test_history_generation_tracks_tiers(self, backend):
+        """Test rollups advance only their own tier's generation."""
+        rollup_gen = backend.history_generation(TIER_ROLLUP)
+        daily_gen = backend.history_generation(TIER_DAILY)
+        backend.write_sample(SAMPLE)
+
+        backend.rollup()
+        assert backend.history_generation(TIER_ROLLUP) > rollup_gen
+        assert backend.history_generation(TIER_DAILY) == daily_gen
+
+        backend.rollup_daily()
+        assert backend.history_generation(TIER_DAILY) > daily_gen
+
+    def test_unknown_metric_rejected(self, backend):
+        """Test queries reject unknown metrics."""
+        with pytest.raises(ValueError):
+            backend.query_history('bogus', 3600)
+        with pytest.raises(ValueError):
+            backend.query_history_12mo('bogus')
+
+    def test_closed_store_is_inert(self, backend):
+        """Test a closed store refuses writes and returns empty results."""
+        backend.close()
+        backend.close()
+
+        assert backend.write_sample(SAMPLE) is False
+        assert backend.rollup() == 0
+        assert backend.query_history('pv_power', 3600) == []
+
+
+class TestSegmentLogStore:
+    """Backend-specific checks for the segment log."""
+
+    def test_history_survives_reopen(self, tmp_path):
+        """Test raw segments and rollup logs are replayed on open."""
+        now = int(time.time())
+        s = SegmentLogStore(str(tmp_path))
+        s.write_sample(SAMPLE, ts=now)
+        s.rollup()
+        s.close()
+
+        s = SegmentLogStore(str(tmp_path))
+        try:
+            assert len(s.query_history('pv_power', 3600)) == 1
+            s.write_sample(SAMPLE, ts=now)
+            assert s.rollup() == 4
+        finally:
+            s.close()
+
+    def test_rollup_reads_only_unrolled_segments(self, tmp_path, monkeypatch):
+        """Test rollup skips segments before the last bucket it rolled up."""
+        now = int(time.time())
+        s = SegmentLogStore(str(tmp_path))
+        try:
+            for hours in (5, 4, 3, 0):
+                s.write_sample(SAMPLE, ts=now - hours * 3600)
+            s.rollup()
+
+            decoded = []
+            original = segment_module.decode_samples
+            monkeypatch.setattr(
+                segment_module, 'decode_samples',
+                lambda buf, salt=0: decoded.append(len(buf)) or original(buf, salt),
+            )
+            s.write_sample(dict(SAMPLE, pv1_power=2500), ts=now)
+            s.rollup()
+
+            assert len(decoded) == 1
+            pv = s.query_history('pv_power', 6 * 3600)
+            assert len(pv) == 4
+            assert pv[-1]['avg'] == pytest.approx((2700 + 3700) / 2)
+        finally:
+            s.close()
+
+    def test_torn_tail_truncated(self, tmp_path):
+        """Test a partially written record is discarded on open."""
+        now = int(time.time())
+        s = SegmentLogStore(str(tmp_path))
+        s.write_sample(SAMPLE, ts=now)
+        s.close()
+
+        segment = [n for n in os.listdir(tmp_path) if n.endswith('.seg')][0]
+        with open(tmp_path / segment, 'ab') as f:
+            f.write(b'\xa5\x01\x02')
+
+        s = SegmentLogStore(str(tmp_path))
+        try:
+            assert os.path.getsize(tmp_path / segment) == SAMPLE_RECORD_SIZE
+            s.write_sample(SAMPLE, ts=now)
+            s.rollup()
+            assert s.query_history('pv_power', 3600)[0]['avg'] == pytest.approx(2700)
+        finally:
+            s.close()
+
+
+def test_unknown_backend_rejected(tmp_path):
+    """Test create_store rejects unknown backend names."""
+    with pytest.raises(ValueError):
+        create_store('leveldb', str(tmp_path))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, '-v'])